@@ -6,9 +6,38 @@ This version is more reliable as it accesses the raw data files directly.
 """
 
 import json
+import os
+import re
+import sys
 import time
-import requests
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+# Shared download helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from download_journal import DownloadJournal, TransientDownloadError
+from stroke_http_client import get_default_client
+from stroke_sources import get_source_set
+from stroke_store import Glyph
+from stroke_timeline import retime_glyph
+from stroke_writer import GlyphJSONWriter, atomic_open, write_glyphs, write_manifest
+
+# Finished characters are appended here so an interrupted run can resume
+JOURNAL_FILE = "chinese_download_journal.jsonl"
+
+# Ranked corpus output (--list): fixed-size shards plus an index by rank
+SHARD_SIZE = 500
+SHARD_FILENAME = "chinese_strokes_{:04d}.json"
+SHARD_INDEX = "index.json"
+CORPUS_DIR = "chinese_corpus"
+
+# hanzi-writer medians live in a 1024-unit em box with y pointing UP and the
+# baseline offset so that the top of the box is y=900 (hanzi-writer renders
+# them with `scale(1, -1) translate(0, -900)`). KanjiVG output is y-down.
+HANZI_WRITER_Y_ORIGIN = 900
+
+# Decimals written for canonical x, y and t
+COORD_PRECISION = 4
 
 # 100 most common characters for children learning Chinese
 BASIC_CHARACTERS = [
@@ -30,33 +59,32 @@ BASIC_CHARACTERS = [
 
 def fetch_from_github_raw(character: str) -> Optional[Dict]:
     """
-    Fetch directly from GitHub raw.
+    Fetch from hanzi-writer-data.
     Repository: https://github.com/chanind/hanzi-writer-data
     Files use the actual character in the filename, not hex codes!
+    
+    GitHub raw is one of several sources (see stroke_sources.py): a local
+    checkout via HANZI_WRITER_DIR and the jsDelivr npm CDN are used too,
+    fastest healthy source first.
+    
+    Returns None if the character is not in the dataset (HTTP 404).
+    If no source could be reached, TransientDownloadError is raised instead
+    of being swallowed.
     """
-    try:
-        # URL uses the actual character, not hex!
-        # Example: https://raw.githubusercontent.com/.../data/人.json
-        url = f"https://raw.githubusercontent.com/chanind/hanzi-writer-data/refs/heads/master/data/{character}.json"
-        
-        response = requests.get(url, timeout=15)
-        
-        if response.status_code == 200:
-            data = response.json()
-            unicode_hex = format(ord(character), '05x')
-            return {
-                'character': character,
-                'unicode': unicode_hex,
-                'stroke_count': len(data.get('strokes', [])),
-                'strokes': data.get('strokes', []),
-                'medians': data.get('medians', []),
-                'radical': data.get('radical', ''),
-            }
-        
-        return None
-            
-    except Exception as e:
+    result = get_source_set("hanzi-writer").fetch(ord(character))
+    if result is None:
         return None
+    data = json.loads(result.body)
+    
+    unicode_hex = format(ord(character), '05x')
+    return {
+        'character': character,
+        'unicode': unicode_hex,
+        'stroke_count': len(data.get('strokes', [])),
+        'strokes': data.get('strokes', []),
+        'medians': data.get('medians', []),
+        'radical': data.get('radical', ''),
+    }
 
 
 def download_full_dataset() -> Dict[str, Dict]:
@@ -103,10 +131,15 @@ def extract_characters_from_dataset(dataset: Dict, characters: List[str]) -> Lis
     return results
 
 
-def fetch_all_characters_individually(characters: List[str], delay: float = 0.5) -> List[Dict]:
+def fetch_all_characters_individually(characters: List[str], delay: float = 0.5,
+                                      journal_path: Optional[str] = JOURNAL_FILE) -> List[Dict]:
     """
     Fetch stroke data for all characters one by one.
     Uses longer delay to avoid rate limiting.
+    
+    Each finished character is appended to the journal right away, so a
+    rerun after an interruption only fetches what is still missing.
+    Pass journal_path=None to disable checkpointing.
     """
     results = []
     total = len(characters)
@@ -114,27 +147,181 @@ def fetch_all_characters_individually(characters: List[str], delay: float = 0.5)
     print(f"Fetching stroke data for {total} characters individually...")
     print("=" * 60)
     
-    for i, char in enumerate(characters, 1):
-        print(f"[{i}/{total}] Fetching {char}...", end='')
-        
-        data = fetch_from_github_raw(char)
-        
-        if data:
-            results.append(data)
-            print(f" ✓ ({data['stroke_count']} strokes)")
-        else:
-            print(f" ✗ Failed")
-        
-        # Be very respectful to the API - longer delay
-        if i < total:
-            time.sleep(delay)
+    journal = DownloadJournal(journal_path) if journal_path else None
+    if journal is not None and len(journal):
+        print(f"♻️  Resuming: {len(journal)} characters already in {journal_path}")
+    
+    try:
+        for i, char in enumerate(characters, 1):
+            if journal is not None and char in journal:
+                data = journal.get(char)
+                if data:
+                    results.append(data)
+                continue
+            
+            print(f"[{i}/{total}] Fetching {char}...", end='')
+            
+            try:
+                data = fetch_from_github_raw(char)
+            except TransientDownloadError as e:
+                print(f" ✗ Failed ({e}, will retry on next run)")
+                continue
+            
+            if data:
+                results.append(data)
+                if journal is not None:
+                    journal.record(char, data)
+                print(f" ✓ ({data['stroke_count']} strokes)")
+            else:
+                if journal is not None:
+                    journal.record_missing(char)
+                print(f" ✗ Not in hanzi-writer-data")
+            
+            # Be very respectful to the API - longer delay
+            if i < total:
+                time.sleep(delay)
+    finally:
+        if journal is not None:
+            journal.close()
     
     print("=" * 60)
     print(f"Successfully fetched {len(results)} out of {total} characters")
+    print(f"HTTP: {get_default_client().metrics.summary()}")
     
     return results
 
 
+def load_character_list(path: str) -> List[str]:
+    """
+    Read a character list file, keeping file order as rank order.
+    
+    Accepts plain lists (one character per line, runs of characters, or
+    delimited lists such as "一,右,雨") and frequency tables such as
+    "1\t的\t7922684". A line with a numeric column is a table row and gives
+    its first single non-ASCII character field; on any other line every such
+    field is kept, in order. Lines starting with '#' are comments.
+    """
+    characters = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = [field for field in re.split(r'[\t,;| ]+', line) if field]
+            single = [field for field in fields if len(field) == 1 and ord(field) > 0x7F]
+            if single and any(re.fullmatch(r'\d+(\.\d+)?', field) for field in fields):
+                characters.append(single[0])
+            elif single:
+                characters.extend(single)
+            elif len(fields) == 1:
+                # A run of characters on one line
+                characters.extend(char for char in fields[0] if ord(char) > 0x7F)
+    return characters
+
+
+def dedupe_characters(characters: List[str]) -> List[str]:
+    """Drop repeats, keeping the first (best) rank of each character."""
+    return list(dict.fromkeys(characters))
+
+
+def fetch_characters_concurrently(characters: List[str], workers: int = 8,
+                                  journal_path: Optional[str] = JOURNAL_FILE) -> List[Dict]:
+    """
+    Fetch many characters with a pool of workers over the shared HTTP client
+    (or straight from a local checkout if HANZI_WRITER_DIR is set).
+    Results keep the input (rank) order; the journal is written from this
+    thread as results arrive, so a rerun resumes where it stopped.
+    """
+    total = len(characters)
+    journal = DownloadJournal(journal_path) if journal_path else None
+    results: Dict[str, Dict] = {}
+    pending = []
+    
+    for char in characters:
+        if journal is not None and char in journal:
+            data = journal.get(char)
+            if data:
+                results[char] = data
+        else:
+            pending.append(char)
+    
+    print(f"Fetching {len(pending)} of {total} characters with {workers} workers "
+          f"({total - len(pending)} already journaled)...")
+    print("=" * 60)
+    
+    failed = 0
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(fetch_from_github_raw, char): char for char in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                char = futures[future]
+                try:
+                    data = future.result()
+                except TransientDownloadError:
+                    failed += 1
+                    continue
+                if data:
+                    results[char] = data
+                    if journal is not None:
+                        journal.record(char, data)
+                elif journal is not None:
+                    journal.record_missing(char)
+                if done % 100 == 0:
+                    print(f"  {done}/{len(pending)} fetched...")
+    finally:
+        if journal is not None:
+            journal.close()
+    
+    elapsed = time.perf_counter() - start
+    print("=" * 60)
+    print(f"Successfully fetched {len(results)} out of {total} characters in {elapsed:.1f}s")
+    if failed:
+        print(f"⚠️  {failed} characters failed with network errors; rerun to retry just those")
+    print(f"HTTP: {get_default_client().metrics.summary()}")
+    
+    return [results[char] for char in characters if char in results]
+
+
+def save_sharded(data: List[Dict], output_dir: str, shard_size: int = SHARD_SIZE) -> str:
+    """
+    Write a ranked corpus as fixed-size shards plus an index.
+    
+    Each shard (chinese_strokes_0000.json, ...) has the same format as
+    chinese_stroke_data.json, written compactly, and holds a contiguous rank
+    range, so an app can bundle only the first N shards. index.json maps
+    every character to its rank, key and shard, and records each shard's
+    SHA-256 and size (in place of a manifest per shard).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    index = {"version": 1, "shard_size": shard_size, "count": len(data),
+             "shards": [], "characters": []}
+    
+    for shard_number, first in enumerate(range(0, len(data), shard_size)):
+        shard_items = data[first:first + shard_size]
+        filename = SHARD_FILENAME.format(shard_number)
+        
+        with GlyphJSONWriter(os.path.join(output_dir, filename), indent=None, manifest=False) as writer:
+            for rank, item in enumerate(shard_items, first + 1):
+                key, entry = build_entry(item)
+                writer.write(key, entry)
+                index["characters"].append({"rank": rank, "character": entry['character'],
+                                            "key": key, "shard": shard_number})
+        
+        index["shards"].append({"file": filename, "first_rank": first + 1,
+                                "last_rank": first + len(shard_items),
+                                "sha256": writer.sha256, "bytes": writer.bytes})
+    
+    index_path = os.path.join(output_dir, SHARD_INDEX)
+    with atomic_open(index_path) as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    write_manifest(index_path, len(data), {"source": "hanzi-writer", "precision": COORD_PRECISION,
+                                           "shard_size": shard_size})
+    
+    print(f"\n✓ {len(data)} characters saved to {len(index['shards'])} shards in {output_dir}/")
+    return index_path
+
+
 def create_embedded_dataset() -> List[Dict]:
     """
     Fallback: Create a dataset with embedded data for common characters.
@@ -283,6 +470,8 @@ def create_embedded_dataset() -> List[Dict]:
                 'strokes': strokes,
                 'medians': medians,
                 'radical': data['radical'],
+                # Strokes are fake horizontal lines; validators reject these
+                'placeholder': True,
             })
     
     print(f"Created dataset with {len(results)} characters")
@@ -290,43 +479,97 @@ def create_embedded_dataset() -> List[Dict]:
     return results
 
 
+def canonicalize_medians(medians: List[List[List[float]]]) -> Tuple[List[List[Tuple[float, float]]], Dict]:
+    """
+    Convert hanzi-writer medians into the canonical stroke space shared with
+    the KanjiVG pipelines: y-down, normalized to 0-1 on the larger side of the
+    character's bounding box, and centered on the other axis.
+    
+    Returns the normalized strokes (lists of (x, y) points) together with
+    the transform that was applied, so the original coordinates can be
+    recovered as:
+        x_src = x * scale + min_x - offset_x
+        y_src = y_origin - (y * scale + min_y - offset_y)
+    """
+    # Flip into y-down space first so the bounding box is computed once
+    flipped = []
+    for median_points in medians:
+        stroke = [(float(p[0]), HANZI_WRITER_Y_ORIGIN - float(p[1]))
+                  for p in median_points if len(p) >= 2]
+        if stroke:
+            flipped.append(stroke)
+    
+    if not flipped:
+        return [], {}
+    
+    xs = [x for stroke in flipped for x, _ in stroke]
+    ys = [y for stroke in flipped for _, y in stroke]
+    min_x, max_x = min(xs), max(xs)
+    min_y, max_y = min(ys), max(ys)
+    
+    # Avoid division by zero
+    width = max_x - min_x if max_x > min_x else 1.0
+    height = max_y - min_y if max_y > min_y else 1.0
+    
+    # Use the larger dimension to maintain aspect ratio, center the other
+    scale = max(width, height)
+    offset_x = (scale - width) / 2
+    offset_y = (scale - height) / 2
+    
+    strokes_data = []
+    for stroke in flipped:
+        strokes_data.append([
+            (round((x - min_x + offset_x) / scale, COORD_PRECISION),
+             round((y - min_y + offset_y) / scale, COORD_PRECISION))
+            for x, y in stroke
+        ])
+    
+    transform = {
+        'source': 'hanzi-writer',
+        'y_origin': HANZI_WRITER_Y_ORIGIN,
+        'flip_y': True,
+        'scale': scale,
+        'min_x': min_x,
+        'min_y': min_y,
+        'offset_x': offset_x,
+        'offset_y': offset_y,
+    }
+    return strokes_data, transform
+
+
+def build_glyph(item: Dict) -> Glyph:
+    """Canonical, retimed array-backed glyph for one fetched character."""
+    # Same "U+XXXX" key format as the KanjiVG pipelines (4 digits minimum)
+    unicode_int = int(item['unicode'], 16)
+    key = f"U+{unicode_int:04X}"
+    
+    strokes_data, transform = canonicalize_medians(item.get('medians', []))
+    
+    extra = {'transform': transform}
+    if item.get('placeholder'):
+        extra['placeholder'] = True
+    return retime_glyph(Glyph.from_strokes(key, item['character'], unicode_int, strokes_data, extra))
+
+
+def build_entry(item: Dict) -> Tuple[str, Dict]:
+    """Key and Swift-loader entry for one fetched character; point dicts are made only here."""
+    glyph = build_glyph(item)
+    return glyph.key, glyph.to_entry(COORD_PRECISION)
+
+
 def save_to_json(data: List[Dict], filename: str = "chinese_stroke_data.json"):
-    """Save the collected data to a JSON file in the format expected by Swift."""
+    """
+    Save the collected data to a JSON file in the format expected by Swift.
+    
+    Medians are canonicalized at build time (see canonicalize_medians), so the
+    app can use the points as-is instead of flipping and rescaling on device.
+    """
     try:
-        # Convert array to dictionary with "U+XXXX" keys (Swift loader format)
-        dict_data = {}
-        for item in data:
-            # Use "U+XXXX" format as key (uppercase, 4 digits minimum)
-            unicode_int = int(item['unicode'], 16)
-            key = f"U+{item['unicode'].upper().zfill(4)}"
-            
-            # Convert medians to the format Swift expects: array of stroke arrays
-            # Each stroke is an array of {x, y, t} points
-            strokes_data = []
-            for stroke_idx, median_points in enumerate(item.get('medians', [])):
-                stroke_points = []
-                for point_idx, point in enumerate(median_points):
-                    if len(point) >= 2:
-                        # Calculate time value (evenly distributed across stroke)
-                        t_value = point_idx / max(1, len(median_points) - 1) if len(median_points) > 1 else 0
-                        stroke_points.append({
-                            'x': point[0],
-                            'y': point[1],
-                            't': t_value
-                        })
-                if stroke_points:
-                    strokes_data.append(stroke_points)
-            
-            dict_data[key] = {
-                'character': item['character'],
-                'codepoint': unicode_int,
-                'strokes': strokes_data
-            }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(dict_data, f, ensure_ascii=False, indent=2)
+        # Dictionary with "U+XXXX" keys (Swift loader format), one entry serialized at a time
+        count = write_glyphs(filename, (build_entry(item) for item in data),
+                             params={"source": "hanzi-writer", "precision": COORD_PRECISION})
         print(f"\n✓ Data saved to {filename}")
-        print(f"   Format: Dictionary with {len(dict_data)} entries (Swift-compatible)")
+        print(f"   Format: Dictionary with {count} entries (Swift-compatible)")
         return True
     except Exception as e:
         print(f"\n✗ Error saving file: {str(e)}")
@@ -336,6 +579,31 @@ def save_to_json(data: List[Dict], filename: str = "chinese_stroke_data.json"):
         return False
 
 
+def load_legacy_json(filename: str) -> List[Dict]:
+    """
+    Read a chinese_stroke_data.json written before canonicalization (raw
+    hanzi-writer coordinates under "U+0XXXX" keys) back into fetcher items,
+    so it can be re-saved in canonical form without fetching again.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        legacy = json.load(f)
+    
+    results = []
+    for entry in legacy.values():
+        if entry.get('transform'):
+            raise ValueError(f"{filename} is already canonicalized")
+        medians = [[[p['x'], p['y']] for p in stroke] for stroke in entry['strokes']]
+        results.append({
+            'character': entry['character'],
+            'unicode': format(entry['codepoint'], 'x'),
+            'stroke_count': len(medians),
+            'strokes': [],
+            'medians': medians,
+            'radical': '',
+        })
+    return results
+
+
 def create_swift_compatible_format(data: List[Dict], filename: str = "stroke_data_swift.json"):
     """Create a Swift-friendly JSON format optimized for iOS apps."""
     swift_data = {
@@ -353,9 +621,11 @@ def create_swift_compatible_format(data: List[Dict], filename: str = "stroke_dat
             "medians": item['medians'],
             "radical": item.get('radical', '')
         }
+        if item.get('placeholder'):
+            swift_data["characters"][char]["placeholder"] = True
     
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
+        with atomic_open(filename) as f:
             json.dump(swift_data, f, ensure_ascii=False, indent=2)
         print(f"✓ Swift-compatible data saved to {filename}")
         return True
@@ -400,6 +670,38 @@ def create_summary_report(data: List[Dict]):
     print("=" * 60)
 
 
+def build_ranked_corpus(argv: List[str]):
+    """
+    Build a sharded corpus from one or more ranked character list files:
+        --list FILE [--list FILE ...] [--limit N] [--workers N]
+        [--shard-size N] [--output DIR]
+    Lists are concatenated in order and deduplicated, so e.g. HSK1 followed
+    by a frequency list ranks HSK1 characters first.
+    """
+    def option(name: str, default: str) -> str:
+        return argv[argv.index(name) + 1] if name in argv else default
+    
+    characters = []
+    for idx, arg in enumerate(argv):
+        if arg == '--list':
+            listed = load_character_list(argv[idx + 1])
+            print(f"📄 {argv[idx + 1]}: {len(listed)} characters")
+            characters.extend(listed)
+    
+    characters = dedupe_characters(characters)
+    limit = int(option('--limit', '0'))
+    if limit:
+        characters = characters[:limit]
+    print(f"📚 {len(characters)} unique characters after dedupe\n")
+    
+    stroke_data = fetch_characters_concurrently(characters, workers=int(option('--workers', '8')))
+    if stroke_data:
+        save_sharded(stroke_data, option('--output', CORPUS_DIR), int(option('--shard-size', str(SHARD_SIZE))))
+        create_summary_report(stroke_data)
+    else:
+        print("\n❌ Failed to collect any data.")
+
+
 def main():
     """Main function to run the stroke data fetcher."""
     import sys
@@ -411,6 +713,18 @@ def main():
     use_embedded = '--embedded' in sys.argv
     use_individual = '--individual' in sys.argv
     
+    if '--canonicalize' in sys.argv:
+        # Rewrite an existing raw-coordinate file in place
+        idx = sys.argv.index('--canonicalize')
+        filename = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else "chinese_stroke_data.json"
+        print(f"Canonicalizing {filename}...")
+        save_to_json(load_legacy_json(filename), filename)
+        return
+    
+    if '--list' in sys.argv:
+        build_ranked_corpus(sys.argv)
+        return
+    
     stroke_data = []
     
     if use_embedded:
@@ -453,6 +767,8 @@ def main():
         print("\nUsage:")
         print("  python3 chinese_stroke_fetcher.py           : Fetch from hanzi-writer CDN")
         print("  python3 chinese_stroke_fetcher.py --embedded : Use built-in stroke counts (offline)")
+        print("  python3 chinese_stroke_fetcher.py --canonicalize FILE : Convert an old raw-coordinate file")
+        print("  python3 chinese_stroke_fetcher.py --list hsk1.txt --list freq.txt --limit 3000 : Ranked, sharded corpus")
     else:
         print("\n❌ Failed to collect any data.")
         print("Try running with --embedded flag for sample data.")
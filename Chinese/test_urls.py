@@ -1,41 +1,197 @@
 #!/usr/bin/env python3
 """
-Quick test script to verify hanzi-writer-data URLs work correctly
+Concurrent source prober for the stroke data sources.
+
+Samples characters, fetches them from every source of a dataset (or from a
+custom URL template) at one or more concurrency levels, and reports latency
+percentiles, throughput and error rates by status. The JSON report is meant
+for picking concurrency settings before a real crawl.
+
+Usage:
+    python3 test_urls.py                                   # hanzi-writer sources, defaults
+    python3 test_urls.py --dataset kanjivg --sample 50 --concurrency 1,8,32
+    python3 test_urls.py --template "http://127.0.0.1:8000/{char}.json"
+    python3 test_urls.py --stand-in                        # probe a built-in local server
+    python3 test_urls.py --chars my_list.txt --output probe_report.json
 """
 
-import requests
-
-# Test characters
-test_chars = {
-    '人': 0x4EBA,  # person
-    '水': 0x6C34,  # water
-    '火': 0x706B,  # fire
-    '一': 0x4E00,  # one
-}
-
-print("Testing hanzi-writer-data URLs...\n")
-
-for char, codepoint in test_chars.items():
-    unicode_hex = format(codepoint, '05x')
-    # Use actual character in URL, not hex!
-    url = f"https://raw.githubusercontent.com/chanind/hanzi-writer-data/refs/heads/master/data/{char}.json"
-    
-    print(f"Testing: {char} (U+{unicode_hex.upper()})")
-    print(f"  URL: {url}")
-    
-    try:
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            stroke_count = len(data.get('strokes', []))
-            print(f"  ✅ SUCCESS - {stroke_count} strokes")
-        else:
-            print(f"  ❌ FAILED - HTTP {response.status_code}")
-    except Exception as e:
-        print(f"  ❌ ERROR - {type(e).__name__}: {str(e)}")
-    
-    print()
-
-print("\nIf all tests passed, the URLs are working correctly!")
-print("You can now run: python3 chinese_stroke_fetcher.py")
+import http.server
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Shared download helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from download_journal import TransientDownloadError
+from stroke_http_client import PooledHTTPClient, RetryPolicy
+from stroke_sources import Source, get_source_set
+from stroke_writer import atomic_open
+
+from chinese_stroke_fetcher import BASIC_CHARACTERS
+
+DEFAULT_SAMPLE = 20
+DEFAULT_CONCURRENCY = [1, 4, 8]
+DEFAULT_OUTPUT = "probe_report.json"
+
+# Kana plus the number characters, for probing KanjiVG
+KANJIVG_CHARACTERS = ([chr(c) for c in range(0x3041, 0x3097)] +
+                      [chr(c) for c in range(0x30A1, 0x30F7)] +
+                      list("零一二三四五六七八九十百千万億"))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def probe_source(source: Source, characters: List[str], concurrency: int) -> Dict:
+    """Fetch every character from one source with `concurrency` workers."""
+    # No retries: the prober measures the source, not the retry policy
+    client = PooledHTTPClient(max_connections_per_host=concurrency,
+                              retry_policy=RetryPolicy(attempts=1, retry_statuses=()),
+                              breaker_failure_threshold=len(characters) + 1)
+
+    def probe(char: str):
+        location = source.locate(ord(char))
+        start = time.perf_counter()
+        try:
+            if source.is_local:
+                with open(location, 'rb') as f:
+                    f.read()
+                outcome = "200"
+            else:
+                outcome = str(client.get(location).status)
+        except FileNotFoundError:
+            outcome = "404"
+        except (TransientDownloadError, OSError) as e:
+            cause = e.__cause__ or e
+            outcome = f"error:{type(cause).__name__}"
+        return outcome, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(probe, characters))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    by_status: Dict[str, int] = {}
+    for outcome, _ in results:
+        by_status[outcome] = by_status.get(outcome, 0) + 1
+    latencies = sorted(latency for outcome, latency in results if outcome == "200")
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "source": source.name,
+        "template": source.template,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "by_status": by_status,
+        "error_rate": round(1 - by_status.get("200", 0) / len(results), 4) if results else 0.0,
+        "connection_reuse_ratio": round(client.metrics.reuse_ratio, 4),
+    }
+
+
+def start_stand_in_server(min_latency: float = 0.005, max_latency: float = 0.05,
+                          missing_rate: float = 0.05) -> http.server.ThreadingHTTPServer:
+    """
+    Local keep-alive server that answers like hanzi-writer-data with random
+    latency and occasional 404s, so the prober can be exercised offline.
+    """
+    class StandInHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # As in stroke_data_server: headers and body are separate writes, and
+        # without TCP_NODELAY each keep-alive response waits ~40ms on Nagle +
+        # delayed ACK, which would swamp the injected latency
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(random.uniform(min_latency, max_latency))
+            if random.random() < missing_rate:
+                status, body = 404, b"Not Found"
+            else:
+                status, body = 200, json.dumps({"strokes": [], "medians": []}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_characters(path: str) -> List[str]:
+    """Characters from a file: one per line, or runs of characters per line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [char for line in f for char in line.strip() if not char.isspace()]
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(name) + 1] if name in args else default
+
+    dataset = option('--dataset', 'hanzi-writer')
+    sample_size = int(option('--sample', str(DEFAULT_SAMPLE)))
+    levels = [int(level) for level in option('--concurrency', ','.join(map(str, DEFAULT_CONCURRENCY))).split(',')]
+    output = option('--output', DEFAULT_OUTPUT)
+    seed = int(option('--seed', '0'))
+
+    server = None
+    if '--stand-in' in args:
+        server = start_stand_in_server()
+        sources = [Source("stand-in", f"http://127.0.0.1:{server.server_address[1]}/{{char}}.json")]
+    elif option('--template'):
+        sources = [Source("custom", option('--template'))]
+    else:
+        sources = get_source_set(dataset).sources
+
+    if option('--chars'):
+        population = load_characters(option('--chars'))
+    else:
+        population = KANJIVG_CHARACTERS if dataset == 'kanjivg' else BASIC_CHARACTERS
+    characters = random.Random(seed).sample(population, min(sample_size, len(population)))
+
+    print(f"Probing {len(sources)} source(s) with {len(characters)} characters "
+          f"at concurrency {', '.join(map(str, levels))}...\n")
+
+    runs = []
+    for source in sources:
+        for concurrency in levels:
+            run = probe_source(source, characters, concurrency)
+            runs.append(run)
+            errors = {k: v for k, v in run["by_status"].items() if k != "200"}
+            print(f"  {source.name:<20} c={concurrency:<3} "
+                  f"{run['throughput_rps']:>7} req/s  "
+                  f"p50 {run['p50_ms']} ms  p95 {run['p95_ms']} ms  p99 {run['p99_ms']} ms  "
+                  f"errors {errors or 'none'}")
+
+    if server is not None:
+        server.shutdown()
+
+    report = {"dataset": dataset, "characters": characters, "runs": runs}
+    with atomic_open(output) as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 Probe report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -84,20 +84,20 @@ class ChineseStrokeDataLoader {
     /// - Parameter codepoint: The Unicode codepoint
     /// - Returns: Array of stroke paths, or nil if not found
     func loadStrokes(for codepoint: UInt32) -> [StrokePath]? {
-        // Try with 5-digit format first (for chinese_stroke_data.json compatibility)
+        // Try 4-digit format first: both data files are canonicalized at build
+        // time (normalized, y-down), so no per-point transform is needed
+        let key4 = String(format: "U+%04X", codepoint)
+        if let data = strokeData[key4] {
+            return convertToStrokePaths(data.strokes, flipY: false)
+        }
+        
+        // Fallback to legacy 5-digit format (raw hanzi-writer coordinates, Y-up)
         let key5 = String(format: "U+%05X", codepoint)
         if let data = strokeData[key5] {
             // Convert JSON structure to StrokePath array and flip Y-axis
             return convertToStrokePaths(data.strokes, flipY: true)
         }
         
-        // Fallback to 4-digit format (for chinesenumbers.json compatibility)
-        let key4 = String(format: "U+%04X", codepoint)
-        if let data = strokeData[key4] {
-            // Convert JSON structure to StrokePath array (no Y-flip for old format)
-            return convertToStrokePaths(data.strokes, flipY: false)
-        }
-        
         #if DEBUG
         print("⚠️ No stroke data found for codepoint U+\(String(format: "%04X", codepoint)) (tried both U+%04X and U+%05X formats)")
         #endif
@@ -156,8 +156,19 @@ class ChineseStrokeDataLoader {
         return strokeData.values.map { $0.character }.sorted()
     }
     
+    /// Get precomposed stroke data for a compound number (e.g. 11 → 十一)
+    /// - Parameter number: The number, matching the negative codepoint used for compounds
+    /// - Returns: Array of stroke paths laid out side by side, or nil if not precomposed
+    func loadCompoundStrokes(for number: Int) -> [StrokePath]? {
+        guard let data = strokeData["N+\(number)"] else {
+            return nil
+        }
+        return convertToStrokePaths(data.strokes, flipY: false)
+    }
+    
     /// Get all available codepoints
     var availableCodepoints: [UInt32] {
-        return strokeData.values.map { UInt32($0.codepoint) }.sorted()
+        // Precomposed compounds use negative codepoints and have no scalar value
+        return strokeData.values.filter { $0.codepoint >= 0 }.map { UInt32($0.codepoint) }.sorted()
     }
 }
@@ -275,11 +275,14 @@ struct GlyphBundleRepository: GlyphRepository {
         if id.codepoint < 0 {
             let number = -id.codepoint
             if let payload = Self.compoundNumbers[number] {
-                // Combine strokes from all component characters
-                var allStrokes: [StrokePath] = []
-                for componentCodepoint in payload.components {
-                    if let componentStrokes = ChineseStrokeDataLoader.shared.loadStrokes(for: UInt32(componentCodepoint)) {
-                        allStrokes.append(contentsOf: componentStrokes)
+                // Prefer the layout precomposed at build time; otherwise
+                // combine strokes from all component characters
+                var allStrokes: [StrokePath] = ChineseStrokeDataLoader.shared.loadCompoundStrokes(for: number) ?? []
+                if allStrokes.isEmpty {
+                    for componentCodepoint in payload.components {
+                        if let componentStrokes = ChineseStrokeDataLoader.shared.loadStrokes(for: UInt32(componentCodepoint)) {
+                            allStrokes.append(contentsOf: componentStrokes)
+                        }
                     }
                 }
                 
@@ -209,10 +209,16 @@ final class SequentialDemoViewModel: ObservableObject {
             // Animate drawing this stroke point by point
             currentStroke = []
             
-            for point in points {
+            // Per-point times are precomputed at build time (stroke_timeline.py);
+            // fall back to 15ms per point when a file has no usable timing
+            var previousTime = strokePath.points.first?.t ?? 0
+            for (point, strokePoint) in zip(points, strokePath.points) {
                 guard !Task.isCancelled else { return }
+                let delta = strokePoint.t - previousTime
+                previousTime = strokePoint.t
+                let seconds = delta > 0 && delta < 1.0 ? delta : 0.015
+                try? await Task.sleep(nanoseconds: UInt64(seconds * 1_000_000_000))
                 currentStroke.append(point)
-                try? await Task.sleep(nanoseconds: 15_000_000) // 15ms per point
             }
             
             // Stroke complete
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Precompute quantized distance fields of the reference strokes.
+
+Usage:
+    python3 build_distance_fields.py
+    python3 build_distance_fields.py strokedata/kanastrokes.json --resolution 32 --max-distance 0.2
+    python3 build_distance_fields.py --output fields/kana_distance
+    python3 build_distance_fields.py --force     # rebuild even if inputs are unchanged
+
+Checking how far each touch point lies from the ideal stroke is
+O(points × segments) when done naively. This stage samples, once per glyph
+and per stroke, the Euclidean distance from every cell center of a
+resolution × resolution grid to the stroke centerline (the distance
+transform of the centerline, computed exactly from the segments rather than
+from a rasterized mask). Distances are clipped at `max_distance` and
+quantized to uint8, so a 64 × 64 field is 4 KB:
+
+    distance_fields.bin    uint8 fields, glyph union field then its strokes
+    distance_fields.json   {"resolution", "max_distance", "step",
+                            "glyphs": {"U+3042": {"record": 0, "strokes": 3}, ...}}
+
+Both files get a .manifest.json (see stroke_writer) holding the SHA-256 of
+every input, so a rerun with unchanged inputs and options is skipped.
+
+DistanceFields memory-maps the file and answers a whole batch of points with
+a single fancy-indexing lookup, so a tolerance check costs the same per
+point no matter how complex the glyph is. Answers are accurate to
+step/2 plus half a cell diagonal (see `error_bound`).
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from build_mask_atlas import pixel_centers, segment_distances
+from stroke_inputs import DEFAULT_FILES, PRECEDENCE, existing, key_owners
+from stroke_writer import atomic_open, input_hashes, is_current, write_manifest
+
+DEFAULT_OUTPUT = "distance_fields"
+
+# Grid side in cells
+DEFAULT_RESOLUTION = 64
+# Distances beyond this (normalized units) are stored as "far"
+DEFAULT_MAX_DISTANCE = 0.25
+# Quantization levels of the uint8 encoding
+LEVELS = 255
+
+
+def quantize(distances: np.ndarray, max_distance: float) -> np.ndarray:
+    return np.round(np.clip(distances / max_distance, 0.0, 1.0) * LEVELS).astype(np.uint8)
+
+
+def _stroke_arrays(entry: Dict) -> List[np.ndarray]:
+    return [np.array([(point["x"], point["y"]) for point in stroke], dtype=np.float64)
+            for stroke in entry.get("strokes") or [] if stroke]
+
+
+def build_params(paths: List[str], resolution: int, max_distance: float) -> Dict:
+    """Recorded in the manifests; the same params (input hashes included) give the same fields."""
+    return {"version": 1, "precedence": PRECEDENCE, "inputs": input_hashes(paths),
+            "resolution": resolution, "max_distance": max_distance}
+
+
+def build_fields(paths: List[str], output: str, resolution: int = DEFAULT_RESOLUTION,
+                 max_distance: float = DEFAULT_MAX_DISTANCE) -> Dict:
+    """Compute fields for every glyph of the input files into `output`.bin/.json; returns the index."""
+    grid = pixel_centers(resolution)
+    index = {"version": 1, "resolution": resolution, "max_distance": max_distance,
+             "step": max_distance / LEVELS, "glyphs": {}}
+    record = 0
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    params = build_params(paths, resolution, max_distance)
+    owners = key_owners(paths)
+    with atomic_open(output + ".bin", "wb") as fields:
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, entry in data.items():
+                if owners[key] != path:
+                    continue  # A later file replaces this glyph, as in the app (see stroke_inputs)
+                strokes = _stroke_arrays(entry)
+                if not strokes:
+                    continue
+                stroke_fields = np.stack([segment_distances(grid, points) for points in strokes])
+                glyph_field = stroke_fields.min(axis=0)
+                fields.write(quantize(np.vstack([glyph_field[None, :], stroke_fields]), max_distance).tobytes())
+                index["glyphs"][key] = {"record": record, "strokes": len(strokes)}
+                record += 1 + len(strokes)
+
+    index["records"] = record
+    with atomic_open(output + ".json") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    for path in (output + ".bin", output + ".json"):
+        write_manifest(path, len(index["glyphs"]), params)
+    return index
+
+
+class DistanceFields:
+    """Memory-mapped distance queries against the precomputed fields."""
+
+    def __init__(self, output: str = DEFAULT_OUTPUT):
+        with open(output + ".json", "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.resolution = self.index["resolution"]
+        self.max_distance = self.index["max_distance"]
+        self.step = self.index["step"]
+        self._fields = np.memmap(output + ".bin", dtype=np.uint8, mode="r",
+                                 shape=(self.index["records"], self.resolution, self.resolution))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index["glyphs"]
+
+    @property
+    def error_bound(self) -> float:
+        """Worst-case difference between a query and the exact distance."""
+        return self.step / 2 + np.sqrt(2) / (2 * self.resolution)
+
+    def field(self, key: str, stroke: Optional[int] = None) -> np.ndarray:
+        """Quantized (resolution, resolution) field of the glyph, or of one stroke."""
+        entry = self.index["glyphs"][key]
+        return self._fields[entry["record"] + (0 if stroke is None else 1 + stroke)]
+
+    def _cells(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cells = np.clip((points * self.resolution).astype(np.int64), 0, self.resolution - 1)
+        return cells[:, 1], cells[:, 0]
+
+    def query(self, key: str, points: Sequence[Tuple[float, float]], stroke: Optional[int] = None) -> np.ndarray:
+        """
+        Distance (normalized units, capped at max_distance) from each point to
+        the glyph, or to one stroke of it. Points outside the box are clamped.
+        """
+        rows, cols = self._cells(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        return self.field(key, stroke)[rows, cols] * self.step
+
+    def query_strokes(self, key: str, points: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """(strokes, points) distances from every point to every stroke of the glyph."""
+        entry = self.index["glyphs"][key]
+        first = entry["record"] + 1
+        rows, cols = self._cells(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        return self._fields[first:first + entry["strokes"], rows, cols] * self.step
+
+    def within(self, key: str, points: Sequence[Tuple[float, float]], tolerance: float,
+               stroke: Optional[int] = None) -> np.ndarray:
+        """Boolean per point: is it within `tolerance` of the reference?"""
+        return self.query(key, points, stroke) <= tolerance
+
+
+def main():
+    args = sys.argv[1:]
+    resolution, max_distance, output = DEFAULT_RESOLUTION, DEFAULT_MAX_DISTANCE, DEFAULT_OUTPUT
+    if "--resolution" in args:
+        idx = args.index("--resolution")
+        resolution = int(args[idx + 1])
+        del args[idx:idx + 2]
+    if "--max-distance" in args:
+        idx = args.index("--max-distance")
+        max_distance = float(args[idx + 1])
+        del args[idx:idx + 2]
+    if "--output" in args:
+        idx = args.index("--output")
+        output = args[idx + 1]
+        del args[idx:idx + 2]
+    force = "--force" in args
+    if force:
+        args.remove("--force")
+    paths = args or existing(DEFAULT_FILES)
+
+    print("📐 Stroke Distance Field Builder")
+    print("=" * 50)
+
+    params = build_params(paths, resolution, max_distance)
+    if not force and all(is_current(output + suffix, params) for suffix in (".bin", ".json")):
+        print(f"⏭️  {output}.bin is up to date (same inputs and parameters); --force rebuilds it")
+        return
+
+    index = build_fields(paths, output, resolution, max_distance)
+    size = os.path.getsize(output + ".bin")
+    print(f"✅ {len(index['glyphs'])} glyphs, {index['records']} fields at "
+          f"{resolution}×{resolution}, capped at {max_distance}")
+    print(f"📦 {output}.bin ({size:,} bytes) + {output}.json")
+    print(f"🎯 Query error bound: {DistanceFields(output).error_bound:.4f} normalized units")
+
+
+if __name__ == "__main__":
+    main()
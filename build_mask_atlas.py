@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Pre-rasterize reference strokes into a bit-packed mask atlas for overlap scoring.
+
+Usage:
+    python3 build_mask_atlas.py
+    python3 build_mask_atlas.py strokedata/kanastrokes.json --resolution 48 --width 0.08
+    python3 build_mask_atlas.py --output atlas/kana_masks
+    python3 build_mask_atlas.py --force          # rebuild even if inputs are unchanged
+
+Scoring a drawing by overlap with the ideal strokes needs raster masks of the
+reference. Rasterizing them per attempt is the expensive part, so this stage
+does it once: every stroke, and the union of each glyph's strokes, becomes a
+resolution × resolution bitmap of all pixels within width/2 (normalized
+units) of the stroke's centerline. Masks are bit-packed (np.packbits) into
+fixed-size records of one atlas file:
+
+    mask_atlas.bin    records of resolution²/8 bytes, glyph mask then its strokes
+    mask_atlas.json   {"resolution", "stroke_width", "record_bytes",
+                       "glyphs": {"U+3042": {"record": 0, "strokes": 3}, ...}}
+
+Both files get a .manifest.json (see stroke_writer) holding the SHA-256 of
+every input, so a rerun with unchanged inputs and options is skipped.
+
+MaskAtlas memory-maps the file, so a scorer only touches the records it reads.
+IoU of a user's drawing against a glyph or stroke is then a few bitwise
+AND/OR operations and a popcount on packed bytes (see `iou`).
+Pure NumPy; no GPU or imaging library required.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from stroke_inputs import DEFAULT_FILES, PRECEDENCE, existing, key_owners
+from stroke_writer import atomic_open, input_hashes, is_current, write_manifest
+
+DEFAULT_OUTPUT = "mask_atlas"
+
+# Bitmap side in pixels; must be a multiple of 8 so rows pack into whole bytes
+DEFAULT_RESOLUTION = 64
+# Stroke thickness in normalized units (glyph box = 1.0)
+DEFAULT_STROKE_WIDTH = 0.06
+
+# Set bits per byte value, for popcounts on packed masks
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def pixel_centers(resolution: int) -> np.ndarray:
+    """(resolution², 2) array of pixel centers in normalized coordinates, row-major."""
+    coords = (np.arange(resolution, dtype=np.float64) + 0.5) / resolution
+    ys, xs = np.meshgrid(coords, coords, indexing="ij")
+    return np.stack([xs.ravel(), ys.ravel()], axis=1)
+
+
+def segment_distances(grid: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Distance from every grid point to the nearest segment of a polyline."""
+    if len(points) == 1:
+        return np.hypot(*(grid - points[0]).T)
+    a, b = points[:-1], points[1:]
+    ab = b - a
+    length_sq = np.einsum("ij,ij->i", ab, ab)
+    # Projection of every grid point onto every segment, clamped to the segment
+    ap = grid[:, None, :] - a[None, :, :]
+    t = np.clip(np.einsum("gsk,sk->gs", ap, ab) / np.where(length_sq > 0, length_sq, 1.0), 0.0, 1.0)
+    nearest = a[None, :, :] + t[..., None] * ab[None, :, :]
+    return np.sqrt(((grid[:, None, :] - nearest) ** 2).sum(axis=2)).min(axis=1)
+
+
+def rasterize_stroke(points: np.ndarray, grid: np.ndarray, stroke_width: float) -> np.ndarray:
+    """Boolean mask (flattened) of the pixels covered by one stroke."""
+    return segment_distances(grid, points) <= stroke_width / 2
+
+
+def _densify(points: np.ndarray, spacing: float) -> np.ndarray:
+    """Points along a polyline no further apart than `spacing`."""
+    if len(points) < 2:
+        return points
+    steps = np.maximum(np.ceil(np.hypot(*np.diff(points, axis=0).T) / spacing).astype(np.int64), 1)
+    segment = np.repeat(np.arange(len(steps)), steps)
+    fraction = (np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)) / np.repeat(steps, steps)
+    samples = points[segment] + fraction[:, None] * (points[segment + 1] - points[segment])
+    return np.vstack([samples, points[-1:]])
+
+
+def rasterize_points(strokes: Sequence[Sequence[Tuple[float, float]]], resolution: int = DEFAULT_RESOLUTION,
+                     stroke_width: float = DEFAULT_STROKE_WIDTH) -> np.ndarray:
+    """
+    Packed mask of a drawing (e.g. a user's attempt) in the atlas format.
+    Stamps a disk around points sampled every half pixel along each stroke,
+    which is much cheaper per attempt than testing every pixel against
+    every segment and matches rasterize_stroke to within a quarter pixel.
+    """
+    strokes = [np.asarray(stroke, dtype=np.float64)[:, :2] for stroke in strokes if len(stroke)]
+    mask = np.zeros(resolution * resolution, dtype=bool)
+    if not strokes:
+        return np.packbits(mask)
+
+    samples = np.vstack([_densify(stroke, 0.5 / resolution) for stroke in strokes])
+    radius = stroke_width / 2
+    reach = int(np.ceil(radius * resolution)) + 1
+    offsets = np.arange(-reach, reach + 1)
+    dx, dy = np.meshgrid(offsets, offsets)
+    base = np.floor(samples * resolution).astype(np.int64)
+    cols = base[:, 0:1] + dx.ravel()
+    rows = base[:, 1:2] + dy.ravel()
+    centers_x = (cols + 0.5) / resolution
+    centers_y = (rows + 0.5) / resolution
+    hit = ((centers_x - samples[:, 0:1]) ** 2 + (centers_y - samples[:, 1:2]) ** 2 <= radius * radius)
+    hit &= (cols >= 0) & (cols < resolution) & (rows >= 0) & (rows < resolution)
+    mask[rows[hit] * resolution + cols[hit]] = True
+    return np.packbits(mask)
+
+
+def popcount(packed: np.ndarray) -> int:
+    return int(_POPCOUNT[packed].sum())
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> float:
+    """Intersection over union of two packed masks of the same resolution."""
+    union = popcount(np.bitwise_or(a, b))
+    return popcount(np.bitwise_and(a, b)) / union if union else 0.0
+
+
+def _stroke_arrays(entry: Dict) -> List[np.ndarray]:
+    return [np.array([(point["x"], point["y"]) for point in stroke], dtype=np.float64)
+            for stroke in entry.get("strokes") or [] if stroke]
+
+
+def build_params(paths: List[str], resolution: int, stroke_width: float) -> Dict:
+    """Recorded in the manifests; the same params (input hashes included) give the same atlas."""
+    return {"version": 1, "precedence": PRECEDENCE, "inputs": input_hashes(paths),
+            "resolution": resolution, "stroke_width": stroke_width}
+
+
+def build_atlas(paths: List[str], output: str, resolution: int = DEFAULT_RESOLUTION,
+                stroke_width: float = DEFAULT_STROKE_WIDTH) -> Dict:
+    """Rasterize every glyph of the input files into `output`.bin/.json; returns the index."""
+    if resolution % 8:
+        raise ValueError(f"resolution must be a multiple of 8, got {resolution}")
+
+    grid = pixel_centers(resolution)
+    record_bytes = resolution * resolution // 8
+    index = {"version": 1, "resolution": resolution, "stroke_width": stroke_width,
+             "record_bytes": record_bytes, "glyphs": {}}
+    record = 0
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    params = build_params(paths, resolution, stroke_width)
+    owners = key_owners(paths)
+    with atomic_open(output + ".bin", "wb") as atlas:
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, entry in data.items():
+                if owners[key] != path:
+                    continue  # A later file replaces this glyph, as in the app (see stroke_inputs)
+                strokes = _stroke_arrays(entry)
+                if not strokes:
+                    continue
+                stroke_masks = np.stack([rasterize_stroke(points, grid, stroke_width) for points in strokes])
+                glyph_mask = stroke_masks.any(axis=0)
+                atlas.write(np.packbits(np.vstack([glyph_mask[None, :], stroke_masks]), axis=1).tobytes())
+                index["glyphs"][key] = {"record": record, "strokes": len(strokes)}
+                record += 1 + len(strokes)
+
+    index["records"] = record
+    with atomic_open(output + ".json") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    for path in (output + ".bin", output + ".json"):
+        write_manifest(path, len(index["glyphs"]), params)
+    return index
+
+
+class MaskAtlas:
+    """Memory-mapped read access to a built atlas."""
+
+    def __init__(self, output: str = DEFAULT_OUTPUT):
+        with open(output + ".json", "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.resolution = self.index["resolution"]
+        self.stroke_width = self.index["stroke_width"]
+        self._records = np.memmap(output + ".bin", dtype=np.uint8, mode="r",
+                                  shape=(self.index["records"], self.index["record_bytes"]))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index["glyphs"]
+
+    def glyph_mask(self, key: str) -> np.ndarray:
+        """Packed union mask of all strokes of a glyph."""
+        return self._records[self.index["glyphs"][key]["record"]]
+
+    def stroke_masks(self, key: str) -> np.ndarray:
+        """(strokes, record_bytes) packed masks, in stroke order."""
+        entry = self.index["glyphs"][key]
+        first = entry["record"] + 1
+        return self._records[first:first + entry["strokes"]]
+
+    def unpack(self, packed: np.ndarray) -> np.ndarray:
+        """Boolean resolution × resolution image of a packed mask (row 0 = top)."""
+        return np.unpackbits(packed)[:self.resolution ** 2].reshape(self.resolution, self.resolution).astype(bool)
+
+    def score(self, key: str, strokes: Sequence[Sequence[Tuple[float, float]]],
+              stroke: Optional[int] = None) -> float:
+        """IoU of a drawing against a glyph, or against one of its strokes."""
+        drawn = rasterize_points(strokes, self.resolution, self.stroke_width)
+        reference = self.glyph_mask(key) if stroke is None else self.stroke_masks(key)[stroke]
+        return iou(drawn, reference)
+
+
+def main():
+    args = sys.argv[1:]
+    resolution, stroke_width, output = DEFAULT_RESOLUTION, DEFAULT_STROKE_WIDTH, DEFAULT_OUTPUT
+    if "--resolution" in args:
+        idx = args.index("--resolution")
+        resolution = int(args[idx + 1])
+        del args[idx:idx + 2]
+    if "--width" in args:
+        idx = args.index("--width")
+        stroke_width = float(args[idx + 1])
+        del args[idx:idx + 2]
+    if "--output" in args:
+        idx = args.index("--output")
+        output = args[idx + 1]
+        del args[idx:idx + 2]
+    force = "--force" in args
+    if force:
+        args.remove("--force")
+    paths = args or existing(DEFAULT_FILES)
+
+    print("🧱 Stroke Mask Atlas Builder")
+    print("=" * 50)
+
+    params = build_params(paths, resolution, stroke_width)
+    if not force and all(is_current(output + suffix, params) for suffix in (".bin", ".json")):
+        print(f"⏭️  {output}.bin is up to date (same inputs and parameters); --force rebuilds it")
+        return
+
+    index = build_atlas(paths, output, resolution, stroke_width)
+    size = os.path.getsize(output + ".bin")
+    print(f"✅ {len(index['glyphs'])} glyphs, {index['records']} masks at "
+          f"{resolution}×{resolution}, width {stroke_width}")
+    print(f"📦 {output}.bin ({size:,} bytes) + {output}.json")
+
+
+if __name__ == "__main__":
+    main()
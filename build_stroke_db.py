@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Load stroke data into an indexed SQLite database.
+
+Usage:
+    python3 build_stroke_db.py                                   # strokedata/*.json -> strokes.sqlite
+    python3 build_stroke_db.py strokedata/kanjistrokes.json chinese_corpus/*.json --output corpus.sqlite
+    python3 build_stroke_db.py --query strokes=3-5 radical=口 script=han
+    python3 build_stroke_db.py --output corpus.sqlite --query element=木 limit=20
+    python3 build_stroke_db.py --force                           # rebuild even if inputs are unchanged
+
+Answering "all glyphs with 3-5 strokes containing radical 口" from the JSON
+outputs means loading every file. This sink writes one row per glyph with the
+searchable metadata in indexed columns and the stroke geometry as a compact
+BLOB, so selective queries touch only the index pages and the rows they
+return:
+
+    glyphs    key, codepoint, character, script, stroke_count, point_count,
+              source (input file name), hash (SHA-256 of the geometry)
+    geometry  strokes (BLOB) and extra (remaining entry fields as JSON),
+              kept out of `glyphs` so metadata scans stay on narrow rows
+    elements  KanjiVG component tree nodes: glyph, element, radical,
+              first_stroke, stroke_count (empty for sources without a tree)
+
+Geometry BLOBs are little-endian: uint16 stroke count, uint16 point count
+per stroke, then float32 x, y, t for every point (12 bytes per point instead
+of ~40 characters of JSON). All rows are inserted with executemany inside a
+single transaction and the indexes are created afterwards. StrokeDB runs
+fixed, parameterized SQL, so sqlite3's statement cache prepares each query
+shape once per connection. The database is built in a temporary file and
+renamed into place with a manifest of its input hashes (see stroke_writer),
+so a rebuild with unchanged inputs is skipped.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from stroke_inputs import CORPUS_FILES, PRECEDENCE, existing, key_owners
+from stroke_writer import TEMP_SUFFIX, input_hashes, is_current, publish, write_manifest
+
+DEFAULT_OUTPUT = "strokes.sqlite"
+SCHEMA_VERSION = 1
+
+# Rows handed to executemany at a time while loading
+INSERT_BATCH = 2000
+# Decimals kept when float32 geometry is decoded back to JSON-style floats
+DECODE_PRECISION = 6
+
+SCHEMA = """
+CREATE TABLE glyphs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    codepoint INTEGER NOT NULL,
+    character TEXT NOT NULL,
+    script TEXT NOT NULL,
+    stroke_count INTEGER NOT NULL,
+    point_count INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE geometry (
+    glyph_id INTEGER PRIMARY KEY REFERENCES glyphs(id),
+    strokes BLOB NOT NULL,
+    extra TEXT
+);
+CREATE TABLE elements (
+    glyph_id INTEGER NOT NULL REFERENCES glyphs(id),
+    element TEXT NOT NULL,
+    radical TEXT,
+    first_stroke INTEGER NOT NULL,
+    stroke_count INTEGER NOT NULL
+);
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Created after the bulk load; building them once is cheaper than per row
+INDEXES = """
+CREATE INDEX glyphs_codepoint ON glyphs(codepoint);
+CREATE INDEX glyphs_character ON glyphs(character);
+CREATE INDEX glyphs_script_strokes ON glyphs(script, stroke_count);
+CREATE INDEX glyphs_strokes ON glyphs(stroke_count);
+CREATE INDEX glyphs_source ON glyphs(source);
+CREATE INDEX glyphs_hash ON glyphs(hash);
+CREATE INDEX elements_element ON elements(element, glyph_id);
+CREATE INDEX elements_radical ON elements(element, glyph_id) WHERE radical IS NOT NULL;
+"""
+
+# Full entry of one key: metadata columns joined with its geometry row
+_SELECT_ENTRY = ("SELECT g.character, g.codepoint, d.strokes, d.extra FROM glyphs g "
+                 "JOIN geometry d ON d.glyph_id = g.id WHERE g.key = ?")
+
+# Entry fields stored in columns or the geometry BLOB rather than in `extra`
+_COLUMN_FIELDS = {"character", "codepoint", "strokes"}
+
+
+def script_of(codepoint: int) -> str:
+    """Coarse script name used for filtering."""
+    if codepoint < 0:
+        return "compound"  # Composed numbers (N+n keys)
+    if 0x3040 <= codepoint <= 0x309F:
+        return "hiragana"
+    if 0x30A0 <= codepoint <= 0x30FF or 0x31F0 <= codepoint <= 0x31FF:
+        return "katakana"
+    if (0x4E00 <= codepoint <= 0x9FFF or 0x3400 <= codepoint <= 0x4DBF
+            or 0x20000 <= codepoint <= 0x3134F or 0xF900 <= codepoint <= 0xFAFF):
+        return "han"
+    return "other"
+
+
+def encode_geometry(strokes: List[List[Dict]]) -> bytes:
+    """Pack strokes into the BLOB layout described in the module docstring."""
+    counts = array("H", [len(strokes)] + [len(stroke) for stroke in strokes])
+    values = array("f", [value for stroke in strokes for point in stroke
+                         for value in (point["x"], point["y"], point.get("t", 0.0))])
+    if sys.byteorder == "big":
+        counts.byteswap()
+        values.byteswap()
+    return counts.tobytes() + values.tobytes()
+
+
+def decode_geometry(blob: bytes) -> List[List[Dict]]:
+    """Inverse of encode_geometry, as [[{"x", "y", "t"}]]."""
+    stroke_count = int.from_bytes(blob[:2], "little")
+    counts = array("H", blob[2:2 + 2 * stroke_count])
+    values = array("f", blob[2 + 2 * stroke_count:])
+    if sys.byteorder == "big":
+        counts.byteswap()
+        values.byteswap()
+    strokes, offset = [], 0
+    for count in counts:
+        stroke = []
+        for i in range(offset, offset + 3 * count, 3):
+            stroke.append({"x": round(values[i], DECODE_PRECISION), "y": round(values[i + 1], DECODE_PRECISION),
+                           "t": round(values[i + 2], DECODE_PRECISION)})
+        strokes.append(stroke)
+        offset += 3 * count
+    return strokes
+
+
+def glyph_rows(paths: List[str]) -> Iterator[Tuple[Tuple, Tuple, List[Tuple]]]:
+    """
+    (glyph row, geometry row, element rows) per glyph; on duplicate keys the
+    later file wins, as in the app (see stroke_inputs).
+    """
+    owners = key_owners(paths)
+    for path in paths:
+        source = os.path.splitext(os.path.basename(path))[0]
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for key, entry in data.items():
+            strokes = [stroke for stroke in entry.get("strokes") or [] if stroke]
+            if owners[key] != path or not strokes:
+                continue
+            geometry = encode_geometry(strokes)
+            extra = {name: value for name, value in entry.items() if name not in _COLUMN_FIELDS}
+            codepoint = entry.get("codepoint", 0)
+            row = (key, codepoint, entry.get("character", ""), script_of(codepoint), len(strokes),
+                   sum(len(stroke) for stroke in strokes), source, hashlib.sha256(geometry).hexdigest())
+            blob = (geometry, json.dumps(extra, ensure_ascii=False, separators=(",", ":")) if extra else None)
+            # The tree root is the glyph itself; its children are the components
+            elements = [(node["element"], node.get("radical"), node["strokes"][0],
+                         node["strokes"][1] - node["strokes"][0])
+                        for node in (entry.get("tree") or [])[1:] if node.get("element")]
+            yield row, blob, elements
+
+
+def build_params(paths: List[str]) -> Dict:
+    """Recorded in the manifest; the same params (input hashes included) give the same database."""
+    return {"schema_version": SCHEMA_VERSION, "precedence": PRECEDENCE, "inputs": input_hashes(paths)}
+
+
+def build_database(paths: List[str], output: str) -> Dict:
+    """Write every glyph of the input files into a fresh database at `output`; returns counts."""
+    params = build_params(paths)
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp = output + TEMP_SUFFIX
+    if os.path.exists(temp):
+        os.remove(temp)
+
+    connection = sqlite3.connect(temp)
+    # Nothing to protect until the file is renamed into place
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.executescript(SCHEMA)
+
+    glyph_count = element_count = 0
+    with connection:  # One transaction for the whole load
+        pending_glyphs: List[Tuple] = []
+        pending_geometry: List[Tuple] = []
+        pending_elements: List[Tuple] = []
+
+        def flush():
+            # Glyph ids are assigned in insertion order, so element rows can refer to them up front
+            connection.executemany(
+                "INSERT INTO glyphs (id, key, codepoint, character, script, stroke_count, point_count, "
+                "source, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", pending_glyphs)
+            connection.executemany(
+                "INSERT INTO geometry (glyph_id, strokes, extra) VALUES (?, ?, ?)", pending_geometry)
+            connection.executemany(
+                "INSERT INTO elements (glyph_id, element, radical, first_stroke, stroke_count) "
+                "VALUES (?, ?, ?, ?, ?)", pending_elements)
+            pending_glyphs.clear()
+            pending_geometry.clear()
+            pending_elements.clear()
+
+        for row, blob, elements in glyph_rows(paths):
+            glyph_count += 1
+            pending_glyphs.append((glyph_count,) + row)
+            pending_geometry.append((glyph_count,) + blob)
+            pending_elements.extend((glyph_count,) + element for element in elements)
+            element_count += len(elements)
+            if len(pending_glyphs) >= INSERT_BATCH:
+                flush()
+        flush()
+        connection.executemany("INSERT INTO meta (name, value) VALUES (?, ?)", [
+            ("schema_version", str(SCHEMA_VERSION)),
+            ("sources", json.dumps([os.path.basename(path) for path in paths])),
+        ])
+    connection.executescript(INDEXES)
+    connection.execute("ANALYZE")
+    connection.close()
+    publish(temp, output)
+    write_manifest(output, glyph_count, params)
+    return {"glyphs": glyph_count, "elements": element_count}
+
+
+class StrokeDB:
+    """Read-only query API over a database written by build_database."""
+
+    # Filters accepted by `query`, and the SQL each one adds
+    _FILTERS = {
+        "script": "g.script = ?",
+        "source": "g.source = ?",
+        "character": "g.character = ?",
+        "codepoint": "g.codepoint = ?",
+        "min_strokes": "g.stroke_count >= ?",
+        "max_strokes": "g.stroke_count <= ?",
+        "hash": "g.hash = ?",
+        "element": "g.id IN (SELECT glyph_id FROM elements WHERE element = ?)",
+        "radical": "g.id IN (SELECT glyph_id FROM elements WHERE radical IS NOT NULL AND element = ?)",
+    }
+
+    def __init__(self, path: str = DEFAULT_OUTPUT):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self._connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM glyphs").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self._connection.execute("SELECT 1 FROM glyphs WHERE key = ?", (key,)).fetchone() is not None
+
+    def _entry(self, row: Tuple) -> Dict:
+        character, codepoint, geometry, extra = row
+        entry = {"character": character, "codepoint": codepoint, "strokes": decode_geometry(geometry)}
+        if extra:
+            entry.update(json.loads(extra))
+        return entry
+
+    def raw(self, key: str) -> Optional[Tuple[str, int, bytes, Optional[str]]]:
+        """(character, codepoint, geometry BLOB, extra JSON) without decoding, or None."""
+        return self._connection.execute(_SELECT_ENTRY, (key,)).fetchone()
+
+    def keys(self) -> List[str]:
+        return [key for (key,) in self._connection.execute("SELECT key FROM glyphs ORDER BY id")]
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The full entry for a key, in the JSON output format, or None."""
+        row = self.raw(key)
+        return self._entry(row) if row else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Entries for several keys; missing keys are left out."""
+        select = self._connection.execute
+        result = {}
+        for key in keys:
+            row = select(_SELECT_ENTRY, (key,)).fetchone()
+            if row:
+                result[key] = self._entry(row)
+        return result
+
+    def query(self, limit: Optional[int] = None, **filters) -> List[str]:
+        """
+        Keys matching every filter, in codepoint order. Filters are the names
+        in _FILTERS, e.g. query(min_strokes=3, max_strokes=5, radical="口").
+        """
+        unknown = set(filters) - set(self._FILTERS)
+        if unknown:
+            raise ValueError(f"unknown filters: {', '.join(sorted(unknown))}")
+        # Clause order is fixed, so each filter combination is one cached statement
+        names = [name for name in self._FILTERS if filters.get(name) is not None]
+        sql = "SELECT g.key FROM glyphs g"
+        if names:
+            # Unary + keeps the planner from walking the codepoint index to skip
+            # the sort; the filter indexes are far more selective
+            sql += " WHERE " + " AND ".join(self._FILTERS[name] for name in names) + " ORDER BY +g.codepoint"
+        else:
+            sql += " ORDER BY g.codepoint"
+        parameters = [filters[name] for name in names]
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        return [key for (key,) in self._connection.execute(sql, parameters)]
+
+    def metadata(self, key: str) -> Optional[Dict]:
+        """Indexed columns of one glyph, without decoding its geometry."""
+        row = self._connection.execute(
+            "SELECT key, codepoint, character, script, stroke_count, point_count, source, hash "
+            "FROM glyphs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        names = ("key", "codepoint", "character", "script", "stroke_count", "point_count", "source", "hash")
+        return dict(zip(names, row))
+
+    def elements(self, key: str) -> List[Dict]:
+        """Component tree nodes of one glyph (KanjiVG sources only)."""
+        rows = self._connection.execute(
+            "SELECT e.element, e.radical, e.first_stroke, e.stroke_count FROM elements e "
+            "JOIN glyphs g ON g.id = e.glyph_id WHERE g.key = ? ORDER BY e.rowid", (key,))
+        return [{"element": element, "radical": radical, "strokes": [first, first + count]}
+                for element, radical, first, count in rows]
+
+    def duplicates(self) -> List[List[str]]:
+        """Groups of keys whose geometry is byte-for-byte identical."""
+        rows = self._connection.execute(
+            "SELECT group_concat(key, ' ') FROM glyphs GROUP BY hash HAVING COUNT(*) > 1")
+        return [keys.split(" ") for (keys,) in rows]
+
+
+def parse_query(terms: List[str]) -> Dict:
+    """name=value terms from the command line; strokes=3-5 sets both bounds."""
+    filters = {}
+    for term in terms:
+        name, _, value = term.partition("=")
+        if name == "strokes":
+            low, _, high = value.partition("-")
+            filters["min_strokes"] = int(low)
+            filters["max_strokes"] = int(high or low)
+        elif name in ("min_strokes", "max_strokes", "codepoint", "limit"):
+            filters[name] = int(value)
+        else:
+            filters[name] = value
+    return filters
+
+
+def main():
+    args = sys.argv[1:]
+    output = DEFAULT_OUTPUT
+    if "--output" in args:
+        idx = args.index("--output")
+        output = args[idx + 1]
+        del args[idx:idx + 2]
+
+    if "--query" in args:
+        idx = args.index("--query")
+        filters = parse_query(args[idx + 1:])
+        with StrokeDB(output) as db:
+            start = time.perf_counter()
+            keys = db.query(**filters)
+            elapsed = time.perf_counter() - start
+            for key in keys:
+                meta = db.metadata(key)
+                print(f"  {key:<10} {meta['character']}  {meta['stroke_count']:>2} strokes  {meta['source']}")
+        print(f"🔎 {len(keys)} matches in {elapsed * 1e6:.0f} µs")
+        return
+
+    force = "--force" in args
+    if force:
+        args.remove("--force")
+    paths = args or existing(CORPUS_FILES)
+
+    print("🗄️  Stroke Database Builder")
+    print("=" * 50)
+
+    if not force and is_current(output, build_params(paths)):
+        print(f"⏭️  {output} is up to date (same inputs and schema); --force rebuilds it")
+        return
+
+    start = time.perf_counter()
+    counts = build_database(paths, output)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(output)
+    print(f"✅ {counts['glyphs']} glyphs, {counts['elements']} component rows from {len(paths)} files "
+          f"in {elapsed:.2f}s")
+    print(f"📦 {output} ({size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Render glyph thumbnails into sprite sheets for the app's set pickers.
+
+Usage:
+    python3 build_thumbnails.py                               # strokedata/*.json -> thumbnails/
+    python3 build_thumbnails.py strokedata/kanjistrokes.json chinese_corpus --cell 48 --jobs 8
+    python3 build_thumbnails.py --format pgm --columns 10 --rows 10 --output previews
+    python3 build_thumbnails.py --force                       # rebuild even if inputs are unchanged
+
+KanaSetSelector, ChineseDemoSetSelector and the other pickers show glyphs
+that are only drawn once a lesson starts. This stage draws every glyph's
+normalized strokes once, at build time, into a small anti-aliased cell and
+packs the cells row by row into sprite sheets, one series of sheets per
+input (set):
+
+    thumbnails/kanastrokes_000.png    columns × rows cells of cell × cell pixels
+    thumbnails/index.json             {"cell", "columns", "format", "sets": {
+                                          "kanastrokes": {"source", "sheets": [{"file", "width",
+                                                          "height", "glyphs"}, ...],
+                                                          "glyphs": {"U+3042": {"sheet": 0,
+                                                                     "x": 0, "y": 0}, ...}}}}
+
+PNGs are grey + alpha with black ink whose alpha is the stroke coverage, so
+they can be tinted as template images; --format pgm writes binary PGM (black
+ink on white) instead. Both are encoded with zlib/struct; NumPy does the
+rasterizing (a coverage disk stamped along each stroke every half pixel).
+
+Inputs are read through stroke_store sources (JSON files, shard
+directories, SQLite databases), so workers parse only the glyphs of the
+sheet they render. Every sheet is an independent job on a process pool;
+the index gets a manifest with the input hashes (see stroke_writer), and a
+rerun with unchanged inputs and options is skipped.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from stroke_inputs import CORPUS_FILES, existing
+from stroke_store import Glyph, open_source
+from stroke_writer import atomic_open, input_hashes, is_current, write_manifest
+
+DEFAULT_OUTPUT = "thumbnails"
+INDEX_FILE = "index.json"
+# Index file of a shard directory written by chinese_stroke_fetcher.py --list
+SHARD_INDEX = "index.json"
+
+# Cell side in pixels, and sheet size in cells (16 × 16 cells of 64 px = 1024 px sheets)
+DEFAULT_CELL = 64
+DEFAULT_COLUMNS = 16
+DEFAULT_ROWS = 16
+# Stroke thickness and margin, in normalized units of the glyph box
+DEFAULT_STROKE_WIDTH = 0.07
+DEFAULT_PADDING = 0.08
+# Distance between coverage stamps along a stroke, in pixels
+SAMPLE_SPACING = 0.5
+PNG_COMPRESSION = 6
+
+FORMATS = ("png", "pgm")
+
+# Sources opened by this (worker) process, by path
+_sources: Dict[str, object] = {}
+
+
+def set_name(path: str) -> str:
+    """Sheet and index name of an input: its file or directory name without extension."""
+    return os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+
+
+def stroke_samples(xy: np.ndarray, offsets: np.ndarray, spacing: float = SAMPLE_SPACING) -> np.ndarray:
+    """
+    Points along every stroke (in pixels) no further apart than `spacing`,
+    including each stroke's end point; segments between strokes are skipped.
+    """
+    starts = np.ones(len(xy), dtype=bool)
+    starts[offsets[1:-1]] = False
+    within = starts[1:]  # Segment i joins point i and i + 1 of the same stroke
+    within[offsets[1:-1] - 1] = False
+    a, b = xy[:-1][within], xy[1:][within]
+    steps = np.maximum(np.ceil(np.hypot(*(b - a).T) / spacing).astype(np.int64), 1)
+    segment = np.repeat(np.arange(len(steps)), steps)
+    fraction = (np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)) / np.repeat(steps, steps)
+    # Segments stop short of their end point, so add the last point of every stroke
+    return np.vstack([a[segment] + fraction[:, None] * (b[segment] - a[segment]), xy[offsets[1:] - 1]])
+
+
+def render_glyph(glyph: Glyph, cell: int = DEFAULT_CELL, stroke_width: float = DEFAULT_STROKE_WIDTH,
+                 padding: float = DEFAULT_PADDING) -> np.ndarray:
+    """(cell, cell) uint8 ink coverage of a glyph (0 = empty, 255 = ink), anti-aliased."""
+    image = np.zeros(cell * cell, dtype=np.float64)
+    points, offsets = glyph.as_numpy()
+    offsets = offsets[np.r_[True, np.diff(offsets) > 0]]  # Drop empty strokes
+    if len(offsets) < 2:
+        return image.astype(np.uint8).reshape(cell, cell)
+
+    scale = cell * (1 - 2 * padding)
+    samples = stroke_samples(points[:, :2].astype(np.float64) * scale + cell * padding, offsets)
+    radius = stroke_width / 2 * scale
+    reach = int(np.ceil(radius + 0.5))
+    steps = np.arange(-reach, reach + 1)
+    dx, dy = np.meshgrid(steps, steps)
+    base = np.floor(samples).astype(np.int64)
+    cols = base[:, 0:1] + dx.ravel()
+    rows = base[:, 1:2] + dy.ravel()
+    # Pixels fully inside the stroke get 1, the boundary pixel fades over one pixel
+    coverage = np.clip(radius + 0.5 - np.hypot(cols + 0.5 - samples[:, 0:1], rows + 0.5 - samples[:, 1:2]), 0.0, 1.0)
+    inside = (coverage > 0) & (cols >= 0) & (cols < cell) & (rows >= 0) & (rows < cell)
+    np.maximum.at(image, rows[inside] * cell + cols[inside], coverage[inside])
+    return np.round(image * 255).astype(np.uint8).reshape(cell, cell)
+
+
+def encode_png(coverage: np.ndarray) -> bytes:
+    """Grey + alpha PNG of black ink with `coverage` as alpha."""
+    height, width = coverage.shape
+    pixels = np.zeros((height, width, 2), dtype=np.uint8)
+    pixels[..., 1] = coverage
+    # Filter type 0 (none) at the start of every scanline
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, width * 2)]).tobytes()
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 4, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, PNG_COMPRESSION))
+            + chunk(b"IEND", b""))
+
+
+def encode_pgm(coverage: np.ndarray) -> bytes:
+    """Binary PGM of black ink on white."""
+    height, width = coverage.shape
+    return f"P5\n{width} {height}\n255\n".encode("ascii") + (255 - coverage).tobytes()
+
+
+def render_sheet(path: str, keys: List[str], filename: str, settings: Dict) -> Dict:
+    """Render one sprite sheet of `keys` from the source at `path`; returns its index entry."""
+    source = _sources.get(path)
+    if source is None:
+        source = _sources[path] = open_source(path)
+
+    cell, columns = settings["cell"], settings["columns"]
+    rows = -(-len(keys) // columns)
+    sheet = np.zeros((rows * cell, columns * cell), dtype=np.uint8)
+    for position, key in enumerate(keys):
+        glyph = source.load(key)
+        if glyph is None:
+            continue
+        y, x = divmod(position, columns)
+        sheet[y * cell:(y + 1) * cell, x * cell:(x + 1) * cell] = render_glyph(
+            glyph, cell, settings["stroke_width"], settings["padding"])
+
+    encode = encode_png if settings["format"] == "png" else encode_pgm
+    with atomic_open(os.path.join(settings["output"], filename), "wb") as f:
+        f.write(encode(sheet))
+    return {"file": filename, "width": columns * cell, "height": rows * cell, "glyphs": len(keys)}
+
+
+def build_params(paths: List[str], settings: Dict) -> Dict:
+    """Recorded in the index manifest; the same params (input hashes included) give the same sheets."""
+    # A shard directory is identified by its index.json, which lists every shard's SHA-256
+    inputs = [os.path.join(path, SHARD_INDEX) if os.path.isdir(path) else path for path in paths]
+    options = {name: value for name, value in settings.items() if name != "output"}
+    return {"version": 1, "inputs": input_hashes(inputs), **options}
+
+
+def build_thumbnails(paths: List[str], settings: Dict, jobs: int = 1) -> Dict:
+    """Render every glyph of the inputs into sprite sheets under settings["output"]; returns the index."""
+    params = build_params(paths, settings)
+    per_sheet = settings["columns"] * settings["rows"]
+    extension = settings["format"]
+
+    index = {"version": 1, "cell": settings["cell"], "columns": settings["columns"],
+             "rows": settings["rows"], "format": extension, "sets": {}}
+    sheet_jobs: List[Tuple[str, List[str], str]] = []
+    for path in paths:
+        name = set_name(path)
+        if name in index["sets"]:
+            continue  # Same name as an earlier input; the first one wins, as in stroke_data_server
+        keys = list(open_source(path).keys())
+        entry = index["sets"][name] = {"source": path, "sheets": [], "glyphs": {}}
+        for sheet, first in enumerate(range(0, len(keys), per_sheet)):
+            sheet_keys = keys[first:first + per_sheet]
+            sheet_jobs.append((path, sheet_keys, f"{name}_{sheet:03d}.{extension}"))
+            for position, key in enumerate(sheet_keys):
+                y, x = divmod(position, settings["columns"])
+                entry["glyphs"][key] = {"sheet": sheet, "x": x * settings["cell"], "y": y * settings["cell"]}
+
+    os.makedirs(settings["output"], exist_ok=True)
+    if jobs > 1 and len(sheet_jobs) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            sheets = list(pool.map(render_sheet, *zip(*sheet_jobs), [settings] * len(sheet_jobs)))
+    else:
+        sheets = [render_sheet(path, keys, filename, settings) for path, keys, filename in sheet_jobs]
+
+    # Sheets come back in job order, which is set order then sheet order
+    for (path, _, _), sheet in zip(sheet_jobs, sheets):
+        index["sets"][set_name(path)]["sheets"].append(sheet)
+
+    index_path = os.path.join(settings["output"], INDEX_FILE)
+    with atomic_open(index_path) as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    write_manifest(index_path, sum(len(entry["glyphs"]) for entry in index["sets"].values()), params)
+    return index
+
+
+def main():
+    args = sys.argv[1:]
+
+    def take(name: str, default=None):
+        if name in args:
+            idx = args.index(name)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            return value
+        return default
+
+    settings = {
+        "output": take("--output", DEFAULT_OUTPUT),
+        "cell": int(take("--cell", str(DEFAULT_CELL))),
+        "columns": int(take("--columns", str(DEFAULT_COLUMNS))),
+        "rows": int(take("--rows", str(DEFAULT_ROWS))),
+        "stroke_width": float(take("--width", str(DEFAULT_STROKE_WIDTH))),
+        "padding": float(take("--padding", str(DEFAULT_PADDING))),
+        "format": take("--format", "png"),
+    }
+    if settings["format"] not in FORMATS:
+        print(f"Unknown format '{settings['format']}'; use one of {', '.join(FORMATS)}")
+        sys.exit(2)
+    jobs = int(take("--jobs", "0")) or os.cpu_count() or 1
+    force = "--force" in args
+    if force:
+        args.remove("--force")
+    paths = args or existing(CORPUS_FILES)
+
+    print("🖼️  Glyph Thumbnail Sprite Sheets")
+    print("=" * 50)
+
+    index_path = os.path.join(settings["output"], INDEX_FILE)
+    if not force and is_current(index_path, build_params(paths, settings)):
+        print(f"⏭️  {index_path} is up to date (same inputs and options); --force rebuilds it")
+        return
+
+    start = time.perf_counter()
+    index = build_thumbnails(paths, settings, jobs)
+    elapsed = time.perf_counter() - start
+
+    glyphs = 0
+    for name, entry in index["sets"].items():
+        glyphs += len(entry["glyphs"])
+        print(f"  {name}: {len(entry['glyphs'])} glyphs on {len(entry['sheets'])} sheets")
+    print(f"✅ {glyphs} thumbnails of {settings['cell']}×{settings['cell']} in {elapsed:.2f}s on {jobs} workers")
+    print(f"📦 {settings['output']}/ ({settings['format']}) + {index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Compose Chinese numerals of arbitrary size from the base number glyphs.
+
+Usage:
+    python3 chinese_number_composer.py 42 108 2024 99999
+    python3 chinese_number_composer.py --sequence 1000000 --max 9999 [--show 1000]
+
+Builds on download_chinese_numbers.py: instead of precomputing every number,
+an integer is turned into its numeral string (e.g. 2024 → 二千零二十四) and its
+stroke layout is composed on demand from the glyphs already stored in
+strokedata/chinesenumbers.json (零-十 plus 百, 千, 万, 億). Composed layouts are
+kept in an LRU cache so repeated numbers cost nothing.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from download_chinese_numbers import (
+    COMPOUND_KERNING,
+    COMPOUND_SCALE,
+    CompoundComposer,
+    JSON_OUTPUT,
+    OUTPUT_DIR,
+)
+from stroke_timeline import build_timeline
+
+DIGITS = "零一二三四五六七八九"
+
+# Place values inside a 4-digit group, and the group markers above it
+SMALL_UNITS = ["", "十", "百", "千"]
+LARGE_UNITS = ["", "万", "億"]
+
+# Largest number expressible with the available glyphs (below 1万億)
+MAX_NUMBER = 10 ** 12 - 1
+
+# Default number of composed layouts kept in memory
+DEFAULT_CACHE_SIZE = 4096
+
+
+def _group_to_numeral(group: int) -> str:
+    """Convert 0-9999 to a numeral, inserting a single 零 for inner zero runs."""
+    result = ""
+    pending_zero = False
+    for position in range(3, -1, -1):
+        digit = (group // 10 ** position) % 10
+        if digit == 0:
+            pending_zero = bool(result)
+            continue
+        if pending_zero:
+            result += DIGITS[0]
+            pending_zero = False
+        result += DIGITS[digit] + SMALL_UNITS[position]
+    return result
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def to_numeral(number: int) -> str:
+    """
+    Convert a non-negative integer to its Chinese numeral string.
+
+    Follows the usual reading rules: 10-19 drop the leading 一 (十一), inner
+    runs of zeros read as one 零 (一百零一), and a group that does not fill
+    its four places after a higher group is preceded by 零 (一万零五十).
+    """
+    if number < 0 or number > MAX_NUMBER:
+        raise ValueError(f"number must be between 0 and {MAX_NUMBER}, got {number}")
+    if number == 0:
+        return DIGITS[0]
+
+    groups = []
+    remaining = number
+    while remaining:
+        groups.append(remaining % 10000)
+        remaining //= 10000
+
+    result = ""
+    for index in range(len(groups) - 1, -1, -1):
+        group = groups[index]
+        if group == 0:
+            continue
+        # A short group after a higher one needs a 零 placeholder
+        if result and (group < 1000 or groups[index + 1] == 0):
+            result += DIGITS[0]
+        result += _group_to_numeral(group) + LARGE_UNITS[index]
+
+    # 一十 at the very start is read as 十 (十一, not 一十一)
+    if result.startswith("一十"):
+        result = result[1:]
+    return result
+
+
+class NumberComposer:
+    """
+    Lazily composes stroke layouts for arbitrary numbers.
+
+    Each layout is built the first time it is requested and cached (LRU,
+    bounded by cache_size); the underlying CompoundComposer also memoizes the
+    per-slot placement of every base glyph, so even cache misses only do the
+    final re-normalization.
+    """
+
+    def __init__(self, base_glyphs: Dict[str, List[List[Tuple[float, float]]]],
+                 cache_size: int = DEFAULT_CACHE_SIZE,
+                 scale: float = COMPOUND_SCALE, kerning: float = COMPOUND_KERNING):
+        self._composer = CompoundComposer(base_glyphs, scale=scale, kerning=kerning)
+        self._layout = lru_cache(maxsize=cache_size)(self._compose)
+
+    def _compose(self, number: int) -> Optional[List[List[Tuple[float, float]]]]:
+        numeral = to_numeral(number)
+        if len(numeral) == 1:
+            return self._composer.base_glyphs.get(numeral)
+        return self._composer.compose(numeral)
+
+    def layout(self, number: int) -> Optional[List[List[Tuple[float, float]]]]:
+        """Normalized (x, y) strokes for the number, or None if a glyph is missing."""
+        return self._layout(number)
+
+    def entry(self, number: int) -> Optional[Dict]:
+        """JSON entry in the same shape as the chinesenumbers.json records."""
+        strokes = self.layout(number)
+        if strokes is None:
+            return None
+        numeral = to_numeral(number)
+        # Point dicts are built only here; the cached layouts stay (x, y) tuples
+        times, timeline = build_timeline(strokes)
+        return {
+            "character": numeral,
+            "codepoint": ord(numeral) if len(numeral) == 1 else -number,
+            "strokes": [[{"x": x, "y": y, "t": t} for (x, y), t in zip(stroke, stroke_times)]
+                        for stroke, stroke_times in zip(strokes, times)],
+            "components": [ord(char) for char in numeral],
+            "timeline": timeline
+        }
+
+    def cache_info(self):
+        """Hit/miss statistics of the layout cache."""
+        return self._layout.cache_info()
+
+    @classmethod
+    def from_json(cls, path: str = os.path.join(OUTPUT_DIR, JSON_OUTPUT), **kwargs) -> "NumberComposer":
+        """Create a composer from the single-character entries of a numbers JSON."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        base_glyphs = {entry["character"]: [[(point["x"], point["y"]) for point in stroke]
+                                            for stroke in entry["strokes"]]
+                       for key, entry in data.items() if key.startswith("U+")}
+        return cls(base_glyphs, **kwargs)
+
+
+def practice_sequence(count: int, low: int = 0, high: int = 9999,
+                      seed: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield `count` random (number, numeral) pairs without materializing them.
+    Layouts are not composed here; call NumberComposer.layout() per item
+    when it is actually shown.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        number = rng.randint(low, high)
+        yield number, to_numeral(number)
+
+
+def main():
+    args = sys.argv[1:]
+    composer = NumberComposer.from_json()
+
+    if '--sequence' in args:
+        count = int(args[args.index('--sequence') + 1])
+        high = int(args[args.index('--max') + 1]) if '--max' in args else 9999
+        shown = int(args[args.index('--show') + 1]) if '--show' in args else 1000
+
+        print(f"🔢 Generating {count:,} practice items (0-{high})...")
+        start = time.perf_counter()
+        for _ in practice_sequence(count, 0, high, seed=0):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"  ✅ {count / elapsed:,.0f} items/sec ({elapsed:.2f}s), no layouts built")
+
+        # Only items that are actually shown get a layout
+        print(f"\n🧩 Composing layouts for the first {shown:,} items...")
+        start = time.perf_counter()
+        for _, (number, _) in zip(range(shown), practice_sequence(count, 0, high, seed=0)):
+            composer.layout(number)
+        elapsed = time.perf_counter() - start
+
+        info = composer.cache_info()
+        print(f"  ✅ {shown / elapsed:,.0f} layouts/sec ({elapsed:.2f}s)")
+        print(f"  Cache: {info.hits:,} hits, {info.misses:,} misses, {info.currsize:,} cached")
+        return
+
+    for arg in args:
+        number = int(arg)
+        strokes = composer.layout(number)
+        if strokes is None:
+            print(f"  ⚠️  {number}: {to_numeral(number)} (missing component glyph)")
+        else:
+            print(f"  {number}: {to_numeral(number)} ({len(strokes)} strokes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Store shared kanji components once and reference them by affine transform.
+
+Usage:
+    python3 dedupe_components.py                                  # strokedata/kanjistrokes.json
+    python3 dedupe_components.py kanji.json --output kanji.dedup.json --tolerance 0.01
+    python3 dedupe_components.py --decode kanji.dedup.json U+4F11 # rebuild one glyph
+
+Many kanji share components (氵, 口, 木, ...), so a full kanji set stores the
+same stroke geometry hundreds of times. Using the component tree written by
+download_kanji_strokes.py, this build stage:
+
+1. resamples every shared component (an element seen in at least two glyphs)
+   to a fixed number of points per stroke, corners kept, and normalizes it to
+   the unit box
+2. matches it against the library shapes for the same element; a match is
+   accepted when the library shape, placed with this instance's transform,
+   reproduces the instance's literal points within `tolerance` (normalized
+   glyph units). A component that no shape can reproduce, not even its own
+   resampled one (curves with more detail than RESAMPLE_POINTS keep), is
+   split into its children, and strokes no reference covers stay literal
+3. encodes each glyph as a list of parts in stroke order: either a reference
+   {"ref": id, "transform": [sx, sy, tx, ty]} (x' = sx*x + tx, y' = sy*y + ty)
+   or literal strokes for geometry that is not shared
+
+The report lists bytes before/after and the round-trip error of every glyph,
+measured against the literal points; the build fails if any glyph is off by
+more than `tolerance`.
+DedupedGlyphs decodes glyphs lazily, one at a time, back into the usual
+{"character", "codepoint", "strokes": [[{x, y, t}]]} entries. Referenced
+strokes come back resampled, so decoded glyphs are retimed with
+stroke_timeline.retime_entry at the speed and pause the input was timed
+with (kept under "timing" in the file); `t` and "timeline" then agree as in
+every other output.
+"""
+
+import json
+import os
+import sys
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from stroke_timeline import INTER_STROKE_PAUSE, STROKE_SPEED, retime_entry
+from stroke_writer import atomic_open, input_hashes, read_manifest, write_manifest
+
+DEFAULT_INPUT = os.path.join("strokedata", "kanjistrokes.json")
+DEFAULT_SUFFIX = ".dedup.json"
+FORMAT_VERSION = 1
+
+# Points per stroke in library components
+RESAMPLE_POINTS = 12
+# Turns sharper than this (radians) are corners that resampling keeps
+CORNER_ANGLE = np.radians(35)
+# Largest point error (normalized glyph units) for reusing a library shape
+DEFAULT_TOLERANCE = 0.015
+# Axis extents below this are treated as flat (e.g. 一) and not stretched
+MIN_EXTENT = 0.05
+# Decimals kept for library points and transforms
+PRECISION = 4
+
+
+def resample(stroke: np.ndarray, count: int = RESAMPLE_POINTS) -> np.ndarray:
+    """
+    `count` points along a polyline: its ends and corners (turns sharper than
+    CORNER_ANGLE, e.g. the bend of 口's second stroke) kept exactly, the rest
+    evenly spaced by arc length between them.
+    """
+    if len(stroke) == 1:
+        return np.repeat(stroke, count, axis=0)
+    steps = np.diff(stroke, axis=0)
+    lengths = np.hypot(*steps.T)
+    distance = np.concatenate([[0.0], np.cumsum(lengths)])
+    if distance[-1] == 0:
+        return np.repeat(stroke[:1], count, axis=0)
+    moving = np.flatnonzero(lengths > 0)
+    headings = np.arctan2(steps[moving, 1], steps[moving, 0])
+    turns = np.abs((np.diff(headings) + np.pi) % (2 * np.pi) - np.pi)
+    anchors = np.concatenate([[0.0], distance[moving[1:][turns > CORNER_ANGLE]], [distance[-1]]])
+    if len(anchors) > count:
+        anchors = anchors[[0, -1]]
+    # Points between anchors, shared out by span length (largest remainder)
+    spans = np.diff(anchors)
+    # Rounded so equal spans tie exactly and the earlier one gets the point
+    share = np.round(spans / spans.sum() * (count - len(anchors)), 6)
+    inner = np.floor(share).astype(int)
+    inner[np.argsort(inner - share, kind="stable")[:count - len(anchors) - inner.sum()]] += 1
+    targets = np.concatenate([np.linspace(start, end, n + 2)[:-1]
+                              for start, end, n in zip(anchors[:-1], anchors[1:], inner)] + [anchors[-1:]])
+    return np.stack([np.interp(targets, distance, stroke[:, 0]),
+                     np.interp(targets, distance, stroke[:, 1])], axis=1)
+
+
+def fit_transform(points: np.ndarray) -> np.ndarray:
+    """[sx, sy, tx, ty] mapping the unit box onto the points' bounding box."""
+    low = points.reshape(-1, 2).min(axis=0)
+    extent = np.maximum(points.reshape(-1, 2).max(axis=0) - low, MIN_EXTENT)
+    return np.concatenate([extent, low])
+
+
+def to_unit(points: np.ndarray, transform: np.ndarray) -> np.ndarray:
+    return (points - transform[2:]) / transform[:2]
+
+
+def from_unit(points: np.ndarray, transform: np.ndarray) -> np.ndarray:
+    return points * transform[:2] + transform[2:]
+
+
+def _points(stroke: List[Dict]) -> np.ndarray:
+    return np.array([(point["x"], point["y"]) for point in stroke], dtype=np.float64).reshape(-1, 2)
+
+
+def polyline_distance(points: np.ndarray, line: np.ndarray) -> float:
+    """Largest distance from any of `points` to the polyline through `line`."""
+    if len(line) == 1:
+        return float(np.hypot(*(points - line[0]).T).max())
+    start, end = line[:-1], line[1:]
+    segment = end - start
+    length = np.maximum((segment ** 2).sum(axis=1), 1e-12)
+    offset = points[:, None, :] - start[None, :, :]
+    along = np.clip((offset * segment).sum(axis=2) / length, 0.0, 1.0)
+    nearest = start + along[..., None] * segment
+    return float(np.hypot(*(points[:, None, :] - nearest).transpose(2, 0, 1)).min(axis=1).max())
+
+
+def stroke_error(original: np.ndarray, decoded: np.ndarray) -> float:
+    """Hausdorff distance between two strokes taken as polylines."""
+    return max(polyline_distance(original, decoded), polyline_distance(decoded, original))
+
+
+def _stroke_dicts(stroke: np.ndarray) -> List[Dict]:
+    """Points back in the app's {x, y, t} form; t is a 0-1 placeholder until retimed."""
+    last = max(len(stroke) - 1, 1)
+    return [{"x": round(float(x), PRECISION), "y": round(float(y), PRECISION), "t": round(i / last, 4)}
+            for i, (x, y) in enumerate(stroke)]
+
+
+class ComponentLibrary:
+    """Unit-box component shapes, bucketed by element and stroke count."""
+
+    def __init__(self, tolerance: float = DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.shapes: List[np.ndarray] = []
+        self.elements: List[str] = []
+        self.uses: List[int] = []
+        self._buckets: Dict[Tuple[str, int], List[int]] = {}
+
+    def _reproduces(self, shape: np.ndarray, transform: np.ndarray, literal: List[np.ndarray]) -> bool:
+        """Whether `shape`, placed and rounded as decoding does, is within tolerance of every stroke."""
+        placed = np.round(from_unit(shape, transform), PRECISION)
+        return all(stroke_error(points, stroke) <= self.tolerance for points, stroke in zip(literal, placed))
+
+    def match_or_add(self, element: str, strokes: np.ndarray,
+                     literal: List[np.ndarray]) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Library id and transform for a resampled component (strokes × points × 2)
+        whose original points are `literal`. Reuses the closest shape of the same
+        element that reproduces the literal points within tolerance, else adds
+        this one; None if even its own resampled shape is off by more.
+        """
+        transform = np.round(fit_transform(strokes), PRECISION)
+        bucket = self._buckets.setdefault((element, len(strokes)), [])
+        if bucket:
+            candidates = np.stack([self.shapes[i] for i in bucket])
+            placed = from_unit(candidates, transform)
+            # Resampled error as a cheap filter; the literal points decide
+            errors = np.hypot(*(placed - strokes).T).max(axis=(0, 1))
+            for best in np.argsort(errors, kind="stable"):
+                if errors[best] > self.tolerance:
+                    break
+                if self._reproduces(self.shapes[bucket[best]], transform, literal):
+                    self.uses[bucket[best]] += 1
+                    return bucket[best], transform
+
+        shape = np.round(to_unit(strokes, transform), PRECISION)
+        if not self._reproduces(shape, transform, literal):
+            return None
+        shape_id = len(self.shapes)
+        self.shapes.append(shape)
+        self.elements.append(element)
+        self.uses.append(1)
+        bucket.append(shape_id)
+        return shape_id, transform
+
+    def as_json(self) -> List[Dict]:
+        return [{"element": element, "strokes": shape.tolist()}
+                for element, shape in zip(self.elements, self.shapes)]
+
+
+def shared_elements(data: Dict[str, Dict]) -> Counter:
+    """How many glyphs contain each (element, part, stroke count) component."""
+    counts = Counter()
+    for entry in data.values():
+        seen = set()
+        for node in entry.get("tree", [])[1:]:
+            start, end = node["strokes"]
+            seen.add((node["element"], node.get("part"), end - start))
+        counts.update(seen)
+    return counts
+
+
+def encode_glyph(entry: Dict, library: ComponentLibrary, shared: Counter) -> Dict:
+    """
+    Encode one glyph as parts in stroke order. The tree is walked top-down:
+    a shared component becomes a reference if the library can reproduce it,
+    anything else is split into its children, and strokes covered by no
+    reference stay literal.
+    """
+    strokes = entry["strokes"]
+    tree = entry.get("tree", [])
+    children: Dict[int, List[int]] = {}
+    for index, node in enumerate(tree):
+        children.setdefault(node["parent"], []).append(index)
+
+    references: List[Tuple[int, int, Dict]] = []
+
+    def visit(index: int):
+        node = tree[index]
+        start, end = node["strokes"]
+        signature = (node["element"], node.get("part"), end - start)
+        if node["parent"] != -1 and shared[signature] >= 2:
+            element = node["element"] if node.get("part") is None else f"{node['element']}#{node['part']}"
+            literal = [_points(stroke) for stroke in strokes[start:end]]
+            resampled = np.stack([resample(points) for points in literal])
+            match = library.match_or_add(element, resampled, literal)
+            if match is not None:
+                shape_id, transform = match
+                references.append((start, end, {"ref": shape_id, "transform": transform.tolist()}))
+                return
+        for child in children.get(index, []):
+            visit(child)
+
+    for root in children.get(-1, []):
+        visit(root)
+
+    parts = []
+    cursor = 0
+    for start, end, reference in sorted(references, key=lambda item: item[0]):
+        if start > cursor:
+            parts.append({"strokes": strokes[cursor:start]})
+        parts.append(reference)
+        cursor = end
+    if cursor < len(strokes):
+        parts.append({"strokes": strokes[cursor:]})
+
+    encoded = {key: value for key, value in entry.items() if key != "strokes"}
+    encoded["parts"] = parts
+    return encoded
+
+
+def decode_parts(parts: List[Dict], shapes: List[np.ndarray]) -> List[List[Dict]]:
+    """Rebuild full stroke lists from encoded parts."""
+    strokes = []
+    for part in parts:
+        if "ref" in part:
+            placed = from_unit(shapes[part["ref"]], np.asarray(part["transform"]))
+            strokes.extend(_stroke_dicts(stroke) for stroke in placed)
+        else:
+            strokes.extend([dict(point) for point in stroke] for stroke in part["strokes"])
+    return strokes
+
+
+def round_trip_error(original: List[List[Dict]], decoded: List[List[Dict]]) -> float:
+    """Largest stroke_error between the two versions, over the literal points."""
+    if len(original) != len(decoded):
+        return float("inf")
+    worst = 0.0
+    for a, b in zip(original, decoded):
+        if a and b:
+            worst = max(worst, stroke_error(_points(a), _points(b)))
+    return worst
+
+
+def deduplicate(data: Dict[str, Dict], tolerance: float = DEFAULT_TOLERANCE,
+                timing: Optional[Dict] = None) -> Tuple[Dict, Dict]:
+    """
+    Encode a glyph dict; returns (deduplicated document, report). `timing`
+    is the {"speed", "pause"} the input was retimed with (stroke_timeline
+    defaults if None).
+    """
+    shared = shared_elements(data)
+    library = ComponentLibrary(tolerance)
+    glyphs = {key: encode_glyph(entry, library, shared) for key, entry in data.items()}
+
+    document = {
+        "version": FORMAT_VERSION,
+        "resample_points": RESAMPLE_POINTS,
+        "tolerance": tolerance,
+        "timing": timing or {"speed": STROKE_SPEED, "pause": INTER_STROKE_PAUSE},
+        "components": library.as_json(),
+        "glyphs": glyphs,
+    }
+
+    errors = {key: round_trip_error(entry["strokes"], decode_parts(glyphs[key]["parts"], library.shapes))
+              for key, entry in data.items()}
+    before = len(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    after = len(json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    references = sum(library.uses)
+    error_values = np.array(list(errors.values()) or [0.0])
+
+    report = {
+        "glyphs": len(data),
+        "library_components": len(library.shapes),
+        "component_references": references,
+        "reuse_factor": round(references / len(library.shapes), 2) if library.shapes else 0.0,
+        "bytes_before": before,
+        "bytes_after": after,
+        "saved_ratio": round(1 - after / before, 4) if before else 0.0,
+        "error_mean": round(float(error_values.mean()), 5),
+        "error_max": round(float(error_values.max()), 5),
+        "over_tolerance": sorted(key for key, error in errors.items() if error > tolerance),
+        "worst_glyphs": sorted(({"key": key, "character": data[key].get("character", ""),
+                                 "error": round(error, 5)} for key, error in errors.items()),
+                               key=lambda item: item["error"], reverse=True)[:10],
+        "most_shared": sorted(({"element": element, "uses": uses}
+                               for element, uses in zip(library.elements, library.uses)),
+                              key=lambda item: item["uses"], reverse=True)[:10],
+    }
+    return document, report
+
+
+class DedupedGlyphs:
+    """
+    Read-only view of a deduplicated file that rebuilds glyphs on demand.
+    Decoded glyphs are memoized in a bounded LRU cache.
+    """
+
+    def __init__(self, path: str, cache_size: int = 256):
+        with open(path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        if document.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported deduplicated format {document.get('version')!r}")
+        self._shapes = [np.asarray(component["strokes"], dtype=np.float64)
+                        for component in document["components"]]
+        self._glyphs: Dict[str, Dict] = document["glyphs"]
+        timing = document.get("timing") or {}
+        self._speed = timing.get("speed", STROKE_SPEED)
+        self._pause = timing.get("pause", INTER_STROKE_PAUSE)
+        self.get = lru_cache(maxsize=cache_size)(self._decode)
+
+    def _decode(self, key: str) -> Optional[Dict]:
+        encoded = self._glyphs.get(key)
+        if encoded is None:
+            return None
+        glyph = {name: value for name, value in encoded.items() if name != "parts"}
+        glyph["strokes"] = decode_parts(encoded["parts"], self._shapes)
+        return retime_entry(glyph, self._speed, self._pause)
+
+    def __getitem__(self, key: str) -> Dict:
+        glyph = self.get(key)
+        if glyph is None:
+            raise KeyError(key)
+        return glyph
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._glyphs
+
+    def __len__(self) -> int:
+        return len(self._glyphs)
+
+    def keys(self):
+        return self._glyphs.keys()
+
+
+def main():
+    args = sys.argv[1:]
+
+    if '--decode' in args:
+        idx = args.index('--decode')
+        glyphs = DedupedGlyphs(args[idx + 1])
+        for key in args[idx + 2:] or list(glyphs.keys())[:1]:
+            print(json.dumps(glyphs[key], ensure_ascii=False))
+        return
+
+    tolerance = DEFAULT_TOLERANCE
+    output = None
+    if '--tolerance' in args:
+        idx = args.index('--tolerance')
+        tolerance = float(args[idx + 1])
+        del args[idx:idx + 2]
+    if '--output' in args:
+        idx = args.index('--output')
+        output = args[idx + 1]
+        del args[idx:idx + 2]
+    input_path = args[0] if args else DEFAULT_INPUT
+    output = output or os.path.splitext(input_path)[0] + DEFAULT_SUFFIX
+
+    print("🧩 Component Deduplication")
+    print("=" * 50)
+
+    with open(input_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not any(entry.get("tree") for entry in data.values()):
+        print(f"⚠️  {input_path} has no component trees; run download_kanji_strokes.py first")
+
+    # stroke_timeline.py records a non-default speed or pause in the manifest
+    manifest = read_manifest(input_path)
+    params = manifest["params"] if manifest else {}
+    timing = {"speed": params.get("speed", STROKE_SPEED), "pause": params.get("pause", INTER_STROKE_PAUSE)}
+    document, report = deduplicate(data, tolerance, timing)
+    if report["over_tolerance"]:
+        print(f"❌ {len(report['over_tolerance'])} glyph(s) decode more than {tolerance} off: "
+              + ", ".join(report["over_tolerance"][:10]))
+        sys.exit(1)
+    with atomic_open(output) as f:
+        json.dump(document, f, ensure_ascii=False, separators=(',', ':'))
+    write_manifest(output, report['glyphs'], {"inputs": input_hashes([input_path]), "tolerance": tolerance})
+
+    print(f"   Glyphs: {report['glyphs']}")
+    print(f"   Library components: {report['library_components']} "
+          f"({report['component_references']} references, ×{report['reuse_factor']} reuse)")
+    print(f"   Size: {report['bytes_before']:,} → {report['bytes_after']:,} bytes "
+          f"({report['saved_ratio']:.1%} saved)")
+    print(f"   Round-trip error: mean {report['error_mean']}, max {report['error_max']}")
+    if report["most_shared"]:
+        print("   Most shared: " + ", ".join(f"{item['element']}×{item['uses']}"
+                                            for item in report["most_shared"]))
+
+    report_path = os.path.splitext(output)[0] + ".report.json"
+    with atomic_open(report_path) as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Wrote {output}")
+    print(f"📄 Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
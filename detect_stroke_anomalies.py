@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Detect reversed, mirrored and upside-down glyphs in generated stroke data.
+
+Usage:
+    python3 detect_stroke_anomalies.py
+    python3 detect_stroke_anomalies.py strokedata/kanastrokes.json --top 20 --report suspects.json
+
+The Steps docs record several regressions (upside-down hanzi-writer
+characters, U+3007, key format mismatches) that were only found by looking at
+glyphs in the app. This script checks every glyph in bulk against
+calligraphic heuristics for the canonical y-down space:
+- horizontal strokes are written left to right
+- vertical strokes are written top to bottom
+- stroke order generally runs top to bottom and left to right
+
+When the same codepoint exists in more than one input file (e.g. 一-十 from
+both KanjiVG and hanzi-writer), the glyphs are also compared stroke by stroke
+against each other, directly and with flipped/mirrored/reversed variants.
+
+All per-stroke features live in flat NumPy arrays and per-glyph statistics are
+reduced with bincount, so the full KanjiVG corpus is swept in seconds. The
+output is a ranked suspect list.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from stroke_inputs import DEFAULT_FILES
+from stroke_writer import atomic_open
+
+DEFAULT_REPORT = "anomaly_report.json"
+
+# A stroke counts as horizontal/vertical when one axis dominates by this ratio
+AXIS_DOMINANCE = 2.0
+# Strokes shorter than this (normalized units) are dots; their direction is noise
+MIN_STROKE_LENGTH = 0.05
+# Glyphs scoring at or above this are reported as suspects
+SUSPECT_THRESHOLD = 0.5
+
+
+class StrokeTable:
+    """Flat, array-backed view of the strokes of many glyphs."""
+
+    def __init__(self, glyphs: List[Tuple[str, str, str, List[List[Dict]]]]):
+        self.files = []
+        self.keys = []
+        self.characters = []
+        starts, ends, glyph_index, order = [], [], [], []
+
+        for index, (file, key, character, strokes) in enumerate(glyphs):
+            self.files.append(file)
+            self.keys.append(key)
+            self.characters.append(character)
+            for stroke_index, stroke in enumerate(s for s in strokes if s):
+                starts.append((stroke[0]["x"], stroke[0]["y"]))
+                ends.append((stroke[-1]["x"], stroke[-1]["y"]))
+                glyph_index.append(index)
+                order.append(stroke_index)
+
+        self.start = np.array(starts, dtype=np.float64).reshape(-1, 2)
+        self.end = np.array(ends, dtype=np.float64).reshape(-1, 2)
+        self.glyph = np.array(glyph_index, dtype=np.int64)
+        self.order = np.array(order, dtype=np.float64)
+        self.glyph_count = len(glyphs)
+        # Strokes are stored glyph by glyph, so each glyph is a contiguous slice
+        self.offsets = np.searchsorted(self.glyph, np.arange(self.glyph_count + 1))
+
+    def strokes_of(self, index: int) -> slice:
+        return slice(self.offsets[index], self.offsets[index + 1])
+
+    def per_glyph_sum(self, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self.glyph, weights=values, minlength=self.glyph_count)
+
+
+def load_glyphs(paths: List[str]) -> List[Tuple[str, str, str, List[List[Dict]]]]:
+    glyphs = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for key, entry in data.items():
+            glyphs.append((path, key, entry.get("character", ""), entry.get("strokes") or []))
+    return glyphs
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _order_correlation(table: StrokeTable, values: np.ndarray) -> np.ndarray:
+    """Per-glyph Pearson correlation between stroke index and `values`."""
+    n = table.per_glyph_sum(np.ones_like(values))
+    sum_i = table.per_glyph_sum(table.order)
+    sum_v = table.per_glyph_sum(values)
+    sum_ii = table.per_glyph_sum(table.order ** 2)
+    sum_vv = table.per_glyph_sum(values ** 2)
+    sum_iv = table.per_glyph_sum(table.order * values)
+
+    cov = sum_iv - _safe_ratio(sum_i * sum_v, n)
+    var_i = sum_ii - _safe_ratio(sum_i ** 2, n)
+    var_v = sum_vv - _safe_ratio(sum_v ** 2, n)
+    return _safe_ratio(cov, np.sqrt(np.clip(var_i * var_v, 0, None)))
+
+
+def heuristic_features(table: StrokeTable) -> Dict[str, np.ndarray]:
+    """Per-glyph direction and ordering statistics from the stroke table."""
+    delta = table.end - table.start
+    dx, dy = np.abs(delta[:, 0]), np.abs(delta[:, 1])
+    long_enough = np.hypot(dx, dy) >= MIN_STROKE_LENGTH
+
+    horizontal = (long_enough & (dx >= AXIS_DOMINANCE * dy)).astype(np.float64)
+    vertical = (long_enough & (dy >= AXIS_DOMINANCE * dx)).astype(np.float64)
+    right_to_left = horizontal * (delta[:, 0] < 0)
+    bottom_to_top = vertical * (delta[:, 1] < 0)
+
+    return {
+        "horizontal": table.per_glyph_sum(horizontal),
+        "vertical": table.per_glyph_sum(vertical),
+        "reversed_horizontal": _safe_ratio(table.per_glyph_sum(right_to_left),
+                                           table.per_glyph_sum(horizontal)),
+        "reversed_vertical": _safe_ratio(table.per_glyph_sum(bottom_to_top),
+                                         table.per_glyph_sum(vertical)),
+        # Stroke order normally moves down and right: both correlations positive
+        "order_y": _order_correlation(table, (table.start[:, 1] + table.end[:, 1]) / 2),
+        "order_x": _order_correlation(table, (table.start[:, 0] + table.end[:, 0]) / 2),
+    }
+
+
+def classify(features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[List[str]]]:
+    """Turn features into a 0-1 suspicion score and labels per glyph."""
+    has_h = features["horizontal"] > 0
+    has_v = features["vertical"] > 0
+    rev_h = np.where(has_h, features["reversed_horizontal"], 0.0)
+    rev_v = np.where(has_v, features["reversed_vertical"], 0.0)
+    up_order = np.clip(-features["order_y"], 0, 1)
+    left_order = np.clip(-features["order_x"], 0, 1)
+
+    # Each label pairs a direction signal with the matching ordering signal
+    flipped = np.where(has_v, 0.6 * rev_v + 0.4 * up_order, 0.4 * up_order)
+    mirrored = np.where(has_h, 0.6 * rev_h + 0.4 * left_order, 0.4 * left_order)
+    reversed_strokes = np.where(has_h & has_v, np.minimum(rev_h, rev_v), 0.0)
+
+    scores = np.max(np.stack([flipped, mirrored, reversed_strokes]), axis=0)
+    labels = []
+    for f, m, r in zip(flipped, mirrored, reversed_strokes):
+        glyph_labels = []
+        if r >= SUSPECT_THRESHOLD:
+            glyph_labels.append("reversed")
+        if f >= SUSPECT_THRESHOLD:
+            glyph_labels.append("flipped")
+        if m >= SUSPECT_THRESHOLD:
+            glyph_labels.append("mirrored")
+        labels.append(glyph_labels)
+    return scores, labels
+
+
+def compare_sources(table: StrokeTable, a: int, b: int) -> Optional[Tuple[str, float]]:
+    """
+    Compare two versions of the same glyph stroke by stroke. Returns the
+    variant of `b` ("reversed", "flipped", "mirrored") that matches `a`
+    clearly better than `b` as-is, with its margin, or None if `b` agrees.
+    """
+    sa, ea = table.start[table.strokes_of(a)], table.end[table.strokes_of(a)]
+    sb, eb = table.start[table.strokes_of(b)], table.end[table.strokes_of(b)]
+    if len(sa) != len(sb) or len(sa) == 0:
+        return None
+
+    flip_y = np.array([1.0, -1.0])
+    flip_x = np.array([-1.0, 1.0])
+    shift_y = np.array([0.0, 1.0])
+    shift_x = np.array([1.0, 0.0])
+    variants = {
+        "as-is": (sb, eb),
+        "reversed": (eb, sb),
+        "flipped": (sb * flip_y + shift_y, eb * flip_y + shift_y),
+        "mirrored": (sb * flip_x + shift_x, eb * flip_x + shift_x),
+    }
+    errors = {
+        name: float(np.mean(np.hypot(*(s - sa).T) + np.hypot(*(e - ea).T)))
+        for name, (s, e) in variants.items()
+    }
+    best = min(errors, key=errors.get)
+    margin = errors["as-is"] - errors[best]
+    if best != "as-is" and margin > 0.1:
+        return best, margin
+    return None
+
+
+def detect(paths: List[str]) -> List[Dict]:
+    """Run all checks and return suspects, most suspicious first."""
+    table = StrokeTable(load_glyphs(paths))
+    features = heuristic_features(table)
+    scores, labels = classify(features)
+
+    suspects = {}
+    for index in np.nonzero(scores >= SUSPECT_THRESHOLD)[0]:
+        suspects[int(index)] = {
+            "file": table.files[index],
+            "key": table.keys[index],
+            "character": table.characters[index],
+            "score": round(float(scores[index]), 3),
+            "labels": labels[index],
+            "features": {name: round(float(values[index]), 3) for name, values in features.items()},
+        }
+
+    # Second-source comparison for codepoints present in several files
+    by_key: Dict[str, List[int]] = {}
+    for index, key in enumerate(table.keys):
+        by_key.setdefault(key, []).append(index)
+    for indices in by_key.values():
+        for a, b in zip(indices, indices[1:]):
+            mismatch = compare_sources(table, a, b)
+            if mismatch is None:
+                continue
+            variant, margin = mismatch
+            entry = suspects.setdefault(b, {
+                "file": table.files[b],
+                "key": table.keys[b],
+                "character": table.characters[b],
+                "score": 0.0,
+                "labels": [],
+                "features": {name: round(float(values[b]), 3) for name, values in features.items()},
+            })
+            entry["labels"].append(f"{variant} vs {table.files[a]}")
+            entry["score"] = round(max(entry["score"], min(1.0, 0.5 + margin)), 3)
+
+    return sorted(suspects.values(), key=lambda s: s["score"], reverse=True)
+
+
+def main():
+    args = sys.argv[1:]
+    report_path = DEFAULT_REPORT
+    top = 25
+    if '--report' in args:
+        idx = args.index('--report')
+        report_path = args[idx + 1]
+        del args[idx:idx + 2]
+    if '--top' in args:
+        idx = args.index('--top')
+        top = int(args[idx + 1])
+        del args[idx:idx + 2]
+    paths = args or DEFAULT_FILES
+
+    print("🧭 Stroke Direction / Order Anomaly Detector")
+    print("=" * 50)
+
+    suspects = detect(paths)
+    with atomic_open(report_path) as f:
+        json.dump(suspects, f, ensure_ascii=False, indent=2)
+
+    if not suspects:
+        print("✅ No suspicious glyphs found")
+    else:
+        print(f"⚠️  {len(suspects)} suspicious glyphs (top {min(top, len(suspects))}):")
+        for suspect in suspects[:top]:
+            labels = ", ".join(suspect["labels"])
+            print(f"  {suspect['score']:.2f}  {suspect['character']} {suspect['key']} "
+                  f"({os.path.basename(suspect['file'])}): {labels}")
+    print(f"\n📄 Ranked suspect list written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,23 +3,31 @@ Download and convert KanjiVG Chinese number SVG files to JSON stroke data.
 
 Usage:
     python3 download_chinese_numbers.py
+    python3 download_chinese_numbers.py --compose-only   # recompose 11-30 from the existing JSON
 
 This script will:
 1. Download Chinese number (0-30) SVG files from KanjiVG
 2. Parse the SVG path data
 3. Convert to normalized stroke coordinates
-4. Generate JSON file with the stroke data
+4. Compose compound numbers (11-30) from the downloaded base glyphs
+5. Generate JSON file with the stroke data
 """
 
-import urllib.request
 import xml.etree.ElementTree as ET
 import json
 import os
 import re
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
 
-# KanjiVG GitHub raw content URL
-KANJIVG_BASE_URL = "https://raw.githubusercontent.com/KanjiVG/kanjivg/master/kanji/"
+from download_journal import TransientDownloadError
+from stroke_http_client import get_default_client
+from stroke_sources import get_source_set
+from stroke_store import Glyph
+from stroke_timeline import retime_glyph
+from stroke_writer import GlyphJSONWriter
+
+# KanjiVG sources (local checkout via KANJIVG_DIR, GitHub raw, jsDelivr CDN)
+# are listed in stroke_sources.kanjivg_sources()
 
 # Chinese numbers 0-30 with their characters and Unicode codepoints
 # Note: Using 零 (U+96F6) for zero instead of 〇 (U+3007) because KanjiVG has better coverage
@@ -65,22 +73,29 @@ EXTRA_CHARACTERS = {
     "億": 0x5104,   # yì (hundred million)
 }
 
+# Compound layout: components sit side by side in unit cells.
+# COMPOUND_SCALE shrinks each component inside its cell (1.0 = fill the cell),
+# COMPOUND_KERNING is the gap between cells in the same normalized units.
+COMPOUND_SCALE = 0.9
+COMPOUND_KERNING = 0.05
+
 # Output directory
 OUTPUT_DIR = "strokedata"
 JSON_OUTPUT = "chinesenumbers.json"
 
 
-def download_svg(codepoint: int) -> str:
-    """Download SVG file from KanjiVG for a given codepoint."""
-    hex_code = f"{codepoint:05x}"
-    url = f"{KANJIVG_BASE_URL}{hex_code}.svg"
-    
+def download_svg(codepoint: int) -> Optional[str]:
+    """Download SVG file from KanjiVG (first healthy source) for a given codepoint."""
     try:
-        with urllib.request.urlopen(url, timeout=10) as response:
-            return response.read().decode('utf-8')
-    except Exception as e:
-        print(f"  ⚠️  Failed to download U+{hex_code.upper()}: {e}")
+        result = get_source_set("kanjivg").fetch(codepoint)
+    except TransientDownloadError as e:
+        print(f"  ⚠️  Failed to download U+{codepoint:05X}: {e}")
+        return None
+    
+    if result is None:
+        print(f"  ⚠️  Failed to download U+{codepoint:05X}: not found in any source")
         return None
+    return result.text()
 
 
 def parse_svg_path(path_d: str) -> List[Tuple[float, float]]:
@@ -129,7 +144,7 @@ def parse_svg_path(path_d: str) -> List[Tuple[float, float]]:
                 # Sample the curve with control points
                 if cmd == 'C':
                     x1, y1 = numbers[num_idx], numbers[num_idx + 1]
-                    x2, y2 = numbers[num_idx + 2], numbers[num_idx + 1]
+                    x2, y2 = numbers[num_idx + 2], numbers[num_idx + 3]
                     x3, y3 = numbers[num_idx + 4], numbers[num_idx + 5]
                 else:
                     x1, y1 = current_x + numbers[num_idx], current_y + numbers[num_idx + 1]
@@ -216,10 +231,10 @@ def parse_svg_path(path_d: str) -> List[Tuple[float, float]]:
     return points
 
 
-def normalize_points(all_strokes: List[List[Tuple[float, float]]]) -> List[List[Dict]]:
+def normalize_points(all_strokes: List[List[Tuple[float, float]]]) -> List[List[Tuple[float, float]]]:
     """
     Normalize all stroke points to 0-1 range based on the entire character's bounding box.
-    Also adds timestamp 't' for animation.
+    Timing is added once the strokes are in a Glyph (see stroke_timeline.retime_glyph).
     """
     if not all_strokes or not any(all_strokes):
         return []
@@ -252,22 +267,8 @@ def normalize_points(all_strokes: List[List[Tuple[float, float]]]) -> List[List[
         if not stroke:
             continue
             
-        normalized_stroke = []
-        for i, (x, y) in enumerate(stroke):
-            # Normalize coordinates
-            norm_x = (x - min_x + offset_x) / scale
-            norm_y = (y - min_y + offset_y) / scale
-            
-            # Add timestamp for animation (0.0 to 1.0 within each stroke)
-            t = i / (len(stroke) - 1) if len(stroke) > 1 else 0.0
-            
-            normalized_stroke.append({
-                "x": norm_x,
-                "y": norm_y,
-                "t": t
-            })
-        
-        normalized_strokes.append(normalized_stroke)
+        normalized_strokes.append([((x - min_x + offset_x) / scale, (y - min_y + offset_y) / scale)
+                                   for x, y in stroke])
     
     return normalized_strokes
 
@@ -301,8 +302,8 @@ def parse_kanjivg_svg(svg_content: str) -> List[List[Tuple[float, float]]]:
         return []
 
 
-def download_and_process_character(char: str, codepoint: int) -> Dict:
-    """Download and process a single character."""
+def download_and_process_character(char: str, codepoint: int) -> Optional[Tuple[str, Glyph]]:
+    """Download and process a single character into an array-backed glyph."""
     print(f"Processing {char} (U+{codepoint:04X})...")
     
     svg_content = download_svg(codepoint)
@@ -314,21 +315,109 @@ def download_and_process_character(char: str, codepoint: int) -> Dict:
         print(f"  ⚠️  No strokes found for {char}")
         return None
     
-    normalized_strokes = normalize_points(strokes)
-    
     key = f"U+{codepoint:04X}"
-    data = {
-        "character": char,
-        "codepoint": codepoint,
-        "strokes": normalized_strokes
-    }
+    glyph = Glyph.from_strokes(key, char, codepoint, normalize_points(strokes))
+    
+    print(f"  ✅ Processed {char} with {glyph.stroke_count} strokes")
+    return key, glyph
+
+
+def compound_key(number: int) -> str:
+    """
+    JSON key for a precomposed compound number.
+    The app addresses compounds by negative codepoint (-number), which has no
+    "U+XXXX" form, so they get their own "N+<number>" keys.
+    """
+    return f"N+{number}"
+
+
+class CompoundComposer:
+    """
+    Lays out already-normalized base glyphs side by side to build compound
+    numbers such as 十一 or 二十九, then re-normalizes the result.
+    
+    Placing a component in a slot is memoized per (character, slot), so the
+    20 compounds for 11-30 reuse the transforms of the 11 base glyphs instead
+    of re-parsing or re-downloading anything.
+    """
+    
+    def __init__(self, base_glyphs: Dict[str, List[List[Tuple[float, float]]]],
+                 scale: float = COMPOUND_SCALE, kerning: float = COMPOUND_KERNING):
+        self.base_glyphs = base_glyphs
+        self.scale = scale
+        self.kerning = kerning
+        self._placed: Dict[Tuple[str, int], List[List[Tuple[float, float]]]] = {}
     
-    print(f"  ✅ Processed {char} with {len(normalized_strokes)} strokes")
-    return key, data
+    def _place_component(self, char: str, slot: int) -> List[List[Tuple[float, float]]]:
+        """Scale a base glyph into its cell and shift it to the given slot."""
+        key = (char, slot)
+        placed = self._placed.get(key)
+        if placed is None:
+            # Shrink around the cell center, then move right by whole cells
+            inset = (1.0 - self.scale) / 2
+            shift_x = slot * (1.0 + self.kerning) + inset
+            placed = [
+                [(x * self.scale + shift_x, y * self.scale + inset) for x, y in stroke]
+                for stroke in self.base_glyphs[char]
+            ]
+            self._placed[key] = placed
+        return placed
+    
+    def compose(self, text: str) -> Optional[List[List[Tuple[float, float]]]]:
+        """Compose a multi-character numeral, or None if a component is missing."""
+        if any(char not in self.base_glyphs for char in text):
+            return None
+        
+        strokes = []
+        for slot, char in enumerate(text):
+            strokes.extend(self._place_component(char, slot))
+        return normalize_points(strokes)
+
+
+def compose_compound_numbers(composer: CompoundComposer) -> Iterator[Glyph]:
+    """Yield a precomposed glyph for every compound in CHINESE_NUMBERS."""
+    for num, (text, codepoint) in CHINESE_NUMBERS.items():
+        if codepoint is not None:
+            continue
+        
+        strokes = composer.compose(text)
+        if strokes is None:
+            print(f"  ⚠️  Skipping {text}: missing component glyph")
+            continue
+        
+        key = compound_key(num)
+        print(f"  ✅ Composed {text} with {len(strokes)} strokes")
+        yield Glyph.from_strokes(key, text, -num, strokes, {"components": [ord(char) for char in text]})
+
+
+def recompose_existing(output_path: str):
+    """Add precomposed compounds to an existing JSON without downloading."""
+    with open(output_path, 'r', encoding='utf-8') as f:
+        all_data = {key: Glyph.from_entry(key, entry) for key, entry in json.load(f).items()}
+    
+    base_glyphs = {glyph.character: glyph.xy_strokes()
+                   for key, glyph in all_data.items() if key.startswith("U+")}
+    compounds = {glyph.key: glyph for glyph in compose_compound_numbers(CompoundComposer(base_glyphs))}
+    
+    # Recomposed entries replace the old ones in place; new ones go at the end
+    with GlyphJSONWriter(output_path, params={"source": "kanjivg", "compose_only": True}) as writer:
+        for key, glyph in all_data.items():
+            write_glyph(writer, compounds.pop(key, glyph))
+        for glyph in compounds.values():
+            write_glyph(writer, glyph)
+    print(f"\n✅ Saved {writer.count} entries to {output_path}")
+
+
+def write_glyph(writer: GlyphJSONWriter, glyph: Glyph):
+    """Add realistic per-point timing and a timeline, then stream the entry out."""
+    retime_glyph(glyph)
+    writer.write(glyph.key, glyph.to_entry())
 
 
 def main():
     """Main function to download and process all Chinese numbers."""
+    import sys
+    
     print("=" * 60)
     print("Chinese Numbers Stroke Data Downloader")
     print("=" * 60)
@@ -336,33 +425,43 @@ def main():
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    all_data = {}
+    if '--compose-only' in sys.argv:
+        print("\n🧩 Composing compound numbers (11-30) from existing data...")
+        recompose_existing(os.path.join(OUTPUT_DIR, JSON_OUTPUT))
+        return
     
-    # Process basic numbers (0-10)
-    print("\n📥 Downloading basic numbers (0-10)...")
-    for num, (char, codepoint) in CHINESE_NUMBERS.items():
-        if codepoint and num <= 10:  # Only single characters for now
+    # Every glyph is written as soon as it is ready; the file is renamed into
+    # place once all of them are in
+    output_path = os.path.join(OUTPUT_DIR, JSON_OUTPUT)
+    with GlyphJSONWriter(output_path, params={"source": "kanjivg", "compose_only": False}) as writer:
+        # Process basic numbers (0-10); only their 2D strokes are kept, for composing
+        base_glyphs = {}
+        print("\n📥 Downloading basic numbers (0-10)...")
+        for num, (char, codepoint) in CHINESE_NUMBERS.items():
+            if codepoint and num <= 10:  # Only single characters for now
+                result = download_and_process_character(char, codepoint)
+                if result:
+                    _, glyph = result
+                    base_glyphs[glyph.character] = glyph.xy_strokes()
+                    write_glyph(writer, glyph)
+        
+        # Compose compound numbers (11-30) from the base glyphs just downloaded
+        print("\n🧩 Composing compound numbers (11-30)...")
+        composer = CompoundComposer(base_glyphs)
+        for glyph in compose_compound_numbers(composer):
+            write_glyph(writer, glyph)
+        
+        # Process extra characters
+        print("\n📥 Downloading extra characters (百, 千, 万, 億)...")
+        for char, codepoint in EXTRA_CHARACTERS.items():
             result = download_and_process_character(char, codepoint)
             if result:
-                key, data = result
-                all_data[key] = data
-    
-    # Process extra characters
-    print("\n📥 Downloading extra characters (百, 千, 万, 億)...")
-    for char, codepoint in EXTRA_CHARACTERS.items():
-        result = download_and_process_character(char, codepoint)
-        if result:
-            key, data = result
-            all_data[key] = data
-    
-    # Save to JSON
-    output_path = os.path.join(OUTPUT_DIR, JSON_OUTPUT)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+                write_glyph(writer, result[1])
     
-    print(f"\n✅ Saved {len(all_data)} characters to {output_path}")
+    print(f"\n✅ Saved {writer.count} characters to {output_path}")
+    print(f"🔌 HTTP: {get_default_client().metrics.summary()}")
     print("\n📝 Summary:")
-    print(f"   Total characters: {len(all_data)}")
+    print(f"   Total characters: {writer.count}")
     print(f"   Output file: {output_path}")
     print("\n💡 Next steps:")
     print("   1. Add this JSON file to your Xcode project")
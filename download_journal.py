@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Checkpointing and retry helpers shared by the stroke data downloaders.
+
+Long crawls (all kana, the 100 hanzi, eventually the full KanjiVG set) used
+to keep every result in memory until the very end, so a dropped connection
+lost the whole run. DownloadJournal appends each finished glyph to a JSONL
+file as soon as it is done; a rerun loads the journal and only fetches what
+is still missing.
+
+Failures are split in two:
+- permanent (e.g. HTTP 404): recorded in the journal as missing, not retried
+- transient (timeouts, connection resets, 429/5xx): raise
+  TransientDownloadError and are retried with exponential backoff and jitter
+  (see backoff_delay, used by stroke_http_client.PooledHTTPClient)
+"""
+
+import json
+import os
+import random
+from typing import Any, Callable, Dict, Optional
+
+# Default retry policy for transient failures
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+
+class TransientDownloadError(Exception):
+    """A download failed in a way that may succeed if tried again."""
+
+
+def backoff_delay(attempt: int, base_delay: float = RETRY_BASE_DELAY,
+                  max_delay: float = RETRY_MAX_DELAY) -> float:
+    """
+    Delay before retry number `attempt` (0-based): exponential growth with
+    "full jitter", i.e. a uniform pick below the exponential ceiling, so many
+    clients retrying at once do not hit the server in lockstep.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class DownloadJournal:
+    """
+    Append-only JSONL record of finished downloads.
+
+    Each line is {"key": ..., "data": ...} for a finished glyph or
+    {"key": ..., "missing": true} for a permanent failure. A line cut short
+    by a crash is ignored on load, so the journal is always usable.
+
+    `decode(key, data)`, if given, converts the JSON data of every record
+    (loaded or new) into the value returned by `get`, e.g. an array-backed
+    stroke_store.Glyph instead of nested lists and dicts.
+
+    With keep_data=False only the byte offset of each record is kept and
+    `get` reads the line back from disk, so memory stays proportional to the
+    number of keys rather than the size of the corpus.
+    """
+
+    def __init__(self, path: str, decode: Optional[Callable[[str, Any], Any]] = None,
+                 keep_data: bool = True):
+        self.path = path
+        self.keep_data = keep_data
+        # Decoded data (keep_data) or record offsets by key; None marks a missing glyph
+        self.entries: Dict[str, Optional[Any]] = {}
+        self._decode = decode
+
+        if os.path.exists(path):
+            position, torn = 0, None
+            with open(path, 'rb') as f:
+                for line in f:
+                    offset, position = position, position + len(line)
+                    if not line.endswith(b"\n"):
+                        # Records are written with their newline in one go, so
+                        # this is the tail of an interrupted write
+                        torn = offset
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    key = record["key"]
+                    if record.get("missing"):
+                        self.entries[key] = None
+                    elif keep_data:
+                        self.entries[key] = self._value(key, record.get("data"))
+                    else:
+                        self.entries[key] = offset
+            if torn is not None:
+                # Appending after the fragment would merge the next record into it
+                os.truncate(path, torn)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'ab')
+        self._reader = None if keep_data else open(path, 'rb')
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Journaled data for `key`, or None if missing or not journaled."""
+        value = self.entries.get(key)
+        if value is None or self.keep_data:
+            return value
+        self._reader.seek(value)
+        return self._value(key, json.loads(self._reader.readline())["data"])
+
+    def _value(self, key: str, data: Any) -> Any:
+        return self._decode(key, data) if self._decode is not None and data is not None else data
+
+    def _append(self, record: Dict) -> int:
+        """Write one record durably; returns its byte offset."""
+        offset = self._file.tell()
+        self._file.write((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return offset
+
+    def record(self, key: str, data: Any):
+        """Mark `key` as finished with its result."""
+        offset = self._append({"key": key, "data": data})
+        self.entries[key] = self._value(key, data) if self.keep_data else offset
+
+    def record_missing(self, key: str):
+        """Mark `key` as permanently unavailable so reruns skip it."""
+        self.entries[key] = None
+        self._append({"key": key, "missing": True})
+
+    def close(self):
+        self._file.close()
+        if self._reader is not None:
+            self._reader.close()
+
+    def __enter__(self) -> "DownloadJournal":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -5,6 +5,7 @@ FIXED VERSION: Normalizes entire character, not individual strokes.
 
 Usage:
     python3 download_kana_strokes_json_fixed.py
+    python3 download_kana_strokes_json_fixed.py --fresh   # ignore the download journal
 
 This script will:
 1. Download hiragana and katakana SVG files from KanjiVG
@@ -13,15 +14,21 @@ This script will:
 4. Generate JSON files with the stroke data
 """
 
-import urllib.request
 import xml.etree.ElementTree as ET
-import json
 import os
 import re
-from typing import List, Dict, Tuple
+import sys
+from typing import Dict, List, Optional, Tuple
 
-# KanjiVG GitHub raw content URL
-KANJIVG_BASE_URL = "https://raw.githubusercontent.com/KanjiVG/kanjivg/master/kanji/"
+from download_journal import DownloadJournal, TransientDownloadError
+from stroke_http_client import get_default_client
+from stroke_sources import get_source_set
+from stroke_store import Glyph
+from stroke_timeline import retime_glyph
+from stroke_writer import GlyphJSONWriter, atomic_open
+
+# KanjiVG sources (local checkout via KANJIVG_DIR, GitHub raw, jsDelivr CDN)
+# are listed in stroke_sources.kanjivg_sources()
 
 # Hiragana Unicode range: U+3040 to U+309F
 # Katakana Unicode range: U+30A0 to U+30FF
@@ -34,18 +41,23 @@ JSON_OUTPUT_HIRAGANA = "hiragana_strokes.json"
 JSON_OUTPUT_KATAKANA = "katakana_strokes.json"
 JSON_OUTPUT_COMBINED = "kanastrokes.json"
 
+# Decimals written for x, y and t
+COORD_PRECISION = 4
 
-def download_svg(codepoint: int) -> str:
-    """Download SVG file from KanjiVG for a given codepoint."""
-    hex_code = f"{codepoint:05x}"
-    url = f"{KANJIVG_BASE_URL}{hex_code}.svg"
-    
-    try:
-        with urllib.request.urlopen(url, timeout=10) as response:
-            return response.read().decode('utf-8')
-    except Exception as e:
-        print(f"  ⚠️  Failed to download U+{hex_code.upper()}: {e}")
-        return None
+# Finished glyphs are appended here so an interrupted run can resume
+JOURNAL_FILE = "download_journal.jsonl"
+
+
+def download_svg(codepoint: int) -> Optional[str]:
+    """
+    Download SVG file from KanjiVG for a given codepoint.
+    Sources are tried fastest-healthy-first with failover and hedging.
+    Returns None if no source has a file for it (HTTP 404). If no source
+    could be reached, TransientDownloadError is raised so the glyph is not
+    marked as missing.
+    """
+    result = get_source_set("kanjivg").fetch(codepoint)
+    return result.text() if result else None
 
 
 def parse_svg_path(path_d: str) -> List[Tuple[float, float]]:
@@ -207,58 +219,80 @@ def parse_kanjivg_svg(svg_content: str) -> List[List[Tuple[float, float]]]:
     return normalized_strokes
 
 
-def convert_to_json_structure(stroke_data: Dict[int, List[List[Tuple[float, float]]]]) -> Dict:
-    """Convert stroke data to JSON-serializable structure."""
-    json_data = {}
+def make_glyph(key: str, strokes: List[List[Tuple[float, float]]]) -> Glyph:
+    """
+    Array-backed glyph (one float32 buffer plus stroke offsets) from
+    normalized strokes, with arc-length / velocity-profile timing.
+    This is the journal's decode hook, so resumed and freshly downloaded
+    glyphs are held in the same compact form until they are written.
+    """
+    codepoint = int(key[2:], 16)
+    return retime_glyph(Glyph.from_strokes(key, chr(codepoint), codepoint, strokes))
+
+
+def download_range(codepoints: range, journal: DownloadJournal, writers: List[GlyphJSONWriter]) -> int:
+    """
+    Download and parse every codepoint in the range, skipping the ones
+    already in the journal and journaling each new result immediately.
+    Each glyph is written to every writer as soon as it is ready and then
+    dropped; returns the number of glyphs written.
+    """
+    written = 0
     
-    for codepoint, strokes in stroke_data.items():
+    for codepoint in codepoints:
         char = chr(codepoint)
-        hex_key = f"U+{codepoint:04X}"
+        key = f"U+{codepoint:04X}"
+        
+        if key in journal:
+            glyph = journal.get(key)
+            if glyph:
+                write_glyph(glyph, writers)
+                written += 1
+            continue
+        
+        print(f"  Downloading {char} ({key})...", end=" ")
         
-        json_strokes = []
-        for stroke in strokes:
-            json_stroke = []
-            for point_idx, (x, y) in enumerate(stroke):
-                t = point_idx * 0.05  # Simple timing
-                json_stroke.append({
-                    "x": round(x, 4),
-                    "y": round(y, 4),
-                    "t": round(t, 2)
-                })
-            json_strokes.append(json_stroke)
+        try:
+            svg_content = download_svg(codepoint)
+        except TransientDownloadError as e:
+            print(f"✗ ({e}, will retry on next run)")
+            continue
         
-        json_data[hex_key] = {
-            "character": char,
-            "codepoint": codepoint,
-            "strokes": json_strokes
-        }
+        if not svg_content:
+            journal.record_missing(key)
+            print("✗ (not in KanjiVG)")
+            continue
+        
+        strokes = parse_kanjivg_svg(svg_content)
+        if not strokes:
+            journal.record_missing(key)
+            print("✗ (no strokes)")
+            continue
+        
+        # Save individual SVG for reference
+        svg_path = os.path.join(OUTPUT_DIR, f"{codepoint:05x}.svg")
+        with atomic_open(svg_path) as f:
+            f.write(svg_content)
+        
+        journal.record(key, strokes)
+        write_glyph(make_glyph(key, strokes), writers)
+        written += 1
+        print(f"✓ ({len(strokes)} strokes)")
     
-    return json_data
+    return written
 
 
-def save_json_files(hiragana_data: Dict, katakana_data: Dict, output_dir: str):
-    """Save separate JSON files for hiragana, katakana, and combined."""
-    
-    # Save hiragana
-    hiragana_path = os.path.join(output_dir, JSON_OUTPUT_HIRAGANA)
-    with open(hiragana_path, 'w', encoding='utf-8') as f:
-        json.dump(hiragana_data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Generated {hiragana_path}")
-    
-    # Save katakana
-    katakana_path = os.path.join(output_dir, JSON_OUTPUT_KATAKANA)
-    with open(katakana_path, 'w', encoding='utf-8') as f:
-        json.dump(katakana_data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Generated {katakana_path}")
-    
-    # Save combined
-    combined_data = {**hiragana_data, **katakana_data}
-    combined_path = os.path.join(output_dir, JSON_OUTPUT_COMBINED)
-    with open(combined_path, 'w', encoding='utf-8') as f:
-        json.dump(combined_data, f, ensure_ascii=False, indent=2)
-    print(f"✅ Generated {combined_path}")
-    
-    return hiragana_path, katakana_path, combined_path
+def build_params(*ranges: range) -> Dict:
+    """Build parameters recorded in the manifest of an output file."""
+    return {"source": "kanjivg", "precision": COORD_PRECISION,
+            "codepoints": [f"{r.start:04X}-{r.stop - 1:04X}" for r in ranges]}
+
+
+def write_glyph(glyph: Glyph, writers: List[GlyphJSONWriter]):
+    """Serialize one glyph (only done when writing) into each output file."""
+    entry = glyph.to_entry(COORD_PRECISION)
+    for writer in writers:
+        writer.write(glyph.key, entry)
 
 
 def main():
@@ -270,70 +304,43 @@ def main():
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    hiragana_stroke_data = {}
-    katakana_stroke_data = {}
-    
-    # Download Hiragana
-    print("\n📥 Downloading Hiragana...")
-    for codepoint in HIRAGANA_RANGE:
-        char = chr(codepoint)
-        print(f"  Downloading {char} (U+{codepoint:04X})...", end=" ")
+    journal_path = os.path.join(OUTPUT_DIR, JOURNAL_FILE)
+    if '--fresh' in sys.argv and os.path.exists(journal_path):
+        os.remove(journal_path)
+    
+    hiragana_path = os.path.join(OUTPUT_DIR, JSON_OUTPUT_HIRAGANA)
+    katakana_path = os.path.join(OUTPUT_DIR, JSON_OUTPUT_KATAKANA)
+    combined_path = os.path.join(OUTPUT_DIR, JSON_OUTPUT_COMBINED)
+    
+    # Glyphs are streamed into all three files as they arrive; the files are
+    # renamed into place only once every download has been handled
+    with DownloadJournal(journal_path, decode=make_glyph, keep_data=False) as journal, \
+            GlyphJSONWriter(hiragana_path, params=build_params(HIRAGANA_RANGE)) as hiragana_writer, \
+            GlyphJSONWriter(katakana_path, params=build_params(KATAKANA_RANGE)) as katakana_writer, \
+            GlyphJSONWriter(combined_path, params=build_params(HIRAGANA_RANGE, KATAKANA_RANGE)) as combined_writer:
+        if len(journal):
+            print(f"\n♻️  Resuming: {len(journal)} glyphs already in {journal_path}")
         
-        svg_content = download_svg(codepoint)
-        if svg_content:
-            strokes = parse_kanjivg_svg(svg_content)
-            if strokes:
-                hiragana_stroke_data[codepoint] = strokes
-                print(f"✓ ({len(strokes)} strokes)")
-                
-                # Save individual SVG for reference
-                svg_path = os.path.join(OUTPUT_DIR, f"{codepoint:05x}.svg")
-                with open(svg_path, 'w', encoding='utf-8') as f:
-                    f.write(svg_content)
-            else:
-                print("✗ (no strokes)")
-        else:
-            print("✗")
-    
-    # Download Katakana
-    print("\n📥 Downloading Katakana...")
-    for codepoint in KATAKANA_RANGE:
-        char = chr(codepoint)
-        print(f"  Downloading {char} (U+{codepoint:04X})...", end=" ")
+        # Download Hiragana
+        print("\n📥 Downloading Hiragana...")
+        hiragana_count = download_range(HIRAGANA_RANGE, journal, [hiragana_writer, combined_writer])
         
-        svg_content = download_svg(codepoint)
-        if svg_content:
-            strokes = parse_kanjivg_svg(svg_content)
-            if strokes:
-                katakana_stroke_data[codepoint] = strokes
-                print(f"✓ ({len(strokes)} strokes)")
-                
-                # Save individual SVG for reference
-                svg_path = os.path.join(OUTPUT_DIR, f"{codepoint:05x}.svg")
-                with open(svg_path, 'w', encoding='utf-8') as f:
-                    f.write(svg_content)
-            else:
-                print("✗ (no strokes)")
-        else:
-            print("✗")
+        # Download Katakana
+        print("\n📥 Downloading Katakana...")
+        katakana_count = download_range(KATAKANA_RANGE, journal, [katakana_writer, combined_writer])
     
-    # Convert to JSON structure
-    print(f"\n📝 Converting to JSON format...")
-    hiragana_json = convert_to_json_structure(hiragana_stroke_data)
-    katakana_json = convert_to_json_structure(katakana_stroke_data)
+    for path in (hiragana_path, katakana_path, combined_path):
+        print(f"✅ Generated {path}")
     
-    # Save JSON files
-    print(f"\n💾 Saving JSON files...")
-    hiragana_path, katakana_path, combined_path = save_json_files(
-        hiragana_json, 
-        katakana_json, 
-        OUTPUT_DIR
-    )
+    pending = (len(HIRAGANA_RANGE) + len(KATAKANA_RANGE)) - len(journal.entries)
+    if pending:
+        print(f"\n⚠️  {pending} glyphs failed with network errors; rerun to retry just those")
+    print(f"🔌 HTTP: {get_default_client().metrics.summary()}")
     
     print(f"\n📊 Summary:")
-    print(f"   Hiragana characters: {len(hiragana_stroke_data)}")
-    print(f"   Katakana characters: {len(katakana_stroke_data)}")
-    print(f"   Total characters: {len(hiragana_stroke_data) + len(katakana_stroke_data)}")
+    print(f"   Hiragana characters: {hiragana_count}")
+    print(f"   Katakana characters: {katakana_count}")
+    print(f"   Total characters: {hiragana_count + katakana_count}")
     print(f"   Output directory: {OUTPUT_DIR}/")
     print(f"\n🔧 What was fixed:")
     print(f"   ✅ Normalization now at CHARACTER level (not per-stroke)")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Download KanjiVG kanji SVGs and convert them to JSON stroke data that keeps
+KanjiVG's component (radical / element) hierarchy.
+
+Usage:
+    python3 download_kanji_strokes.py                         # grade 1 kanji
+    python3 download_kanji_strokes.py --chars 森林休
+    python3 download_kanji_strokes.py --list joyo.txt --workers 8
+    python3 download_kanji_strokes.py --range 4E00-4FFF --output kanji_cjk.json
+    python3 download_kanji_strokes.py --fresh                 # ignore the download journal
+
+The kana downloader flattens every SVG with `.//path`. KanjiVG, however,
+nests the stroke paths in <g kvg:element="..."> groups, one per component:
+
+    <g kvg:element="休">
+      <g kvg:element="亻" kvg:radical="general" kvg:position="left"> 2 paths </g>
+      <g kvg:element="木" kvg:position="right"> 4 paths </g>
+    </g>
+
+Since strokes are stored in writing order and every group holds consecutive
+paths, each component is just a half-open range into the glyph's stroke
+array. Every entry gets a "tree" list in preorder:
+
+    "tree": [
+      {"element": "休", "strokes": [0, 6], "parent": -1},
+      {"element": "亻", "strokes": [0, 2], "parent": 0, "radical": "general", "position": "left"},
+      {"element": "木", "strokes": [2, 6], "parent": 0, "position": "right"}
+    ]
+
+so the app can practice 亻 alone (strokes[0..<2]) or find every glyph
+containing 木 without shipping or parsing SVG. Elements split around another
+component (e.g. 衣 in 裏) appear once per part with a "part" number.
+"""
+
+import hashlib
+import os
+import sys
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from download_chinese_numbers import normalize_points, parse_svg_path
+from download_journal import DownloadJournal, TransientDownloadError
+from stroke_http_client import get_default_client
+from stroke_sources import get_source_set
+from stroke_store import Glyph
+from stroke_timeline import retime_glyph
+from stroke_writer import GlyphJSONWriter
+
+# KanjiVG sources (local checkout via KANJIVG_DIR, GitHub raw, jsDelivr CDN)
+# are listed in stroke_sources.kanjivg_sources()
+
+SVG_NS = "http://www.w3.org/2000/svg"
+KVG_NS = "http://kanjivg.tagaini.net"
+
+# Component attributes copied into tree nodes when present
+KVG_NODE_ATTRIBUTES = ("radical", "position", "part", "original", "phon")
+
+# First-grade kyōiku kanji; the default set when no list is given
+GRADE_1_KANJI = (
+    "一右雨円王音下火花貝学気九休玉金空月犬見五口校左三山子四糸字耳七車手十出"
+    "女小上森人水正生青夕石赤千川先早草足村大男竹中虫町天田土二日入年白八百文"
+    "木本名目立力林六"
+)
+
+# Output
+OUTPUT_DIR = "strokedata"
+JSON_OUTPUT = "kanjistrokes.json"
+
+# Finished glyphs are appended here so an interrupted run can resume
+JOURNAL_FILE = "kanji_download_journal.jsonl"
+
+# Characters queued per worker; bounds how many finished glyphs wait to be written in order
+IN_FLIGHT_PER_WORKER = 4
+
+
+def download_svg(codepoint: int) -> Optional[str]:
+    """
+    Download the KanjiVG SVG for a codepoint from the best available source.
+    Returns None if no source has it (HTTP 404); raises
+    TransientDownloadError if no source could be reached.
+    """
+    result = get_source_set("kanjivg").fetch(codepoint)
+    return result.text() if result else None
+
+
+def _kvg(name: str) -> str:
+    return f"{{{KVG_NS}}}{name}"
+
+
+def parse_kanjivg_tree(svg_content: str) -> Tuple[List[List[Tuple[float, float]]], List[str], List[Dict]]:
+    """
+    Parse a KanjiVG SVG into raw stroke points, per-stroke KanjiVG stroke
+    types (e.g. "㇐") and the component tree as preorder nodes with
+    half-open [start, end) stroke ranges.
+    """
+    root = ET.fromstring(svg_content)
+    strokes: List[List[Tuple[float, float]]] = []
+    stroke_types: List[str] = []
+    tree: List[Dict] = []
+
+    def walk(group: ET.Element, parent: int):
+        element = group.get(_kvg("element"))
+        node_index = parent
+        if element is not None:
+            node = {"element": element, "strokes": [len(strokes), len(strokes)], "parent": parent}
+            for attribute in KVG_NODE_ATTRIBUTES:
+                value = group.get(_kvg(attribute))
+                if value is not None:
+                    node[attribute] = int(value) if attribute == "part" and value.isdigit() else value
+            node_index = len(tree)
+            tree.append(node)
+
+        for child in group:
+            if child.tag == f"{{{SVG_NS}}}path":
+                points = parse_svg_path(child.get("d", ""))
+                if points:
+                    strokes.append(points)
+                    stroke_types.append(child.get(_kvg("type"), ""))
+            elif child.tag == f"{{{SVG_NS}}}g":
+                walk(child, node_index)
+
+        if element is not None:
+            tree[node_index]["strokes"][1] = len(strokes)
+
+    # Stroke numbers live in a sibling group of text labels; only the paths matter
+    for group in root.iter(f"{{{SVG_NS}}}g"):
+        if (group.get("id") or "").startswith("kvg:StrokePaths"):
+            walk(group, -1)
+            break
+
+    # Groups whose paths were all unparseable would be empty ranges; drop them
+    # and renumber the parent indices of the nodes that remain
+    kept: Dict[int, int] = {}
+    pruned: List[Dict] = []
+    for index, node in enumerate(tree):
+        if node["strokes"][1] > node["strokes"][0] or node["parent"] == -1:
+            kept[index] = len(pruned)
+            pruned.append(node)
+    for node in pruned:
+        parent = node["parent"]
+        while parent != -1 and parent not in kept:
+            parent = tree[parent]["parent"]
+        node["parent"] = kept.get(parent, -1)
+    return strokes, stroke_types, pruned
+
+
+def process_character(char: str) -> Optional[Glyph]:
+    """Download and convert one kanji to an array-backed glyph. None if KanjiVG does not have it."""
+    codepoint = ord(char)
+    svg_content = download_svg(codepoint)
+    if not svg_content:
+        return None
+
+    try:
+        strokes, stroke_types, tree = parse_kanjivg_tree(svg_content)
+    except ET.ParseError as e:
+        print(f"  ⚠️  XML parsing error for {char}: {e}")
+        return None
+    if not strokes:
+        return None
+
+    glyph = Glyph.from_strokes(f"U+{codepoint:04X}", char, codepoint, normalize_points(strokes),
+                               {"stroke_types": stroke_types, "tree": tree})
+    return retime_glyph(glyph)
+
+
+def load_kanji_list(path: str) -> List[str]:
+    """Kanji from a file: runs of characters per line, '#' starts a comment."""
+    characters = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            characters.extend(char for char in line if ord(char) > 0x7F and not char.isspace())
+    return characters
+
+
+def parse_range(spec: str) -> List[str]:
+    """Characters of an inclusive hex range such as "4E00-4FFF"."""
+    start, _, end = spec.partition('-')
+    return [chr(codepoint) for codepoint in range(int(start, 16), int(end or start, 16) + 1)]
+
+
+def download_kanji(characters: List[str], journal: DownloadJournal, writer: GlyphJSONWriter,
+                   workers: int = 4) -> Tuple[int, int]:
+    """
+    Fetch every character not yet in the journal with a pool of workers and
+    stream every glyph, journaled or new, to `writer` in input order. At most
+    workers * IN_FLIGHT_PER_WORKER characters are queued at once, so only
+    that many glyphs are ever held; new results are journaled from this
+    thread. Returns the number of kanji written and of component nodes.
+    """
+    pending = sum(1 for char in characters if f"U+{ord(char):04X}" not in journal)
+    print(f"  {len(characters) - pending} already journaled, {pending} to fetch")
+
+    counts = {"written": 0, "components": 0, "fetched": 0, "failed": 0}
+
+    def finish(char: str, future: Optional[Future]):
+        key = f"U+{ord(char):04X}"
+        if future is None:
+            glyph = journal.get(key)
+            entry = glyph.to_entry() if glyph else None
+        else:
+            counts["fetched"] += 1
+            if counts["fetched"] % 100 == 0:
+                print(f"  {counts['fetched']}/{pending} processed...")
+            try:
+                glyph = future.result()
+            except TransientDownloadError as e:
+                counts["failed"] += 1
+                print(f"  ✗ {char} ({key}): {e}, will retry on next run")
+                return
+            if glyph is None:
+                journal.record_missing(key)
+                print(f"  ✗ {char} ({key}): not in KanjiVG")
+                return
+            entry = glyph.to_entry()
+            journal.record(key, entry)
+        if entry:
+            writer.write(key, entry)
+            counts["written"] += 1
+            counts["components"] += len(glyph.tree) - 1
+
+    window = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for char in characters:
+            if len(window) >= workers * IN_FLIGHT_PER_WORKER:
+                finish(*window.popleft())
+            journaled = f"U+{ord(char):04X}" in journal
+            window.append((char, None if journaled else pool.submit(process_character, char)))
+        while window:
+            finish(*window.popleft())
+
+    if counts["failed"]:
+        print(f"\n⚠️  {counts['failed']} kanji failed with network errors; rerun to retry just those")
+
+    return counts["written"], counts["components"]
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(name) + 1] if name in args else default
+
+    print("🈷️  KanjiVG Kanji Stroke Downloader (with component tree)")
+    print("=" * 50)
+
+    if option('--list'):
+        characters = load_kanji_list(option('--list'))
+    elif option('--range'):
+        characters = parse_range(option('--range'))
+    else:
+        characters = list(option('--chars', GRADE_1_KANJI))
+    characters = list(dict.fromkeys(characters))
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, option('--output', JSON_OUTPUT))
+    journal_path = os.path.join(OUTPUT_DIR, JOURNAL_FILE)
+    if '--fresh' in args and os.path.exists(journal_path):
+        os.remove(journal_path)
+
+    # The character list is recorded by hash; it can be thousands of characters long
+    params = {"source": "kanjivg", "characters": len(characters),
+              "characters_sha256": hashlib.sha256(''.join(characters).encode('utf-8')).hexdigest()}
+
+    print(f"\n📥 Downloading {len(characters)} kanji...")
+    # Only byte offsets of journaled entries are held; glyphs go straight to the output
+    with DownloadJournal(journal_path, decode=Glyph.from_entry, keep_data=False) as journal, \
+            GlyphJSONWriter(output_path, params=params) as writer:
+        written, components = download_kanji(characters, journal, writer, workers=int(option('--workers', '4')))
+
+    print(f"\n✅ Saved {written} kanji to {output_path}")
+    print(f"🔌 HTTP: {get_default_client().metrics.summary()}")
+    print("\n📝 Summary:")
+    print(f"   Kanji: {written} of {len(characters)}")
+    print(f"   Component nodes: {components}")
+    print(f"   Output file: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
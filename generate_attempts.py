@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Generate labelled synthetic handwriting attempts from the reference strokes.
+
+Usage:
+    python3 generate_attempts.py --per-glyph 100 --output attempts.jsonl
+    python3 generate_attempts.py strokedata/kanastrokes.json --per-glyph 10000 --output attempts.jsonl.gz
+    python3 generate_attempts.py --per-glyph 50 --jitter 0.02 --reverse 0.1 --swap 0.1 --seed 7
+    python3 generate_attempts.py --per-glyph 5000 --jobs 8 --output attempts.jsonl.gz
+
+For benchmarking scorers (replay_attempts.py) and recognition we need large
+volumes of realistic attempts for every glyph, including the ones nobody has
+practiced yet. Each attempt starts from a reference glyph and gets:
+
+- jitter       gaussian noise per point (normalized units)
+- affine warp  random rotation, scale, shear and offset about the center
+- speed        a global speed factor and per-stroke variation of the timing
+- reversal     strokes drawn end to start
+- drop/extra   missing strokes, and short spurious strokes
+- order swaps  adjacent strokes drawn in the wrong order
+
+A glyph's strokes are kept as one flat (points, 2) array plus stroke offsets,
+so noise, warps and timing are applied to a whole block of attempts with a
+few array operations. Output is JSONL in the replay_attempts.py format,
+written glyph by glyph, with the applied perturbations as the label:
+
+    {"id": 0, "key": "U+3042", "strokes": [[[x, y, t], ...]],
+     "label": {"reversed": [2], "dropped": [], "swapped": [], "extra": 0, "speed": 1.08}}
+
+Blocks of attempts are rendered in worker processes and written in order.
+Every block draws from its own generator seeded by (seed, glyph position,
+block), so a run is reproducible regardless of the number of workers.
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from stroke_inputs import DEFAULT_FILES, existing, merged_entries
+from stroke_writer import atomic_open, input_hashes, write_manifest
+
+DEFAULT_OUTPUT = "attempts.jsonl"
+
+# Default noise parameters; every one can be overridden on the command line
+DEFAULT_PARAMS = {
+    "jitter": 0.01,       # std of per-point noise
+    "rotate": 0.05,       # std of rotation (radians)
+    "scale": 0.08,        # std of log scale
+    "shear": 0.05,        # std of shear
+    "offset": 0.03,       # std of translation
+    "speed": 0.25,        # std of log global speed factor
+    "stroke_speed": 0.1,  # std of log per-stroke speed factor
+    "reverse": 0.03,      # probability a stroke is drawn backwards
+    "drop": 0.02,         # probability a stroke is missing
+    "extra": 0.02,        # probability of one spurious stroke
+    "swap": 0.03,         # probability of swapping a stroke with the next one
+}
+
+# Attempts generated per vectorized block
+BLOCK_SIZE = 1000
+# Blocks queued per worker process
+IN_FLIGHT_PER_WORKER = 4
+# Decimals written for x, y and t
+PRECISION = 4
+
+
+class ReferenceGlyph:
+    """One glyph as flat point arrays with stroke offsets."""
+
+    def __init__(self, key: str, entry: Dict):
+        strokes = [stroke for stroke in entry.get("strokes") or [] if stroke]
+        self.key = key
+        self.points = np.array([(p["x"], p["y"]) for stroke in strokes for p in stroke], dtype=np.float64)
+        self.times = np.array([p.get("t", 0.0) for stroke in strokes for p in stroke], dtype=np.float64)
+        self.offsets = np.concatenate([[0], np.cumsum([len(stroke) for stroke in strokes])]).astype(np.int64)
+        # Stroke index of every point, for per-stroke parameters
+        self.stroke_of_point = np.repeat(np.arange(len(strokes)), np.diff(self.offsets))
+
+    @property
+    def stroke_count(self) -> int:
+        return len(self.offsets) - 1
+
+
+def load_references(paths: List[str]) -> List[ReferenceGlyph]:
+    """Glyphs with strokes, later files replacing earlier ones as in the app (see stroke_inputs)."""
+    return [ReferenceGlyph(key, entry) for key, entry in merged_entries(paths).items() if entry.get("strokes")]
+
+
+def warp_block(glyph: ReferenceGlyph, count: int, params: Dict, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Geometric and timing noise for `count` attempts at once.
+    Returns points (count, P, 2), times (count, P) and global speed factors.
+    """
+    angle = rng.normal(0.0, params["rotate"], count)
+    scale = np.exp(rng.normal(0.0, params["scale"], (count, 2)))
+    shear = rng.normal(0.0, params["shear"], count)
+    offset = rng.normal(0.0, params["offset"], (count, 2))
+
+    cos, sin = np.cos(angle), np.sin(angle)
+    # rotation @ shear @ scale, one 2x2 matrix per attempt
+    matrix = np.empty((count, 2, 2))
+    matrix[:, 0, 0] = cos * scale[:, 0]
+    matrix[:, 0, 1] = (cos * shear - sin) * scale[:, 1]
+    matrix[:, 1, 0] = sin * scale[:, 0]
+    matrix[:, 1, 1] = (sin * shear + cos) * scale[:, 1]
+
+    centered = glyph.points - 0.5
+    points = np.einsum("bij,pj->bpi", matrix, centered) + 0.5 + offset[:, None, :]
+    points += rng.normal(0.0, params["jitter"], points.shape)
+    np.clip(points, 0.0, 1.0, out=points)
+
+    speed = np.exp(rng.normal(0.0, params["speed"], count))
+    stroke_speed = np.exp(rng.normal(0.0, params["stroke_speed"], (count, glyph.stroke_count)))
+    times = glyph.times[None, :] / (speed[:, None] * stroke_speed[:, glyph.stroke_of_point])
+    return points, times, speed
+
+
+def generate_block(glyph: ReferenceGlyph, count: int, params: Dict,
+                   rng: np.random.Generator) -> Iterator[Tuple[List, Dict]]:
+    """Yield (strokes, label) for `count` attempts of one glyph."""
+    points, times, speed = warp_block(glyph, count, params, rng)
+    points = np.round(points, PRECISION)
+    times = np.round(times, PRECISION)
+    strokes_n = glyph.stroke_count
+
+    reversed_mask = rng.random((count, strokes_n)) < params["reverse"]
+    dropped_mask = rng.random((count, strokes_n)) < params["drop"]
+    swapped_mask = rng.random((count, max(strokes_n - 1, 0))) < params["swap"]
+    extra_mask = rng.random(count) < params["extra"]
+    extra_points = np.round(rng.random((count, 2, 2)), PRECISION)
+
+    # One conversion per block; per-attempt work below is list slicing only
+    xyt_block = np.concatenate([points, times[..., None]], axis=2).tolist()
+    bounds = list(zip(glyph.offsets[:-1].tolist(), glyph.offsets[1:].tolist()))
+    for b in range(count):
+        xyt = xyt_block[b]
+        strokes = [xyt[start:end] for start, end in bounds]
+        for s in np.nonzero(reversed_mask[b])[0]:
+            # Same path backwards; timing restarts at 0
+            stroke = strokes[s][::-1]
+            t_end = stroke[0][2]
+            strokes[s] = [[x, y, round(t_end - t, PRECISION)] for x, y, t in stroke]
+
+        order = list(range(strokes_n))
+        swapped = []
+        for s in np.nonzero(swapped_mask[b])[0]:
+            if s not in swapped and s - 1 not in swapped:
+                order[s], order[s + 1] = order[s + 1], order[s]
+                swapped.append(int(s))
+        kept = [index for index in order if not dropped_mask[b, index]]
+        attempt = [strokes[index] for index in kept]
+
+        extra = 0
+        if extra_mask[b]:
+            (x0, y0), (x1, y1) = extra_points[b]
+            attempt.insert(int(rng.integers(0, len(attempt) + 1)), [[x0, y0, 0.0], [x1, y1, 0.2]])
+            extra = 1
+
+        label = {
+            "reversed": np.nonzero(reversed_mask[b])[0].tolist(),
+            "dropped": np.nonzero(dropped_mask[b])[0].tolist(),
+            "swapped": swapped,
+            "extra": extra,
+            "speed": round(float(speed[b]), 3),
+        }
+        yield attempt, label
+
+
+_worker_glyphs: List[ReferenceGlyph] = []
+
+
+def _init_worker(glyphs: List[ReferenceGlyph]):
+    global _worker_glyphs
+    _worker_glyphs = glyphs
+
+
+def render_block(position: int, block: int, per_glyph: int, params: Dict, seed: int) -> str:
+    """
+    JSONL text for one block of one glyph. The generator is seeded by
+    (seed, glyph position, block) and ids are derived from the position, so
+    the output does not depend on how blocks are spread over workers.
+    """
+    glyph = _worker_glyphs[position]
+    rng = np.random.default_rng([seed, position, block])
+    first = block * BLOCK_SIZE
+    count = min(BLOCK_SIZE, per_glyph - first)
+    lines = []
+    for index, (strokes, label) in enumerate(generate_block(glyph, count, params, rng)):
+        lines.append(json.dumps({"id": position * per_glyph + first + index, "key": glyph.key,
+                                 "strokes": strokes, "label": label}, separators=(',', ':')))
+    return "\n".join(lines) + "\n"
+
+
+def generate(glyphs: List[ReferenceGlyph], per_glyph: int, output: str, params: Dict,
+             seed: int = 0, jobs: int = 1) -> int:
+    """Stream `per_glyph` attempts for every glyph to `output`; returns the count."""
+    compress = output.endswith(".gz")
+    blocks_per_glyph = -(-per_glyph // BLOCK_SIZE)
+    work = ((position, block) for position in range(len(glyphs)) for block in range(blocks_per_glyph))
+
+    # Published by rename only once every block is written
+    with atomic_open(output, 'wb' if compress else 'w') as raw, \
+            (gzip.open(raw, 'wt', encoding='utf-8') if compress else nullcontext(raw)) as f:
+        if jobs == 1:
+            _init_worker(glyphs)
+            for position, block in work:
+                f.write(render_block(position, block, per_glyph, params, seed))
+        else:
+            # Blocks are written in submission order; a bounded window keeps memory flat
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(glyphs,)) as pool:
+                pending = deque()
+                for position, block in work:
+                    pending.append(pool.submit(render_block, position, block, per_glyph, params, seed))
+                    if len(pending) >= jobs * IN_FLIGHT_PER_WORKER:
+                        f.write(pending.popleft().result())
+                while pending:
+                    f.write(pending.popleft().result())
+    return len(glyphs) * per_glyph
+
+
+def main():
+    args = sys.argv[1:]
+
+    def take(name: str, default=None):
+        if name in args:
+            idx = args.index(name)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            return value
+        return default
+
+    per_glyph = int(take('--per-glyph', '100'))
+    output = take('--output', DEFAULT_OUTPUT)
+    seed = int(take('--seed', '0'))
+    jobs = int(take('--jobs', '0')) or os.cpu_count() or 1
+    params = dict(DEFAULT_PARAMS)
+    for name in DEFAULT_PARAMS:
+        value = take(f"--{name.replace('_', '-')}")
+        if value is not None:
+            params[name] = float(value)
+    paths = args or existing(DEFAULT_FILES)
+
+    print("✍️  Synthetic Attempt Generator")
+    print("=" * 50)
+
+    glyphs = load_references(paths)
+    start = time.perf_counter()
+    written = generate(glyphs, per_glyph, output, params, seed, jobs)
+    elapsed = time.perf_counter() - start
+    write_manifest(output, len(glyphs), {"inputs": input_hashes(paths), "per_glyph": per_glyph,
+                                         "seed": seed, "params": params})
+
+    print(f"✅ {written:,} attempts for {len(glyphs)} glyphs in {elapsed:.1f}s "
+          f"({written / elapsed:,.0f} attempts/s on {jobs} workers)")
+    print(f"📄 Written to {output} (seed {seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Render every glyph of the pipeline outputs into paginated HTML/SVG contact
+sheets for visual QA.
+
+Usage:
+    python3 render_contact_sheets.py                          # strokedata/*.json -> contact_sheets/
+    python3 render_contact_sheets.py strokedata/kanjistrokes.json chinese_corpus --per-page 300
+    python3 render_contact_sheets.py --flagged-only           # only glyphs named in the reports
+    python3 render_contact_sheets.py --validation validation_report.json --anomalies anomaly_report.json
+
+create_summary_report and the validators print text, so a glyph that is
+upside down, mirrored or drawn in the wrong order is only noticed when
+someone opens it in the app. This report draws each glyph as a small inline
+SVG: strokes colored by writing order, a marker on every stroke's start
+point and the stroke number next to it, over the faint 0-1 glyph box. Cells
+flagged by validate_stroke_data.py (errors red, warnings amber) or
+detect_stroke_anomalies.py (suspects purple) are outlined and list their
+findings on hover; contact_sheets/index.html links every page and every
+flagged glyph.
+
+Glyphs are read through stroke_store sources (JSON files, shard
+directories, SQLite databases), so only the glyphs of a page are parsed, by
+the worker rendering it. Pages are independent jobs on a process pool.
+Each page's inputs (source SHA-256, keys, flags and options) are hashed
+into contact_sheets/pages.json, and a rerun only renders pages whose hash
+changed, e.g. the few pages whose flags moved after a validator run.
+"""
+
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from build_thumbnails import SHARD_INDEX, set_name
+from stroke_inputs import CORPUS_FILES, existing
+from stroke_store import Glyph, open_source
+from stroke_writer import artifact_sha256, atomic_open
+
+DEFAULT_OUTPUT = "contact_sheets"
+DEFAULT_VALIDATION_REPORT = "validation_report.json"
+DEFAULT_ANOMALY_REPORT = "anomaly_report.json"
+DEFAULT_PER_PAGE = 200
+INDEX_PAGE = "index.html"
+PAGE_STATE = "pages.json"
+
+# Cell drawing, in SVG units of a 100 × 100 glyph box
+SVG_SCALE = 100
+SVG_MARGIN = 6
+# Golden-angle hue steps keep neighbouring strokes apart in color
+HUE_STEP = 137.508
+
+# Bump when the page markup changes, so every page is rendered again
+PAGE_VERSION = 1
+
+STYLE = """
+body { font-family: -apple-system, "Hiragino Sans", "Noto Sans CJK JP", sans-serif; margin: 16px; color: #222; }
+nav a { margin-right: 12px; }
+.grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(132px, 1fr)); gap: 8px; }
+figure { margin: 0; padding: 4px; border: 2px solid #eee; border-radius: 6px; text-align: center; }
+figure.error { border-color: #d7263d; background: #fff0f0; }
+figure.warning { border-color: #f0a202; background: #fff8e6; }
+figure.suspect { border-color: #7b2cbf; background: #f6efff; }
+figcaption { font-size: 11px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+figcaption .flag { display: block; color: #a00; }
+svg { width: 120px; height: 120px; }
+.box { fill: none; stroke: #ccc; stroke-width: 0.5; stroke-dasharray: 2 2; }
+polyline { fill: none; stroke-width: 3; stroke-linecap: round; stroke-linejoin: round; }
+circle { stroke: #fff; stroke-width: 0.8; }
+text { font-size: 9px; font-weight: bold; paint-order: stroke; stroke: #fff; stroke-width: 2px; }
+table { border-collapse: collapse; } td, th { padding: 2px 8px; text-align: left; border-bottom: 1px solid #eee; }
+"""
+
+# Sources opened by this (worker) process, by path
+_sources: Dict[str, object] = {}
+
+
+def owning_sets(paths: List[str]) -> Dict[str, str]:
+    """
+    Set name of the input each reportable file belongs to, by that file's
+    set name: a shard directory's shards (the files the validators read and
+    report) belong to the directory's set, any other input to its own.
+    """
+    owners = {}
+    for path in paths:
+        if os.path.isdir(path):
+            with open(os.path.join(path, SHARD_INDEX), "r", encoding="utf-8") as f:
+                for shard in json.load(f)["shards"]:
+                    owners[set_name(shard["file"])] = set_name(path)
+        owners[set_name(path)] = set_name(path)
+    return owners
+
+
+def load_flags(validation_path: Optional[str], anomaly_path: Optional[str],
+               paths: List[str]) -> Dict[Tuple[str, str], List[Dict]]:
+    """
+    Findings by (set name, key) from the validation and anomaly reports;
+    a missing report is skipped. A reported file is matched to the input
+    of `paths` that owns it (owning_sets), by set name rather than path so
+    reports written from another directory stay usable.
+    """
+    owners = owning_sets(paths)
+
+    def owner(file: str) -> str:
+        return owners.get(set_name(file), set_name(file))
+
+    flags: Dict[Tuple[str, str], List[Dict]] = {}
+    if validation_path and os.path.exists(validation_path):
+        with open(validation_path, "r", encoding="utf-8") as f:
+            for issue in json.load(f).get("issues", []):
+                if issue.get("key"):
+                    flags.setdefault((owner(issue["file"]), issue["key"]), []).append(
+                        {"level": issue["severity"], "label": f"{issue['check']}: {issue['message']}"})
+    if anomaly_path and os.path.exists(anomaly_path):
+        with open(anomaly_path, "r", encoding="utf-8") as f:
+            for suspect in json.load(f):
+                labels = ", ".join(suspect.get("labels") or []) or "suspect"
+                flags.setdefault((owner(suspect["file"]), suspect["key"]), []).append(
+                    {"level": "suspect", "label": f"anomaly {suspect['score']}: {labels}"})
+    return flags
+
+
+def cell_class(findings: List[Dict]) -> str:
+    """Most severe finding level of a glyph: error, then warning, then suspect."""
+    levels = {finding["level"] for finding in findings}
+    for level in ("error", "warning", "suspect"):
+        if level in levels:
+            return level
+    return ""
+
+
+def glyph_svg(glyph: Glyph) -> str:
+    """Inline SVG of one glyph: colored strokes, start markers and stroke numbers."""
+    low, high = -SVG_MARGIN, SVG_SCALE + 2 * SVG_MARGIN
+    parts = [f'<svg viewBox="{low} {low} {high} {high}"><rect class="box" width="{SVG_SCALE}" height="{SVG_SCALE}"/>']
+    labels = []
+    for index in range(glyph.stroke_count):
+        points = [(x * SVG_SCALE, y * SVG_SCALE) for x, y in glyph.xy(index)]
+        if not points:
+            continue
+        color = f"hsl({index * HUE_STEP % 360:.0f},75%,40%)"
+        coords = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+        parts.append(f'<polyline points="{coords}" stroke="{color}"/>')
+        x, y = points[0]
+        labels.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3" fill="{color}"/>'
+                      f'<text x="{x + 3:.1f}" y="{y - 3:.1f}" fill="{color}">{index + 1}</text>')
+    # Markers and numbers go on top of every stroke so later strokes do not hide them
+    parts.extend(labels)
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def render_page(path: str, keys: List[str], flags: Dict[str, List[Dict]], filename: str,
+                title: str, links: Dict[str, Optional[str]], output: str) -> Dict:
+    """Write one contact sheet page of `keys` from the source at `path`; returns its summary."""
+    source = _sources.get(path)
+    if source is None:
+        source = _sources[path] = open_source(path)
+
+    cells = []
+    for key in keys:
+        glyph = source.load(key)
+        findings = flags.get(key, [])
+        notes = "".join(f'<span class="flag">{html.escape(finding["label"])}</span>' for finding in findings[:2])
+        tooltip = html.escape("\n".join(finding["label"] for finding in findings), quote=True)
+        if glyph is None:
+            drawing, caption = "<p>missing</p>", html.escape(key)
+        else:
+            drawing = glyph_svg(glyph)
+            caption = f"{html.escape(key)} {html.escape(glyph.character)} · {glyph.stroke_count}"
+        cells.append(f'<figure id="{html.escape(key, quote=True)}" class="{cell_class(findings)}" title="{tooltip}">'
+                     f'{drawing}<figcaption>{caption}{notes}</figcaption></figure>')
+
+    nav = " ".join(f'<a href="{target}">{label}</a>' for label, target in links.items() if target)
+    with atomic_open(os.path.join(output, filename)) as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+                f'<style>{STYLE}</style></head><body><nav>{nav}</nav><h1>{html.escape(title)}</h1>'
+                f'<div class="grid">\n' + "\n".join(cells) + "\n</div></body></html>\n")
+    return {"file": filename, "glyphs": len(keys), "flagged": sum(1 for key in keys if key in flags)}
+
+
+def page_hash(source_hash: str, keys: List[str], flags: Dict[str, List[Dict]], title: str,
+              links: Dict[str, Optional[str]]) -> str:
+    """Everything a page is rendered from; an unchanged hash means an unchanged page."""
+    payload = json.dumps([PAGE_VERSION, source_hash, keys, flags, title, links], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_index(output: str, sets: Dict[str, Dict], flags: Dict[Tuple[str, str], List[Dict]]):
+    """index.html: pages per set and a table of every flagged glyph."""
+    rows = []
+    flagged = []
+    for name, entry in sets.items():
+        pages = " ".join(f'<a href="{page["file"]}">{number + 1}</a>' for number, page in enumerate(entry["pages"]))
+        count = sum(page["flagged"] for page in entry["pages"])
+        rows.append(f"<tr><td>{html.escape(name)}</td><td>{entry['glyphs']}</td><td>{count}</td><td>{pages}</td></tr>")
+        for key, page in entry["located"].items():
+            findings = flags.get((name, key), [])
+            if findings:
+                labels = "; ".join(html.escape(finding["label"]) for finding in findings)
+                flagged.append(f'<tr class="{cell_class(findings)}"><td>{html.escape(name)}</td>'
+                               f'<td><a href="{page}#{html.escape(key, quote=True)}">{html.escape(key)}</a></td>'
+                               f'<td>{labels}</td></tr>')
+
+    with atomic_open(os.path.join(output, INDEX_PAGE)) as f:
+        f.write(f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Stroke data contact sheets</title>'
+                f'<style>{STYLE}</style></head><body><h1>Stroke data contact sheets</h1>'
+                f'<table><tr><th>Set</th><th>Glyphs</th><th>Flagged</th><th>Pages</th></tr>{"".join(rows)}</table>'
+                f'<h2>Flagged glyphs ({len(flagged)})</h2>'
+                f'<table><tr><th>Set</th><th>Glyph</th><th>Findings</th></tr>{"".join(flagged)}</table>'
+                f'</body></html>\n')
+
+
+def render_contact_sheets(paths: List[str], output: str, flags: Dict[Tuple[str, str], List[Dict]],
+                          per_page: int = DEFAULT_PER_PAGE, flagged_only: bool = False,
+                          jobs: int = 1) -> Dict:
+    """Render (or keep) every page; returns counts of pages rendered, kept and removed."""
+    os.makedirs(output, exist_ok=True)
+    state_path = os.path.join(output, PAGE_STATE)
+    previous: Dict[str, str] = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    # Plan every page first; hashing needs the neighbours' file names for the links
+    planned = []
+    sets: Dict[str, Dict] = {}
+    for path in paths:
+        name = set_name(path)
+        if name in sets:
+            continue  # Same name as an earlier input; the first one wins, as in stroke_data_server
+        source_hash = artifact_sha256(os.path.join(path, SHARD_INDEX) if os.path.isdir(path) else path)
+        keys = [key for key in open_source(path).keys() if not flagged_only or (name, key) in flags]
+        chunks = [keys[first:first + per_page] for first in range(0, len(keys), per_page)]
+        files = [f"{name}_{number:03d}.html" for number in range(len(chunks))]
+        sets[name] = {"glyphs": len(keys), "pages": [], "located": {}}
+        for number, chunk in enumerate(chunks):
+            links = {"index": INDEX_PAGE,
+                     "← previous": files[number - 1] if number else None,
+                     "next →": files[number + 1] if number + 1 < len(files) else None}
+            title = f"{name} · page {number + 1} of {len(chunks)}"
+            page_flags = {key: flags[(name, key)] for key in chunk if (name, key) in flags}
+            digest = page_hash(source_hash, chunk, page_flags, title, links)
+            planned.append((name, path, chunk, page_flags, files[number], title, links, digest))
+            sets[name]["located"].update((key, files[number]) for key in chunk)
+
+    stale = [job for job in planned
+             if previous.get(job[4]) != job[7] or not os.path.exists(os.path.join(output, job[4]))]
+    arguments = [(path, chunk, page_flags, filename, title, links, output)
+                 for _, path, chunk, page_flags, filename, title, links, _ in stale]
+    if jobs > 1 and len(arguments) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            rendered = list(pool.map(render_page, *zip(*arguments)))
+    else:
+        rendered = [render_page(*job) for job in arguments]
+
+    summaries = {summary["file"]: summary for summary in rendered}
+    for name, _, chunk, page_flags, filename, _, _, _ in planned:
+        sets[name]["pages"].append(summaries.get(filename) or
+                                   {"file": filename, "glyphs": len(chunk), "flagged": len(page_flags)})
+
+    # Pages of an earlier, longer run would otherwise linger with stale content
+    current = {job[4]: job[7] for job in planned}
+    removed = [filename for filename in previous if filename not in current]
+    for filename in removed:
+        if os.path.exists(os.path.join(output, filename)):
+            os.remove(os.path.join(output, filename))
+
+    write_index(output, sets, flags)
+    with atomic_open(state_path) as f:
+        json.dump(current, f, indent=2)
+    return {"pages": len(planned), "rendered": len(stale), "kept": len(planned) - len(stale),
+            "removed": len(removed), "glyphs": sum(entry["glyphs"] for entry in sets.values()),
+            "flagged": sum(page["flagged"] for entry in sets.values() for page in entry["pages"])}
+
+
+def main():
+    args = sys.argv[1:]
+
+    def take(name: str, default=None):
+        if name in args:
+            idx = args.index(name)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            return value
+        return default
+
+    output = take("--output", DEFAULT_OUTPUT)
+    per_page = int(take("--per-page", str(DEFAULT_PER_PAGE)))
+    validation_path = take("--validation", DEFAULT_VALIDATION_REPORT)
+    anomaly_path = take("--anomalies", DEFAULT_ANOMALY_REPORT)
+    jobs = int(take("--jobs", "0")) or os.cpu_count() or 1
+    flagged_only = "--flagged-only" in args
+    if flagged_only:
+        args.remove("--flagged-only")
+    paths = args or existing(CORPUS_FILES)
+
+    print("🗂️  Stroke Data Contact Sheets")
+    print("=" * 50)
+
+    flags = load_flags(validation_path, anomaly_path, paths)
+    print(f"🚩 {len(flags)} flagged glyphs in the reports")
+
+    start = time.perf_counter()
+    counts = render_contact_sheets(paths, output, flags, per_page, flagged_only, jobs)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ {counts['glyphs']} glyphs ({counts['flagged']} flagged) on {counts['pages']} pages in {elapsed:.2f}s")
+    print(f"   rendered {counts['rendered']}, unchanged {counts['kept']}, removed {counts['removed']} "
+          f"({jobs} workers)")
+    print(f"📄 {os.path.join(output, INDEX_PAGE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Replay logged practice attempts through stroke scorers, at scale.
+
+Usage:
+    python3 replay_attempts.py attempts.jsonl
+    python3 replay_attempts.py attempts.jsonl --scorers stroke_count,shape,iou --jobs 4
+    python3 replay_attempts.py attempts.jsonl --scorers shape,my_scorers:curvature --report replay.json
+    python3 replay_attempts.py attempts.jsonl.gz --refs strokedata/kanastrokes.json --batch 2000
+
+Each line of the attempt log is one attempt:
+
+    {"id": 17, "key": "U+3042", "strokes": [[[x, y, t], ...], ...]}
+
+("codepoint" may be given instead of "key", and points may also be
+{"x", "y", "t"} objects as in the stroke JSON). Attempts are joined against
+the reference glyphs of kanastrokes.json, chinesenumbers.json and
+chinese_stroke_data.json (a later file wins for a key, as in the app; see
+stroke_inputs) and scored by every selected scorer. Lines that are not a
+JSON object with usable strokes are counted as invalid and skipped.
+
+The log is read line by line and handed to worker processes in batches,
+with a bounded number of batches in flight, so memory stays flat for
+millions of attempts. Workers aggregate per batch (counts, sums, histograms)
+and only those small summaries travel back. The report has attempts/sec,
+per-attempt latency percentiles and per-glyph score distributions.
+
+A scorer is any function `scorer(user, ideal) -> float in [0, 1]` taking
+lists of (n, 3) float arrays (x, y, t); built-ins are listed in SCORERS and
+others are given as "module:function".
+"""
+
+import gzip
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from build_mask_atlas import iou, rasterize_points
+from dedupe_components import resample
+from stroke_inputs import DEFAULT_FILES, existing, merged_entries
+from stroke_writer import atomic_open
+
+DEFAULT_REPORT = "replay_report.json"
+DEFAULT_SCORERS = ["stroke_count", "shape", "direction"]
+
+# Attempts per work item, and work items queued per worker
+BATCH_SIZE = 1000
+IN_FLIGHT_PER_WORKER = 2
+
+# Score histograms: equal-width bins over 0-1
+SCORE_BINS = 10
+# Latency histogram: quarter-octave buckets in microseconds
+LATENCY_BUCKETS_PER_OCTAVE = 4
+
+# Shape scorer: points per resampled stroke and the distance that scores 0
+SHAPE_POINTS = 16
+SHAPE_ZERO_DISTANCE = 0.25
+# IoU scorer raster settings (coarser than the atlas; drawings are sloppy)
+IOU_RESOLUTION = 32
+IOU_STROKE_WIDTH = 0.08
+
+
+# MARK: - Scorers
+
+def score_stroke_count(user: List[np.ndarray], ideal: List[np.ndarray]) -> float:
+    """Same rule as DefaultAttemptEvaluator.orderAccuracy in the app."""
+    return max(0.0, 1.0 - abs(len(user) - len(ideal)) / max(len(ideal), 1))
+
+
+def score_shape(user: List[np.ndarray], ideal: List[np.ndarray]) -> float:
+    """Mean point distance of corresponding strokes; missing strokes score 0."""
+    if not ideal:
+        return 0.0
+    total = 0.0
+    for drawn, reference in zip(user, ideal):
+        distance = np.hypot(*(resample(drawn[:, :2], SHAPE_POINTS) - resample(reference[:, :2], SHAPE_POINTS)).T)
+        total += max(0.0, 1.0 - float(distance.mean()) / SHAPE_ZERO_DISTANCE)
+    return total / max(len(ideal), len(user))
+
+
+def score_direction(user: List[np.ndarray], ideal: List[np.ndarray]) -> float:
+    """Share of reference strokes drawn in the right direction."""
+    if not ideal:
+        return 0.0
+    correct = 0
+    for drawn, reference in zip(user, ideal):
+        if float(np.dot(drawn[-1, :2] - drawn[0, :2], reference[-1, :2] - reference[0, :2])) > 0:
+            correct += 1
+    return correct / len(ideal)
+
+
+_ideal_masks: Dict[int, np.ndarray] = {}
+
+
+def score_iou(user: List[np.ndarray], ideal: List[np.ndarray]) -> float:
+    """Overlap of the rasterized drawing with the rasterized reference."""
+    reference = _ideal_masks.get(id(ideal))
+    if reference is None:
+        # References live for the whole worker, so their id is a stable cache key
+        reference = rasterize_points([s[:, :2] for s in ideal], IOU_RESOLUTION, IOU_STROKE_WIDTH)
+        _ideal_masks[id(ideal)] = reference
+    return iou(rasterize_points([s[:, :2] for s in user], IOU_RESOLUTION, IOU_STROKE_WIDTH), reference)
+
+
+SCORERS: Dict[str, Callable[[List[np.ndarray], List[np.ndarray]], float]] = {
+    "stroke_count": score_stroke_count,
+    "shape": score_shape,
+    "direction": score_direction,
+    "iou": score_iou,
+}
+
+
+def resolve_scorer(name: str) -> Callable:
+    if name in SCORERS:
+        return SCORERS[name]
+    module, _, function = name.partition(":")
+    if not function:
+        raise ValueError(f"unknown scorer '{name}' (built-ins: {', '.join(SCORERS)}; or module:function)")
+    return getattr(importlib.import_module(module), function)
+
+
+# MARK: - Streaming statistics
+
+class RunningStats:
+    """Mergeable count/mean/min/max/histogram of scores in [0, 1]."""
+
+    __slots__ = ("count", "total", "total_sq", "low", "high", "bins")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+        self.bins = [0] * SCORE_BINS
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        self.bins[min(SCORE_BINS - 1, max(0, int(value * SCORE_BINS)))] += 1
+
+    def merge(self, other: "RunningStats"):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.low = min(self.low, other.low)
+        self.high = max(self.high, other.high)
+        self.bins = [a + b for a, b in zip(self.bins, other.bins)]
+
+    def as_dict(self) -> Dict:
+        mean = self.total / self.count if self.count else 0.0
+        variance = max(0.0, self.total_sq / self.count - mean * mean) if self.count else 0.0
+        return {"count": self.count, "mean": round(mean, 4), "std": round(math.sqrt(variance), 4),
+                "min": round(self.low, 4) if self.count else None,
+                "max": round(self.high, 4) if self.count else None, "histogram": self.bins}
+
+
+class LatencyHistogram:
+    """Log-bucketed latency counts; percentiles are accurate to a bucket (~19%)."""
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float):
+        micros = max(seconds * 1e6, 1.0)
+        bucket = int(math.log2(micros) * LATENCY_BUCKETS_PER_OCTAVE)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper edge of the bucket holding the percentile, in milliseconds."""
+        if not self.count:
+            return None
+        threshold = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return 2 ** ((bucket + 1) / LATENCY_BUCKETS_PER_OCTAVE) / 1000
+        return None
+
+    def as_dict(self) -> Dict:
+        def ms(value):
+            return round(value, 3) if value is not None else None
+        return {"count": self.count,
+                "mean_ms": ms(self.total / self.count * 1000) if self.count else None,
+                "p50_ms": ms(self.percentile(0.50)), "p95_ms": ms(self.percentile(0.95)),
+                "p99_ms": ms(self.percentile(0.99))}
+
+
+class BatchSummary:
+    """Everything a worker sends back for one batch."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.unknown_glyph = 0
+        self.invalid = 0
+        self.latency = LatencyHistogram()
+        self.by_glyph: Dict[str, Dict[str, RunningStats]] = {}
+
+    def merge(self, other: "BatchSummary"):
+        self.attempts += other.attempts
+        self.unknown_glyph += other.unknown_glyph
+        self.invalid += other.invalid
+        self.latency.merge(other.latency)
+        for key, scorers in other.by_glyph.items():
+            mine = self.by_glyph.setdefault(key, {})
+            for name, stats in scorers.items():
+                mine.setdefault(name, RunningStats()).merge(stats)
+
+
+# MARK: - Workers
+
+_references: Dict[str, List[np.ndarray]] = {}
+_scorers: List[Tuple[str, Callable]] = []
+
+
+def load_references(paths: List[str]) -> Dict[str, List[np.ndarray]]:
+    references = {}
+    for key, entry in merged_entries(paths).items():
+        if entry.get("strokes"):
+            references[key] = [np.array([(p["x"], p["y"], p.get("t", 0.0)) for p in stroke], dtype=np.float64)
+                               for stroke in entry["strokes"] if stroke]
+    return references
+
+
+def _init_worker(reference_paths: List[str], scorer_names: List[str]):
+    global _references, _scorers
+    _references = load_references(reference_paths)
+    _scorers = [(name, resolve_scorer(name)) for name in scorer_names]
+
+
+def attempt_key(attempt: Dict) -> Optional[str]:
+    if "key" in attempt:
+        key = attempt["key"]
+        return key if isinstance(key, str) else None
+    codepoint = attempt.get("codepoint")
+    if not isinstance(codepoint, int):
+        return None
+    return f"N+{-codepoint}" if codepoint < 0 else f"U+{codepoint:04X}"
+
+
+def parse_strokes(raw: List) -> List[np.ndarray]:
+    strokes = []
+    for stroke in raw:
+        if not stroke:
+            continue
+        if isinstance(stroke[0], dict):
+            stroke = [(p["x"], p["y"], p.get("t", 0.0)) for p in stroke]
+        points = np.asarray(stroke, dtype=np.float64)
+        if points.shape[1] == 2:
+            points = np.column_stack([points, np.zeros(len(points))])
+        strokes.append(points)
+    return strokes
+
+
+def score_batch(lines: List[str]) -> BatchSummary:
+    """Score one batch of raw JSONL lines in a worker."""
+    summary = BatchSummary()
+    for line in lines:
+        start = time.perf_counter()
+        try:
+            attempt = json.loads(line)
+            if not isinstance(attempt, dict):
+                raise ValueError("attempt is not a JSON object")
+            key = attempt_key(attempt)
+            user = parse_strokes(attempt.get("strokes") or [])
+        except (ValueError, TypeError, KeyError, IndexError):
+            summary.invalid += 1
+            continue
+        ideal = _references.get(key)
+        if ideal is None:
+            summary.unknown_glyph += 1
+            continue
+        stats = summary.by_glyph.setdefault(key, {})
+        for name, scorer in _scorers:
+            stats.setdefault(name, RunningStats()).add(float(scorer(user, ideal)) if user else 0.0)
+        summary.attempts += 1
+        summary.latency.add(time.perf_counter() - start)
+    return summary
+
+
+# MARK: - Driver
+
+def read_batches(path: str, batch_size: int) -> Iterator[List[str]]:
+    """Non-empty lines of a (optionally gzipped) JSONL file, in batches."""
+    opener = gzip.open if path.endswith(".gz") else open
+    batch = []
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def replay(path: str, scorer_names: List[str], reference_paths: List[str],
+           jobs: int = 0, batch_size: int = BATCH_SIZE, progress: bool = True) -> Dict:
+    """Replay an attempt log; returns the report dict."""
+    for name in scorer_names:
+        resolve_scorer(name)  # Fail fast on a typo before starting workers
+    jobs = jobs or os.cpu_count() or 1
+    total = BatchSummary()
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(reference_paths, scorer_names)) as pool:
+        in_flight = set()
+        for batch in read_batches(path, batch_size):
+            if len(in_flight) >= jobs * IN_FLIGHT_PER_WORKER:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+                if progress:
+                    rate = total.attempts / (time.perf_counter() - start)
+                    print(f"\r  {total.attempts:,} attempts ({rate:,.0f}/s)", end="", flush=True)
+            in_flight.add(pool.submit(score_batch, batch))
+        for future in in_flight:
+            total.merge(future.result())
+
+    elapsed = time.perf_counter() - start
+    if progress:
+        print()
+
+    overall = {name: RunningStats() for name in scorer_names}
+    for scorers in total.by_glyph.values():
+        for name, stats in scorers.items():
+            overall[name].merge(stats)
+
+    return {
+        "input": path,
+        "scorers": scorer_names,
+        "jobs": jobs,
+        "attempts": total.attempts,
+        "unknown_glyph": total.unknown_glyph,
+        "invalid": total.invalid,
+        "elapsed_s": round(elapsed, 3),
+        "attempts_per_sec": round(total.attempts / elapsed, 1) if elapsed else None,
+        "latency": total.latency.as_dict(),
+        "overall": {name: stats.as_dict() for name, stats in overall.items()},
+        "by_glyph": {key: {name: stats.as_dict() for name, stats in scorers.items()}
+                     for key, scorers in sorted(total.by_glyph.items())},
+    }
+
+
+def main():
+    args = sys.argv[1:]
+
+    def take(name: str, default=None):
+        if name in args:
+            idx = args.index(name)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            return value
+        return default
+
+    scorer_names = take('--scorers', ','.join(DEFAULT_SCORERS)).split(',')
+    jobs = int(take('--jobs', '0'))
+    batch_size = int(take('--batch', str(BATCH_SIZE)))
+    report_path = take('--report', DEFAULT_REPORT)
+    references = []
+    while '--refs' in args:
+        references.append(take('--refs'))
+    references = references or existing(DEFAULT_FILES)
+    if not args:
+        print("Usage: python3 replay_attempts.py ATTEMPTS.jsonl [--scorers a,b] [--jobs N] [--refs FILE]")
+        sys.exit(2)
+
+    print("🔁 Attempt Replay Harness")
+    print("=" * 50)
+    report = replay(args[0], scorer_names, references, jobs, batch_size)
+
+    with atomic_open(report_path) as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ {report['attempts']:,} attempts in {report['elapsed_s']}s "
+          f"({report['attempts_per_sec']:,} attempts/s on {report['jobs']} workers)")
+    if report["unknown_glyph"] or report["invalid"]:
+        print(f"⚠️  Skipped {report['unknown_glyph']} attempts for unknown glyphs, {report['invalid']} invalid lines")
+    latency = report["latency"]
+    print(f"⏱️  Latency per attempt: mean {latency['mean_ms']} ms, p50 {latency['p50_ms']} ms, "
+          f"p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms")
+    for name, stats in report["overall"].items():
+        print(f"   {name:<14} mean {stats['mean']:.3f} ± {stats['std']:.3f}  histogram {stats['histogram']}")
+    print(f"\n📄 Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
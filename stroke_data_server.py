@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service over the stroke data pipeline outputs.
+
+Usage:
+    python3 stroke_data_server.py                           # serves strokedata/ on 127.0.0.1:8765
+    python3 stroke_data_server.py --data strokedata --data chinese_corpus --port 9000
+    python3 stroke_data_server.py --file mask_atlas.bin --cache-mb 16 --verbose
+
+The correction tool, debugging scripts and lesson builders each load whole
+JSON files to look at a few glyphs. This server loads nothing up front: each
+glyph set (a *.json file of "U+XXXX" entries) is memory-mapped and scanned
+once for the byte span of every entry, and a glyph is only decoded when it is
+requested. Decoded glyphs are kept, re-encoded compactly (and gzipped when a
+client asked for it), in an LRU bounded by bytes.
+
+Endpoints (all GET, JSON unless noted):
+    /sets                        sets with glyph counts
+    /sets/<set>                  whole set file
+    /sets/<set>/keys             keys of a set
+    /sets/<set>/glyphs?keys=a,b  several glyphs of a set in one response
+    /glyph/<id>[?set=<set>]      one glyph; id is U+XXXX, N+n, a decimal
+                                 codepoint or the character itself
+    /files/<name>                raw file (binary packs, shards) with byte ranges
+    /stats                       cache and request counters
+
+Responses carry ETags (If-None-Match gives 304), bodies are gzipped when the
+client accepts it, and /files honours single "Range: bytes=..." requests with
+206 Partial Content. Files with a current manifest (see stroke_writer) use
+its SHA-256 as their ETag. Binds to localhost only; standard library only.
+"""
+
+import gzip
+import hashlib
+import http.server
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from stroke_writer import read_manifest
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DATA_DIRS = ["strokedata"]
+DEFAULT_CACHE_MB = 32
+
+# Bodies smaller than this are not worth gzipping
+GZIP_MIN_BYTES = 512
+GZIP_LEVEL = 6
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(rb'"(?:[^"\\]++|\\.)*+"', re.S)
+_SCALAR = re.compile(rb"[^,}\]\s]*")
+# A run of bytes that cannot open or close a container; strings are taken whole
+_FLAT = rb'(?:[^"\[\]{}]++|"(?:[^"\\]++|\\.)*+")'
+_NEXT_BRACKET = re.compile(_FLAT + rb"*+([\[\]{}])", re.S)
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _nested_container(depth: int):
+    """Regex for a JSON array or object nested at most `depth` levels deep."""
+    pattern = rb"[\[{]" + _FLAT + rb"*+[\]}]"
+    for _ in range(depth - 1):
+        pattern = rb"[\[{](?:" + _FLAT + rb"|" + pattern + rb")*+[\]}]"
+    return re.compile(pattern, re.S)
+
+
+# Glyph entries nest four levels (entry, strokes, stroke, point), so a whole
+# entry is normally skipped in one match
+_CONTAINER = _nested_container(6)
+
+
+class ByteLRU:
+    """Thread-safe LRU whose bound is the total size of the cached bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: "OrderedDict[object, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value: bytes):
+        if len(value) > self.max_bytes:
+            return  # Larger than the whole cache; serve it uncached
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def _value_end(data, pos: int) -> int:
+    """End offset of the JSON value starting at `pos`, found without decoding it."""
+    match = _CONTAINER.match(data, pos) or _STRING.match(data, pos)
+    if match:
+        return match.end()
+    if data[pos:pos + 1] not in (b"[", b"{"):
+        return _SCALAR.match(data, pos).end()
+    # Nested deeper than _CONTAINER covers: count brackets outside strings
+    depth = 0
+    while True:
+        match = _NEXT_BRACKET.match(data, pos)
+        if match is None:
+            raise ValueError(f"unterminated JSON value at byte {pos}")
+        pos = match.end()
+        depth += 1 if match.group(1) in (b"[", b"{") else -1
+        if not depth:
+            return pos
+
+
+def scan_spans(data) -> Dict[str, Tuple[int, int]]:
+    """
+    Byte span of every top-level value of a JSON object in `data` (bytes or
+    a memory map, which is scanned in place). Only the keys are decoded;
+    values are skipped by matching brackets. Empty data has no entries.
+    """
+    spans = {}
+    if not len(data):
+        return spans
+    pos = _WHITESPACE.match(data, 0).end()
+    if data[pos:pos + 1] != b"{":
+        raise ValueError("not a JSON object")
+    pos += 1
+    while True:
+        pos = _WHITESPACE.match(data, pos).end()
+        token = data[pos:pos + 1]
+        if token == b"}":
+            break
+        if token == b",":
+            pos = _WHITESPACE.match(data, pos + 1).end()
+        match = _STRING.match(data, pos)
+        if match is None:
+            raise ValueError(f"expected a key at byte {pos}")
+        key = json.loads(match.group())
+        pos = _WHITESPACE.match(data, match.end()).end()
+        pos = _WHITESPACE.match(data, pos + 1).end()  # ':'
+        start = pos
+        pos = _value_end(data, pos)
+        spans[key] = (start, pos)
+    return spans
+
+
+def map_file(path: str):
+    """Read-only memory map of `path`; an empty file, which mmap refuses, gives b""."""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def file_etag(path: str) -> str:
+    """
+    The SHA-256 from the file's manifest (see stroke_writer) when it is
+    current, so a rebuild with identical content keeps its ETag; otherwise
+    size and mtime.
+    """
+    manifest = read_manifest(path)
+    if manifest:
+        return f'"{manifest["sha256"][:32]}"'
+    stat = os.stat(path)
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+class GlyphSet:
+    """A memory-mapped glyph JSON file and its per-entry byte spans."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.etag = file_etag(path)
+        self._map = map_file(path)
+        self.spans = scan_spans(self._map)
+
+    def raw(self, key: str) -> Optional[bytes]:
+        span = self.spans.get(key)
+        return self._map[span[0]:span[1]] if span else None
+
+    def whole(self) -> bytes:
+        return self._map[:]
+
+
+def looks_like_glyph_set(path: str) -> bool:
+    """A JSON object whose first key is a U+/N+ glyph key."""
+    with open(path, "rb") as f:
+        head = f.read(256).decode("utf-8", errors="ignore")
+    return re.match(r'\s*\{\s*"(U|N)\+', head) is not None
+
+
+def glyph_key(identifier: str) -> str:
+    """Normalize U+XXXX / N+n / decimal codepoint / literal character to a key."""
+    identifier = unquote(identifier).strip()
+    # Form-style query decoding turns the '+' of "U+3042" into a space
+    upper = identifier.upper().replace(" ", "+")
+    if upper.startswith("U+"):
+        return f"U+{int(upper[2:], 16):04X}"
+    if upper.startswith("N+"):
+        return upper
+    if identifier.lstrip("-").isdigit():
+        codepoint = int(identifier)
+        return f"N+{-codepoint}" if codepoint < 0 else f"U+{codepoint:04X}"
+    if len(identifier) == 1:
+        return f"U+{ord(identifier):04X}"
+    raise ValueError(f"unrecognized glyph id '{identifier}'")
+
+
+class StrokeDataService:
+    """Lookup and caching logic, independent of the HTTP plumbing."""
+
+    def __init__(self, data_dirs: List[str], extra_files: List[str] = (), cache_bytes: int = DEFAULT_CACHE_MB << 20):
+        self.sets: "OrderedDict[str, GlyphSet]" = OrderedDict()
+        self.files: Dict[str, str] = {}
+        for directory in data_dirs:
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if not os.path.isfile(path):
+                    continue
+                self.files.setdefault(name, path)
+                if name.endswith(".json") and looks_like_glyph_set(path):
+                    glyph_set = GlyphSet(path)
+                    self.sets.setdefault(glyph_set.name, glyph_set)
+        for path in extra_files:
+            self.files.setdefault(os.path.basename(path), path)
+        self.cache = ByteLRU(cache_bytes)
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def count_request(self, not_modified: bool = False):
+        with self._lock:
+            self.requests += 1
+            if not_modified:
+                self.not_modified += 1
+
+    def glyph_body(self, key: str, set_name: Optional[str] = None) -> Optional[bytes]:
+        """Compact JSON of one glyph, decoded on first use and cached."""
+        names = [set_name] if set_name else list(self.sets)
+        for name in names:
+            glyph_set = self.sets.get(name)
+            if glyph_set is None or key not in glyph_set.spans:
+                continue
+            cache_key = ("glyph", name, key)
+            body = self.cache.get(cache_key)
+            if body is None:
+                entry = json.loads(glyph_set.raw(key))
+                body = json.dumps(entry, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                self.cache.put(cache_key, body)
+            return body
+        return None
+
+    def gzipped(self, cache_key, body: bytes) -> bytes:
+        packed = self.cache.get(("gzip",) + cache_key)
+        if packed is None:
+            packed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            self.cache.put(("gzip",) + cache_key, packed)
+        return packed
+
+    def stats(self) -> Dict:
+        return {"requests": self.requests, "not_modified": self.not_modified,
+                "sets": {name: len(glyph_set.spans) for name, glyph_set in self.sets.items()},
+                "cache": self.cache.as_dict()}
+
+
+class StrokeDataHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StrokeDataServer/1.0"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls ~40ms on Nagle + delayed ACK
+    disable_nagle_algorithm = True
+    service: StrokeDataService = None
+    verbose = False
+
+    # MARK: - Responses
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              etag: Optional[str] = None, cache_key=None, headers: Optional[Dict[str, str]] = None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.service.count_request(not_modified=True)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.service.count_request()
+        encoding = None
+        if ("gzip" in self.headers.get("Accept-Encoding", "") and len(body) >= GZIP_MIN_BYTES
+                and status == 200 and content_type == "application/json"):
+            body = self.service.gzipped(cache_key, body) if cache_key else gzip.compress(body, GZIP_LEVEL)
+            encoding = "gzip"
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Vary", "Accept-Encoding")
+        if etag:
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, payload, status: int = 200, etag: Optional[str] = None):
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._send(status, body, etag=etag)
+
+    def _error(self, status: int, message: str):
+        self._json({"error": message}, status)
+
+    # MARK: - Routing
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        segments = [unquote(segment) for segment in parts.path.strip("/").split("/") if segment]
+        query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        try:
+            if segments == ["sets"]:
+                self._json([{"name": name, "glyphs": len(glyph_set.spans), "etag": glyph_set.etag}
+                            for name, glyph_set in self.service.sets.items()])
+            elif len(segments) >= 2 and segments[0] == "sets":
+                self._serve_set(segments[1], segments[2:], query)
+            elif len(segments) == 2 and segments[0] == "glyph":
+                self._serve_glyph(segments[1], query.get("set"))
+            elif len(segments) == 2 and segments[0] == "files":
+                self._serve_file(segments[1])
+            elif segments == ["stats"]:
+                self._json(self.service.stats())
+            else:
+                self._error(404, f"no route for {parts.path}")
+        except ValueError as e:
+            self._error(400, str(e))
+
+    do_HEAD = do_GET
+
+    def _serve_set(self, name: str, rest: List[str], query: Dict[str, str]):
+        glyph_set = self.service.sets.get(name)
+        if glyph_set is None:
+            return self._error(404, f"unknown set '{name}'")
+        if not rest:
+            body = self.service.cache.get(("set", name))
+            if body is None:
+                body = glyph_set.whole()
+                self.service.cache.put(("set", name), body)
+            return self._send(200, body, etag=glyph_set.etag, cache_key=("set", name))
+        if rest == ["keys"]:
+            return self._json(list(glyph_set.spans), etag=glyph_set.etag)
+        if rest == ["glyphs"]:
+            keys = [glyph_key(key) for key in query.get("keys", "").split(",") if key]
+            found = {key: json.loads(self.service.glyph_body(key, name))
+                     for key in keys if key in glyph_set.spans}
+            return self._json(found)
+        self._error(404, f"no route for set '{name}'")
+
+    def _serve_glyph(self, identifier: str, set_name: Optional[str]):
+        key = glyph_key(identifier)
+        body = self.service.glyph_body(key, set_name)
+        if body is None:
+            return self._error(404, f"glyph {key} not found")
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        self._send(200, body, etag=etag, cache_key=("glyph", set_name, key))
+
+    def _serve_file(self, name: str):
+        path = self.service.files.get(name)
+        if path is None:
+            return self._error(404, f"unknown file '{name}'")
+        size = os.path.getsize(path)
+        etag = file_etag(path)
+        content_type = "application/json" if name.endswith(".json") else "application/octet-stream"
+
+        range_header = self.headers.get("Range")
+        if not range_header or self.headers.get("If-Range", etag) != etag:
+            with open(path, "rb") as f:
+                body = f.read()
+            return self._send(200, body, content_type, etag=etag, headers={"Accept-Ranges": "bytes"})
+
+        match = _RANGE.match(range_header.strip())
+        if not match or match.groups() == ("", ""):
+            return self._error(400, f"unsupported range '{range_header}'")
+        first, last = match.groups()
+        if first == "":
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            self.service.count_request()
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        self._send(206, body, content_type, etag=etag,
+                   headers={"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{size}"})
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(data_dirs: List[str], extra_files: List[str] = (), host: str = DEFAULT_HOST,
+                port: int = DEFAULT_PORT, cache_bytes: int = DEFAULT_CACHE_MB << 20,
+                verbose: bool = False) -> http.server.ThreadingHTTPServer:
+    """Build (but do not start) a server; port 0 picks a free port."""
+    handler = type("BoundStrokeDataHandler", (StrokeDataHandler,),
+                   {"service": StrokeDataService(data_dirs, extra_files, cache_bytes), "verbose": verbose})
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    args = sys.argv[1:]
+
+    def take(name: str, default=None):
+        if name in args:
+            idx = args.index(name)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            return value
+        return default
+
+    data_dirs, files = [], []
+    while '--data' in args:
+        data_dirs.append(take('--data'))
+    while '--file' in args:
+        files.append(take('--file'))
+    port = int(take('--port', str(DEFAULT_PORT)))
+    cache_mb = float(take('--cache-mb', str(DEFAULT_CACHE_MB)))
+    verbose = '--verbose' in args
+
+    server = make_server(data_dirs or DEFAULT_DATA_DIRS, files, DEFAULT_HOST, port,
+                         int(cache_mb * (1 << 20)), verbose)
+    service = server.RequestHandlerClass.service
+    print("🛰️  Stroke Data Server")
+    print("=" * 50)
+    for name, glyph_set in service.sets.items():
+        print(f"   set {name}: {len(glyph_set.spans)} glyphs")
+    print(f"   {len(service.files)} files, cache {cache_mb:g} MB")
+    print(f"\n✅ Listening on http://{DEFAULT_HOST}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Pooled HTTP client shared by all stroke data fetchers.
+
+The downloaders used to open a fresh TCP/TLS connection per glyph
+(urllib.request.urlopen in the KanjiVG scripts, bare requests.get in the
+hanzi-writer fetcher). PooledHTTPClient keeps HTTP/1.1 keep-alive
+connections per host and hands them back out, so a crawl of thousands of
+glyphs from the same host pays the handshake only a few times.
+
+On top of the pool it adds:
+- a per-status retry policy (429/5xx and network errors are retried with
+  exponential backoff and jitter, honouring Retry-After)
+- a per-host circuit breaker that stops sending requests to a host after
+  repeated failures and probes it again after a cool-down
+- metrics: connection reuse ratio, retries by cause, circuit rejections
+
+Only the standard library is used, and any http:// URL works, so it can be
+exercised against a local http.server in tests.
+"""
+
+import http.client
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from download_journal import (
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+    TransientDownloadError,
+    backoff_delay,
+)
+
+# Statuses worth retrying; everything else is returned to the caller as-is
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+DEFAULT_TIMEOUT = 15.0
+MAX_CONNECTIONS_PER_HOST = 8
+
+# Circuit breaker: open after this many consecutive failures, retry after cool-down
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30.0
+
+USER_AGENT = "KanjiKanaTrainer-stroke-fetcher/1.0"
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError,
+                            ConnectionResetError, http.client.CannotSendRequest)
+
+
+class CircuitOpenError(TransientDownloadError):
+    """The host's circuit breaker is open; the request was not sent."""
+
+
+class HTTPResponse:
+    """A fully read response; the connection is already back in the pool."""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def text(self) -> str:
+        return self.body.decode('utf-8')
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+class RetryPolicy:
+    """Which failures to retry, how often, and how long to wait in between."""
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, retry_statuses=RETRY_STATUSES):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def should_retry(self, status: int) -> bool:
+        return status in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Backoff delay, or the server's Retry-After (in seconds) if it is longer."""
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(float(retry_after), self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Classic closed → open → half-open breaker for one host.
+    While open, requests fail fast; after reset_timeout one trial request is
+    let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class ClientMetrics:
+    """Counters describing how the pool and retry policy behaved."""
+
+    def __init__(self):
+        self.requests = 0
+        self.responses_by_status: Dict[int, int] = {}
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.retries = 0
+        self.retries_by_cause: Dict[str, int] = {}
+        self.failures = 0
+        self.circuit_rejections = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests that went over an already-open connection."""
+        total = self.connections_opened + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+    def count_retry(self, cause: str):
+        self.retries += 1
+        self.retries_by_cause[cause] = self.retries_by_cause.get(cause, 0) + 1
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "responses_by_status": {str(k): v for k, v in sorted(self.responses_by_status.items())},
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.reuse_ratio, 4),
+            "retries": self.retries,
+            "retries_by_cause": dict(self.retries_by_cause),
+            "failures": self.failures,
+            "circuit_rejections": self.circuit_rejections,
+        }
+
+    def summary(self) -> str:
+        return (f"{self.requests} requests, {self.connections_opened} connections opened, "
+                f"reuse ratio {self.reuse_ratio:.0%}, {self.retries} retries, "
+                f"{self.circuit_rejections} circuit rejections")
+
+
+class PooledHTTPClient:
+    """Thread-safe GET client with keep-alive pooling, retries and breakers."""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT,
+                 max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker_failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 breaker_reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.timeout = timeout
+        self.max_connections_per_host = max_connections_per_host
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self.metrics = ClientMetrics()
+        self._idle: Dict[Tuple[str, str, int], deque] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    # MARK: - Pool
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        """An idle pooled connection for the host, or a new one. Returns (conn, reused)."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.metrics.connections_reused += 1
+                return idle.pop(), True
+            self.metrics.connections_opened += 1
+
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout), False
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection, reusable: bool):
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, deque())
+                if len(idle) < self.max_connections_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.breaker_failure_threshold, self.breaker_reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            for idle in self._idle.values():
+                while idle:
+                    idle.pop().close()
+            self._idle.clear()
+
+    def __enter__(self) -> "PooledHTTPClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # MARK: - Requests
+
+    def _send_once(self, key: Tuple[str, str, int], path: str, headers: Dict[str, str]) -> HTTPResponse:
+        """One request over a pooled connection, transparently replacing stale ones."""
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; not a real failure
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+            reusable = not response.will_close
+            self._release(key, conn, reusable)
+            scheme, host, port = key
+            return HTTPResponse(f"{scheme}://{host}:{port}{path}", response.status,
+                                {k.lower(): v for k, v in response.getheaders()}, body)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> HTTPResponse:
+        """
+        GET `url`. Any final status is returned (including 404); retryable
+        statuses and network errors are retried per the policy. Raises
+        TransientDownloadError when retries run out and CircuitOpenError when
+        the host is currently considered down.
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = quote(parts.path or "/", safe="/%:@!$&'()*+,;=") + (f"?{parts.query}" if parts.query else "")
+        request_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive", **(headers or {})}
+        breaker = self.breaker(parts.hostname)
+        policy = self.retry_policy
+
+        for attempt in range(policy.attempts):
+            with self._lock:
+                allowed = breaker.allow()
+                if not allowed:
+                    self.metrics.circuit_rejections += 1
+            if not allowed:
+                raise CircuitOpenError(f"circuit open for {parts.hostname}")
+
+            with self._lock:
+                self.metrics.requests += 1
+            retry_after = None
+            try:
+                response = self._send_once(key, path, request_headers)
+            except (OSError, http.client.HTTPException) as e:
+                cause = type(e).__name__
+                error = TransientDownloadError(f"{cause} for {url}: {e}")
+                error.__cause__ = e
+            else:
+                with self._lock:
+                    self.metrics.responses_by_status[response.status] = \
+                        self.metrics.responses_by_status.get(response.status, 0) + 1
+                if not policy.should_retry(response.status):
+                    with self._lock:
+                        breaker.record_success()
+                    return response
+                cause = f"HTTP {response.status}"
+                error = TransientDownloadError(f"{cause} for {url}")
+                retry_after = response.headers.get("retry-after")
+
+            with self._lock:
+                breaker.record_failure()
+                if attempt == policy.attempts - 1:
+                    self.metrics.failures += 1
+                else:
+                    self.metrics.count_retry(cause)
+            if attempt == policy.attempts - 1:
+                raise error
+            time.sleep(policy.delay(attempt, retry_after))
+
+
+_default_client: Optional[PooledHTTPClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> PooledHTTPClient:
+    """The process-wide client the fetch scripts share."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = PooledHTTPClient()
+        return _default_client
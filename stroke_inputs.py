@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Default glyph inputs of the build tools, and which input a key comes from
+when several provide it.
+
+Usage:
+    from stroke_inputs import DEFAULT_FILES, existing, key_owners, merged_entries
+
+    paths = args or existing(DEFAULT_FILES)
+    owners = key_owners(paths)           # {"U+4E00": "strokedata/chinese_stroke_data.json", ...}
+    references = merged_entries(paths)   # {key: entry} as the app sees it
+
+The app loads its bundled files in DEFAULT_FILES order and merges each one
+over the previous (ChineseStrokeDataLoader: `merge(decoded) { (current,
+new) in new }`), so a later file replaces an earlier file's glyph for the
+same key: 一 to 十 are drawn from chinese_stroke_data.json, not from
+chinesenumbers.json. Every tool that combines inputs by key applies the same
+rule, so masks, fields, databases and synthetic attempts are built from the
+glyph the app shows, and validate_stroke_data.py reports the earlier entry
+as the shadowed one.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List
+
+# The app's bundled files, in the app's load order
+DEFAULT_FILES = [
+    os.path.join("strokedata", "kanastrokes.json"),
+    os.path.join("strokedata", "chinesenumbers.json"),
+    os.path.join("strokedata", "chinese_stroke_data.json"),
+]
+# KanjiVG corpus written by download_kanji_strokes.py; not bundled with the app
+KANJI_FILE = os.path.join("strokedata", "kanjistrokes.json")
+# Everything the pipeline produces. The kanji corpus goes first so that, for
+# characters it shares with the Chinese data, the app's own glyph wins.
+CORPUS_FILES = [KANJI_FILE] + DEFAULT_FILES
+# Recorded in the build params of artifacts that combine inputs by key, so
+# ones built under the old first-file-wins rule are not taken as current
+PRECEDENCE = "later_wins"
+
+
+def existing(paths: Iterable[str]) -> List[str]:
+    """The paths that exist, in order; defaults fall back to what has been built."""
+    return [path for path in paths if os.path.exists(path)]
+
+
+def key_owners(paths: Iterable[str]) -> Dict[str, str]:
+    """
+    {key: path of the input that provides it}, a later input replacing an
+    earlier one. Keys are listed through stroke_store, so any source type
+    works and glyph entries are not decoded.
+    """
+    # Imported here: stroke_store depends on build_stroke_db, which uses this module
+    from stroke_store import open_source
+
+    owners: Dict[str, str] = {}
+    for path in paths:
+        for key in open_source(path).keys():
+            owners[key] = path
+    return owners
+
+
+def merged_entries(paths: Iterable[str]) -> Dict[str, Dict]:
+    """All entries of the JSON inputs by key, a later file replacing an earlier one."""
+    entries: Dict[str, Dict] = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            entries.update(json.load(f))
+    return entries
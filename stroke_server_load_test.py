@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Load test for stroke_data_server.py.
+
+Usage:
+    python3 stroke_server_load_test.py                        # starts its own server on strokedata/
+    python3 stroke_server_load_test.py --url http://127.0.0.1:8765 --concurrency 1,8,32 --requests 5000
+    python3 stroke_server_load_test.py --gzip --mix glyph=8,batch=1,set=1 --output load_report.json
+
+Requests random glyphs (and optionally batches and whole sets) over keep-alive
+connections at each concurrency level and reports requests/sec, latency
+percentiles and status counts. Without --url a server is started in-process
+on a free localhost port.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from stroke_data_server import DEFAULT_DATA_DIRS, make_server
+from stroke_http_client import PooledHTTPClient, RetryPolicy
+from stroke_writer import atomic_open
+
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_REQUESTS = 2000
+DEFAULT_MIX = {"glyph": 1}
+DEFAULT_OUTPUT = "load_report.json"
+BATCH_KEYS = 10
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def build_paths(base_url: str, client: PooledHTTPClient, mix: Dict[str, int], count: int,
+                rng: random.Random) -> List[str]:
+    """A shuffled request list following the endpoint mix."""
+    sets = client.get(f"{base_url}/sets").json()
+    keys = {entry["name"]: client.get(f"{base_url}/sets/{entry['name']}/keys").json() for entry in sets}
+    all_keys = [key for set_keys in keys.values() for key in set_keys]
+    kinds = [kind for kind, weight in mix.items() for _ in range(weight)]
+
+    paths = []
+    for _ in range(count):
+        kind = rng.choice(kinds)
+        if kind == "glyph":
+            paths.append(f"/glyph/{rng.choice(all_keys)}")
+        elif kind == "batch":
+            name = rng.choice(list(keys))
+            picked = rng.sample(keys[name], min(BATCH_KEYS, len(keys[name])))
+            paths.append(f"/sets/{name}/glyphs?keys={quote(','.join(picked))}")
+        elif kind == "set":
+            paths.append(f"/sets/{rng.choice(list(keys))}")
+        else:
+            raise ValueError(f"unknown request kind '{kind}'")
+    return paths
+
+
+def run_level(base_url: str, paths: List[str], concurrency: int, headers: Dict[str, str]) -> Dict:
+    client = PooledHTTPClient(max_connections_per_host=concurrency,
+                              retry_policy=RetryPolicy(attempts=1, retry_statuses=()),
+                              breaker_failure_threshold=len(paths) + 1)
+
+    def request(path: str):
+        start = time.perf_counter()
+        try:
+            response = client.get(base_url + path, headers)
+            outcome, size = str(response.status), len(response.body)
+        except Exception as e:
+            outcome, size = f"error:{type(e.__cause__ or e).__name__}", 0
+        return outcome, time.perf_counter() - start, size
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(request, paths))
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    by_status: Dict[str, int] = {}
+    for outcome, _, _ in results:
+        by_status[outcome] = by_status.get(outcome, 0) + 1
+    latencies = sorted(latency for _, latency, _ in results)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(len(results) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "bytes": sum(size for _, _, size in results),
+        "by_status": by_status,
+        "connection_reuse_ratio": round(client.metrics.reuse_ratio, 4),
+    }
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(name) + 1] if name in args else default
+
+    levels = [int(level) for level in option('--concurrency', ','.join(map(str, DEFAULT_CONCURRENCY))).split(',')]
+    count = int(option('--requests', str(DEFAULT_REQUESTS)))
+    output = option('--output', DEFAULT_OUTPUT)
+    mix = DEFAULT_MIX
+    if option('--mix'):
+        mix = {kind: int(weight) for kind, weight in (item.split('=') for item in option('--mix').split(','))}
+    headers = {"Accept-Encoding": "gzip"} if '--gzip' in args else {}
+
+    server = None
+    base_url = option('--url')
+    if not base_url:
+        server = make_server(DEFAULT_DATA_DIRS, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    base_url = base_url.rstrip('/')
+
+    print("🏋️  Stroke Data Server Load Test")
+    print("=" * 50)
+    with PooledHTTPClient() as client:
+        paths = build_paths(base_url, client, mix, count, random.Random(int(option('--seed', '0'))))
+    print(f"Target {base_url}, {count} requests per level, mix {mix}\n")
+
+    runs = []
+    for concurrency in levels:
+        run = run_level(base_url, paths, concurrency, headers)
+        runs.append(run)
+        errors = {k: v for k, v in run["by_status"].items() if k != "200"}
+        print(f"  c={concurrency:<3} {run['requests_per_sec']:>9} req/s  p50 {run['p50_ms']} ms  "
+              f"p95 {run['p95_ms']} ms  p99 {run['p99_ms']} ms  errors {errors or 'none'}")
+
+    if server is not None:
+        with PooledHTTPClient() as client:
+            stats = client.get(f"{base_url}/stats").json()
+        print(f"\n🗃️  Server cache: {stats['cache']}")
+        server.shutdown()
+
+    with atomic_open(output) as f:
+        json.dump({"url": base_url, "mix": mix, "runs": runs}, f, indent=2)
+    print(f"\n📄 Load report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
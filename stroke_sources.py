@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Ordered, health-tracked sources for the upstream stroke datasets.
+
+Each dataset (KanjiVG SVGs, hanzi-writer JSON) can be served from several
+places: a local checkout, raw.githubusercontent.com, or a CDN mirror such as
+jsDelivr. WORKING_URLS.md documents how a single hard-coded URL already broke
+once; a SourceSet tries the sources in order of health and speed instead.
+
+- Local directories are always tried first (no network at all)
+- Remote sources are ranked by a moving average of their latency; sources
+  that just failed are moved to the back until they recover
+- Hedged requests: if the preferred source has not answered within its
+  observed latency percentile (p95 by default), the same request is sent to
+  the next source as well and whichever succeeds first wins
+
+Source templates can use {hex5} (e.g. 04e00), {hex4} (4e00) and {char}.
+Set KANJIVG_DIR / HANZI_WRITER_DIR to point at local data checkouts.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from download_journal import TransientDownloadError
+from stroke_http_client import PooledHTTPClient, get_default_client
+
+# Latency samples kept per source for percentiles
+LATENCY_WINDOW = 200
+# Percentile of a source's latency after which a hedged request is sent
+HEDGE_PERCENTILE = 0.95
+# Samples needed before the percentile is trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+# Weight of the newest sample in the moving latency average
+LATENCY_EWMA_ALPHA = 0.2
+# A failing source is skipped for this long (seconds) unless nothing else is left
+FAILURE_COOLDOWN = 30.0
+
+
+class Source:
+    """One place a dataset can be read from."""
+
+    def __init__(self, name: str, template: str):
+        self.name = name
+        self.template = template
+        self.is_local = "://" not in template or template.startswith("file://")
+
+    def locate(self, codepoint: int) -> str:
+        fields = {"hex5": f"{codepoint:05x}", "hex4": f"{codepoint:04x}", "char": chr(codepoint)}
+        location = self.template.format(**fields)
+        return location[len("file://"):] if location.startswith("file://") else location
+
+    def __repr__(self) -> str:
+        return f"Source({self.name!r})"
+
+
+class SourceHealth:
+    """Latency and failure bookkeeping for one source."""
+
+    def __init__(self):
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.average: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.last_failure: Optional[float] = None
+
+    def record_success(self, latency: float):
+        self.successes += 1
+        self.latencies.append(latency)
+        if self.average is None:
+            self.average = latency
+        else:
+            self.average += LATENCY_EWMA_ALPHA * (latency - self.average)
+        self.last_failure = None
+
+    def record_failure(self):
+        self.failures += 1
+        self.last_failure = time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        return self.last_failure is None or time.monotonic() - self.last_failure >= FAILURE_COOLDOWN
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def as_dict(self) -> Dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "healthy": self.healthy,
+            "avg_ms": round(self.average * 1000, 1) if self.average is not None else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+class FetchResult:
+    """Body of a successful fetch and the source that served it."""
+
+    def __init__(self, body: bytes, source: Source, latency: float):
+        self.body = body
+        self.source = source
+        self.latency = latency
+
+    def text(self) -> str:
+        return self.body.decode('utf-8')
+
+
+class SourceSet:
+    """Ordered sources for one dataset with failover and hedged requests."""
+
+    def __init__(self, name: str, sources: List[Source],
+                 client: Optional[PooledHTTPClient] = None,
+                 hedge_percentile: float = HEDGE_PERCENTILE, max_workers: int = 16):
+        self.name = name
+        self.sources = [source for source in sources if source is not None]
+        self.client = client
+        self.hedge_percentile = hedge_percentile
+        self.hedged_requests = 0
+        self.health: Dict[str, SourceHealth] = {source.name: SourceHealth() for source in self.sources}
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def ranked(self) -> List[Source]:
+        """
+        Local first, then healthy remotes by average latency, then the rest.
+        Untried remotes rank ahead of measured ones so every source gets
+        sampled before the ranking settles.
+        """
+        with self._lock:
+            def rank(item: Tuple[int, Source]) -> Tuple:
+                position, source = item
+                health = self.health[source.name]
+                average = health.average if health.average is not None else -1.0
+                return (not source.is_local, not health.healthy, average, position)
+            return [source for _, source in sorted(enumerate(self.sources), key=rank)]
+
+    def _fetch_from(self, source: Source, codepoint: int) -> Optional[FetchResult]:
+        """
+        Fetch from one source. Returns None if the source does not have the
+        glyph and raises TransientDownloadError if it could not be asked.
+        """
+        location = source.locate(codepoint)
+        start = time.perf_counter()
+        try:
+            if source.is_local:
+                if not os.path.exists(location):
+                    return None
+                with open(location, 'rb') as f:
+                    body = f.read()
+            else:
+                response = (self.client or get_default_client()).get(location)
+                if response.status == 404:
+                    return None
+                if not response.ok:
+                    raise TransientDownloadError(f"HTTP {response.status} from {source.name}")
+                body = response.body
+        except (TransientDownloadError, OSError):
+            with self._lock:
+                self.health[source.name].record_failure()
+            raise
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.health[source.name].record_success(latency)
+        return FetchResult(body, source, latency)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix=f"{self.name}-source")
+            return self._pool
+
+    def _hedge_delay(self, source: Source) -> Optional[float]:
+        if source.is_local:
+            return None
+        with self._lock:
+            return self.health[source.name].percentile(self.hedge_percentile)
+
+    def fetch(self, codepoint: int) -> Optional[FetchResult]:
+        """
+        Fetch the glyph from the best available source.
+        Returns None if every source that answered says it does not exist;
+        raises TransientDownloadError if no source could be reached.
+        """
+        candidates = self.ranked()
+        errors = []
+        in_flight = {}
+        pool = self._executor()
+
+        def launch():
+            source = candidates.pop(0)
+            in_flight[pool.submit(self._fetch_from, source, codepoint)] = source
+
+        while candidates or in_flight:
+            if not in_flight:
+                launch()
+
+            # Wait for the oldest request up to its latency percentile, then hedge
+            delay = self._hedge_delay(next(iter(in_flight.values()))) if candidates else None
+            done, _ = wait(list(in_flight), timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                with self._lock:
+                    self.hedged_requests += 1
+                launch()
+                continue
+
+            for future in done:
+                source = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except (TransientDownloadError, OSError) as e:
+                    errors.append(f"{source.name}: {e}")
+                    continue
+                if result is not None:
+                    # Losing hedged requests finish in the background and only update health
+                    return result
+
+        if errors:
+            raise TransientDownloadError(f"{self.name}: no source reachable ({'; '.join(errors)})")
+        return None
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                "dataset": self.name,
+                "hedged_requests": self.hedged_requests,
+                "sources": {name: health.as_dict() for name, health in self.health.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+
+def _local_source(env_var: str, name: str, pattern: str) -> Optional[Source]:
+    directory = os.environ.get(env_var)
+    if not directory:
+        return None
+    return Source(name, os.path.join(directory, pattern))
+
+
+def kanjivg_sources() -> SourceSet:
+    """KanjiVG SVGs: optional local checkout, GitHub raw, then jsDelivr."""
+    return SourceSet("kanjivg", [
+        _local_source("KANJIVG_DIR", "local-kanjivg", os.path.join("kanji", "{hex5}.svg")),
+        Source("github-raw", "https://raw.githubusercontent.com/KanjiVG/kanjivg/master/kanji/{hex5}.svg"),
+        Source("jsdelivr", "https://cdn.jsdelivr.net/gh/KanjiVG/kanjivg@master/kanji/{hex5}.svg"),
+    ])
+
+
+def hanzi_writer_sources() -> SourceSet:
+    """hanzi-writer-data JSON: optional local checkout, GitHub raw, then the npm CDN."""
+    return SourceSet("hanzi-writer", [
+        _local_source("HANZI_WRITER_DIR", "local-hanzi-writer", os.path.join("data", "{char}.json")),
+        Source("github-raw", "https://raw.githubusercontent.com/chanind/hanzi-writer-data/refs/heads/master/data/{char}.json"),
+        Source("jsdelivr-npm", "https://cdn.jsdelivr.net/npm/hanzi-writer-data@2.0/{char}.json"),
+    ])
+
+
+_default_sets: Dict[str, SourceSet] = {}
+_default_sets_lock = threading.Lock()
+
+
+def get_source_set(dataset: str) -> SourceSet:
+    """Process-wide SourceSet for "kanjivg" or "hanzi-writer", so health is shared."""
+    factories = {"kanjivg": kanjivg_sources, "hanzi-writer": hanzi_writer_sources}
+    with _default_sets_lock:
+        if dataset not in _default_sets:
+            _default_sets[dataset] = factories[dataset]()
+        return _default_sets[dataset]
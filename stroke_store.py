@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Lazy, cached access to glyphs in any of the pipeline's output formats.
+
+Usage:
+    from stroke_store import StrokeStore
+
+    store = StrokeStore("strokedata/kanastrokes.json", "chinese_corpus", "strokes.sqlite")
+    glyph = store["U+3042"]            # decoded on first access, then cached
+    glyph.stroke_count, glyph.stroke(0)[0].x
+    store.get_many(["U+4E00", "U+4E8C"])
+
+    python3 stroke_store.py strokedata/kanastrokes.json U+3042    # print one glyph
+    python3 stroke_store.py --memory strokedata/kanastrokes.json  # memory per glyph vs dicts
+
+Every tool used to open a JSON file and index it by "U+XXXX" itself. A
+StrokeStore opens one or more sources and looks a key up in each; when
+several have it, the last source wins, as the app merges its files (see
+stroke_inputs):
+
+    *.json            glyph JSON file, memory-mapped; entries are located by
+                      byte span in one scan (values are skipped, not parsed)
+                      and parsed only when requested; an empty file has none
+    directory         shard set written by chinese_stroke_fetcher.py --ranked
+                      (index.json + shards); a shard is mapped on first use
+    *.sqlite / *.db   database written by build_stroke_db.py; geometry BLOBs
+                      become glyphs without passing through dicts
+    *.dedup.json      deduplicated file written by dedupe_components.py
+
+Glyphs are kept in an LRU bounded by count. A Glyph stores all points of all
+strokes in one array('f') of interleaved x, y, t plus stroke offsets, about
+12 bytes per point instead of a dict per point; Point objects (__slots__) are
+only created when strokes are iterated. The per-glyph fields of the KanjiVG
+corpus are packed too: the timeline into one array('f'), the component tree
+into stroke ranges and parents (ComponentTree), and stroke types and element
+names into tuples of interned strings. Standard library only; as_numpy()
+and .dedup.json sources import NumPy when used.
+"""
+
+import json
+import os
+import sys
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from build_stroke_db import StrokeDB
+from stroke_data_server import map_file, scan_spans
+
+DEFAULT_CACHE_SIZE = 1024
+# Decimals written back when a glyph is converted to the JSON entry format
+ENTRY_PRECISION = 6
+# Decimals of timeline values, as stroke_timeline.build_timeline rounds them
+TIMELINE_PRECISION = 4
+
+# Entry fields held in Glyph slots rather than in Glyph.extra
+_GLYPH_FIELDS = {"character", "codepoint", "strokes"}
+# Extra fields Glyph holds packed, in slots of the same name
+_PACKED_FIELDS = ("stroke_types", "tree", "timeline")
+# Tree node fields held in ComponentTree.links rather than as attributes
+_TREE_NODE_FIELDS = {"element", "strokes", "parent"}
+
+
+class Point:
+    """One sampled point of a stroke (normalized x, y and seconds t)."""
+
+    __slots__ = ("x", "y", "t")
+
+    def __init__(self, x: float, y: float, t: float = 0.0):
+        self.x = x
+        self.y = y
+        self.t = t
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.t))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Point) and (self.x, self.y, self.t) == (other.x, other.y, other.t)
+
+    def __repr__(self) -> str:
+        return f"Point({self.x:.4f}, {self.y:.4f}, {self.t:.4f})"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ComponentTree:
+    """
+    A component tree (see download_kanji_strokes.py) in arrays: node i is
+    elements[i], and links[3i:3i + 3] holds the start and end of its stroke
+    range and its parent node (-1 for the root). Further node attributes
+    (radical, position, part, ...) are kept as flat (node, name, value)
+    triples.
+    """
+
+    __slots__ = ("elements", "links", "attributes")
+
+    def __init__(self, nodes: List[Dict]):
+        self.elements = tuple(sys.intern(node["element"]) for node in nodes)
+        self.links = array("h", [value for node in nodes for value in (*node["strokes"], node["parent"])])
+        self.attributes = tuple(item for index, node in enumerate(nodes)
+                                for name, value in node.items() if name not in _TREE_NODE_FIELDS
+                                for item in (index, sys.intern(name), _intern(value)))
+
+    @staticmethod
+    def packable(nodes) -> bool:
+        """Whether a "tree" value has the shape download_kanji_strokes.py writes."""
+        return isinstance(nodes, list) and all(
+            isinstance(node, dict) and isinstance(node.get("element"), str)
+            and isinstance(node.get("parent"), int) and -1 <= node["parent"] < len(nodes)
+            and isinstance(node.get("strokes"), list) and len(node["strokes"]) == 2
+            and all(isinstance(bound, int) and 0 <= bound < 1 << 15 for bound in node["strokes"])
+            for node in nodes)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def nodes(self) -> List[Dict]:
+        """The tree as JSON nodes."""
+        links = self.links
+        nodes = [{"element": element, "strokes": [links[3 * index], links[3 * index + 1]],
+                  "parent": links[3 * index + 2]} for index, element in enumerate(self.elements)]
+        attributes = self.attributes
+        for i in range(0, len(attributes), 3):
+            nodes[attributes[i]][attributes[i + 1]] = attributes[i + 2]
+        return nodes
+
+
+def _pack(name: str, value):
+    """
+    Packed form of a stroke_types, tree or timeline value: a tuple of
+    interned strings, a ComponentTree, or starts, durations, pause and total
+    in one array('f'). None for other fields and for values of another shape.
+    """
+    if name == "stroke_types" and isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return tuple(sys.intern(item) for item in value)
+    if name == "tree" and ComponentTree.packable(value):
+        return ComponentTree(value)
+    if (name == "timeline" and isinstance(value, dict) and set(value) == {"start", "duration", "pause", "total"}
+            and len(value["start"]) == len(value["duration"])):
+        return array("f", [*value["start"], *value["duration"], value["pause"], value["total"]])
+    return None
+
+
+def _unpack_timeline(packed: array) -> Dict:
+    values = [round(value, TIMELINE_PRECISION) for value in packed]
+    count = (len(values) - 2) // 2
+    return {"start": values[:count], "duration": values[count:2 * count],
+            "pause": values[-2], "total": values[-1]}
+
+
+class Glyph:
+    """
+    A glyph with its points in flat arrays: coords holds x, y, t for every
+    point of every stroke and stroke i spans points offsets[i]:offsets[i + 1].
+    stroke_types, tree and timeline are held packed (see the module
+    docstring) and other entry fields (transform, ...) in `extra`, None if
+    there are none; extra fields are read with get_extra() and written with
+    set_extra().
+    """
+
+    __slots__ = ("key", "character", "codepoint", "coords", "offsets",
+                 "stroke_types", "tree", "timeline", "extra")
+
+    def __init__(self, key: str, character: str, codepoint: int, coords: array, offsets: array,
+                 extra: Optional[Dict] = None):
+        self.key = key
+        self.character = character
+        self.codepoint = codepoint
+        self.coords = coords
+        self.offsets = offsets
+        self.stroke_types: Optional[Tuple[str, ...]] = None
+        self.tree: Optional[ComponentTree] = None
+        self.timeline: Optional[array] = None
+        self.extra: Optional[Dict] = None
+        for name, value in (extra or {}).items():
+            self.set_extra(name, value)
+
+    def set_extra(self, name: str, value):
+        """Set an entry field other than character, codepoint and strokes, packing it if it can be."""
+        if self.extra:
+            self.extra.pop(name, None)
+        packed = _pack(name, value)
+        if name in _PACKED_FIELDS:
+            setattr(self, name, packed)
+        if packed is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[name] = value
+
+    def get_extra(self, name: str, default=None):
+        """An entry field other than character, codepoint and strokes, unpacked."""
+        return self.extra_fields().get(name, default)
+
+    def extra_fields(self) -> Dict:
+        """Every entry field other than character, codepoint and strokes, as JSON values."""
+        fields = dict(self.extra or {})
+        if self.stroke_types is not None:
+            fields["stroke_types"] = list(self.stroke_types)
+        if self.tree is not None:
+            fields["tree"] = self.tree.nodes()
+        if self.timeline is not None:
+            fields["timeline"] = _unpack_timeline(self.timeline)
+        return fields
+
+    @classmethod
+    def from_entry(cls, key: str, entry: Dict) -> "Glyph":
+        """Build from a JSON entry {"character", "codepoint", "strokes": [[{x, y, t}]]}."""
+        strokes = [stroke for stroke in entry.get("strokes") or [] if stroke]
+        coords = array("f", [value for stroke in strokes for point in stroke
+                             for value in (point["x"], point["y"], point.get("t", 0.0))])
+        offsets = array("I", [0])
+        for stroke in strokes:
+            offsets.append(offsets[-1] + len(stroke))
+        extra = {name: value for name, value in entry.items() if name not in _GLYPH_FIELDS}
+        return cls(key, entry.get("character", ""), entry.get("codepoint", 0), coords, offsets, extra)
+
+    @classmethod
+    def from_strokes(cls, key: str, character: str, codepoint: int,
+                     strokes: Sequence[Sequence[Sequence[float]]], extra: Optional[Dict] = None) -> "Glyph":
+        """Build from (x, y) point sequences, as produced by the pipelines; t is 0 until retimed."""
+        coords = array("f")
+        offsets = array("I", [0])
+        for stroke in strokes:
+            if not stroke:
+                continue
+            for point in stroke:
+                coords.extend((point[0], point[1], 0.0))
+            offsets.append(offsets[-1] + len(stroke))
+        return cls(key, character, codepoint, coords, offsets, extra)
+
+    @classmethod
+    def from_blob(cls, key: str, character: str, codepoint: int, blob: bytes,
+                  extra: Optional[str] = None) -> "Glyph":
+        """Build from a build_stroke_db.py geometry BLOB (little-endian counts, then float32 x, y, t)."""
+        stroke_count = int.from_bytes(blob[:2], "little")
+        counts = array("H", blob[2:2 + 2 * stroke_count])
+        coords = array("f", blob[2 + 2 * stroke_count:])
+        if sys.byteorder == "big":
+            counts.byteswap()
+            coords.byteswap()
+        offsets = array("I", [0])
+        for count in counts:
+            offsets.append(offsets[-1] + count)
+        return cls(key, character, codepoint, coords, offsets, json.loads(extra) if extra else None)
+
+    @property
+    def stroke_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def point_count(self) -> int:
+        return self.offsets[-1]
+
+    def stroke(self, index: int) -> List[Point]:
+        coords = self.coords
+        return [Point(coords[i], coords[i + 1], coords[i + 2])
+                for i in range(3 * self.offsets[index], 3 * self.offsets[index + 1], 3)]
+
+    @property
+    def strokes(self) -> List[List[Point]]:
+        return [self.stroke(index) for index in range(self.stroke_count)]
+
+    def xy(self, index: int) -> List[Tuple[float, float]]:
+        """(x, y) tuples of one stroke, for code that ignores timing."""
+        coords = self.coords
+        return [(coords[i], coords[i + 1]) for i in range(3 * self.offsets[index], 3 * self.offsets[index + 1], 3)]
+
+    def xy_strokes(self) -> List[List[Tuple[float, float]]]:
+        return [self.xy(index) for index in range(self.stroke_count)]
+
+    def as_numpy(self):
+        """(points, offsets): a (point_count, 3) float32 view of coords and the offsets as int64."""
+        import numpy as np
+        points = np.frombuffer(self.coords, dtype=np.float32).reshape(-1, 3)
+        return points, np.frombuffer(self.offsets, dtype=np.uint32).astype(np.int64)
+
+    def to_entry(self, precision: int = ENTRY_PRECISION) -> Dict:
+        """The JSON entry format, for writers."""
+        coords = self.coords
+        strokes = []
+        for index in range(self.stroke_count):
+            strokes.append([{"x": round(coords[i], precision), "y": round(coords[i + 1], precision),
+                             "t": round(coords[i + 2], precision)}
+                            for i in range(3 * self.offsets[index], 3 * self.offsets[index + 1], 3)])
+        entry = {"character": self.character, "codepoint": self.codepoint, "strokes": strokes}
+        entry.update(self.extra_fields())
+        return entry
+
+    def __repr__(self) -> str:
+        return f"Glyph({self.key} {self.character!r}, {self.stroke_count} strokes, {self.point_count} points)"
+
+
+class JsonSource:
+    """A glyph JSON file, memory-mapped and indexed by entry byte span."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._map = map_file(path)
+        self.spans = scan_spans(self._map)
+
+    def keys(self) -> Iterable[str]:
+        return self.spans.keys()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.spans
+
+    def load(self, key: str) -> Optional[Glyph]:
+        span = self.spans.get(key)
+        if span is None:
+            return None
+        return Glyph.from_entry(key, json.loads(self._map[span[0]:span[1]]))
+
+
+class ShardSource:
+    """A shard directory (index.json + shards); each shard opens on first use."""
+
+    def __init__(self, directory: str, index_name: str = "index.json"):
+        self.directory = directory
+        with open(os.path.join(directory, index_name), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self._files = [shard["file"] for shard in index["shards"]]
+        self._shard_of = {item["key"]: item["shard"] for item in index["characters"]}
+        self._open: Dict[int, JsonSource] = {}
+
+    def keys(self) -> Iterable[str]:
+        return self._shard_of.keys()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._shard_of
+
+    def load(self, key: str) -> Optional[Glyph]:
+        shard = self._shard_of.get(key)
+        if shard is None:
+            return None
+        if shard not in self._open:
+            self._open[shard] = JsonSource(os.path.join(self.directory, self._files[shard]))
+        return self._open[shard].load(key)
+
+
+class SqliteSource:
+    """A database written by build_stroke_db.py."""
+
+    def __init__(self, path: str):
+        self.db = StrokeDB(path)
+
+    def keys(self) -> Iterable[str]:
+        return self.db.keys()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.db
+
+    def load(self, key: str) -> Optional[Glyph]:
+        row = self.db.raw(key)
+        return Glyph.from_blob(key, *row) if row else None
+
+
+class DedupSource:
+    """A deduplicated file written by dedupe_components.py."""
+
+    def __init__(self, path: str):
+        # Imported here: dedupe_components needs NumPy, the other sources do not
+        from dedupe_components import DedupedGlyphs
+        # The store does the caching; decode every request
+        self.glyphs = DedupedGlyphs(path, cache_size=0)
+
+    def keys(self) -> Iterable[str]:
+        return self.glyphs.keys()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.glyphs
+
+    def load(self, key: str) -> Optional[Glyph]:
+        entry = self.glyphs.get(key)
+        return Glyph.from_entry(key, entry) if entry else None
+
+
+def open_source(path: str):
+    """Pick the source type for a path (see the module docstring)."""
+    if os.path.isdir(path):
+        return ShardSource(path)
+    if path.endswith((".sqlite", ".db")):
+        return SqliteSource(path)
+    if path.endswith(".dedup.json"):
+        return DedupSource(path)
+    return JsonSource(path)
+
+
+class StrokeStore:
+    """Read-through LRU cache of Glyphs over one or more sources."""
+
+    def __init__(self, *paths: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.sources = [open_source(path) for path in paths]
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Glyph]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Glyph]:
+        glyph = self._cache.get(key)
+        if glyph is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return glyph
+        self.misses += 1
+        for source in reversed(self.sources):
+            glyph = source.load(key)
+            if glyph is not None:
+                break
+        else:
+            return None
+        if self.cache_size:
+            self._cache[key] = glyph
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return glyph
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Glyph]:
+        """Glyphs for several keys, in request order; missing keys are left out."""
+        result = {}
+        for key in keys:
+            glyph = self.get(key)
+            if glyph is not None:
+                result[key] = glyph
+        return result
+
+    def __getitem__(self, key: str) -> Glyph:
+        glyph = self.get(key)
+        if glyph is None:
+            raise KeyError(key)
+        return glyph
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._cache or any(key in source for source in self.sources)
+
+    def keys(self) -> List[str]:
+        """Keys of all sources, first occurrence first."""
+        seen = OrderedDict()
+        for source in self.sources:
+            for key in source.keys():
+                seen.setdefault(key, None)
+        return list(seen)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def stats(self) -> Dict:
+        return {"cached": len(self._cache), "cache_size": self.cache_size, "hits": self.hits, "misses": self.misses}
+
+
+def measure_memory(path: str) -> Dict:
+    """Bytes allocated per glyph for every glyph of a JSON file: plain dicts vs Glyph."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = json.loads(text)
+    as_dicts = tracemalloc.get_traced_memory()[0] - before
+
+    glyphs = [Glyph.from_entry(key, entry) for key, entry in entries.items()]
+    # What the glyphs retain once the dicts are gone, including shared extra values
+    del entries
+    as_glyphs = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    count = len(glyphs)
+    return {"glyphs": count, "dict_bytes_per_glyph": as_dicts // count,
+            "glyph_bytes_per_glyph": as_glyphs // count, "ratio": round(as_dicts / as_glyphs, 2)}
+
+
+def main():
+    args = sys.argv[1:]
+
+    if "--memory" in args:
+        args.remove("--memory")
+        print("🧮 Glyph Memory Comparison")
+        print("=" * 50)
+        for path in args:
+            result = measure_memory(path)
+            print(f"  {path}: {result['glyphs']} glyphs, {result['dict_bytes_per_glyph']:,} B/glyph as dicts, "
+                  f"{result['glyph_bytes_per_glyph']:,} B/glyph as Glyph ({result['ratio']}x)")
+        return
+
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    store = StrokeStore(*args[:-1])
+    glyph = store.get(args[-1])
+    if glyph is None:
+        print(f"❌ {args[-1]} not found in {', '.join(args[:-1])}")
+        sys.exit(1)
+    print(glyph)
+    for index in range(glyph.stroke_count):
+        points = glyph.stroke(index)
+        print(f"  stroke {index + 1}: {len(points)} points, {points[0]} → {points[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Precompute realistic stroke-order animation timing.
+
+Usage:
+    python3 stroke_timeline.py                         # retime the files in strokedata/
+    python3 stroke_timeline.py strokedata/kanastrokes.json --speed 1.5 --pause 0.25
+
+The point timestamps `t` used to be placeholders: `point_idx * 0.05` in the
+kana converter (unbounded, and the same for a dot and a long sweep) or
+index/(n-1) elsewhere. This stage derives them from the geometry instead:
+
+- each stroke lasts MIN_STROKE_DURATION plus its arc length / STROKE_SPEED
+- within a stroke, progress along the arc follows a minimum-jerk velocity
+  profile (slow start, fast middle, slow finish), like a real pen
+- strokes are separated by INTER_STROKE_PAUSE
+
+Per-point `t` stays relative to its stroke (first point t = 0, seconds,
+non-decreasing), so existing loaders read it unchanged. Each glyph also gets
+a "timeline" with cumulative stroke offsets:
+
+    "timeline": {"start": [0.0, 0.74, ...], "duration": [0.44, 0.61, ...],
+                 "pause": 0.3, "total": 2.9}
+
+A player only needs the elapsed time: binary search `start` for the stroke,
+then binary search that stroke's `t` for the point (see `locate`).
+"""
+
+import bisect
+import json
+import math
+import sys
+from typing import Dict, List, Tuple
+
+from stroke_inputs import DEFAULT_FILES, existing
+from stroke_writer import read_manifest, write_glyphs
+
+
+# Pen speed in normalized glyph units (glyph box = 1.0) per second
+STROKE_SPEED = 1.2
+# Even a dot takes this long to draw (seconds)
+MIN_STROKE_DURATION = 0.15
+# Pen-up time between strokes (seconds)
+INTER_STROKE_PAUSE = 0.3
+
+# Samples of the minimum-jerk profile used to invert it
+_PROFILE_SAMPLES = 256
+
+
+def _minimum_jerk(tau: float) -> float:
+    """Fraction of the path covered at normalized time tau (0-1)."""
+    return tau ** 3 * (10 - 15 * tau + 6 * tau * tau)
+
+
+# Monotonic table of (path fraction -> time fraction) for bisect lookups
+_PROFILE_TAU = [i / _PROFILE_SAMPLES for i in range(_PROFILE_SAMPLES + 1)]
+_PROFILE_S = [_minimum_jerk(tau) for tau in _PROFILE_TAU]
+
+
+def time_fraction(path_fraction: float) -> float:
+    """Inverse of the minimum-jerk profile: when the pen reaches `path_fraction`."""
+    if path_fraction <= 0.0:
+        return 0.0
+    if path_fraction >= 1.0:
+        return 1.0
+    hi = bisect.bisect_left(_PROFILE_S, path_fraction)
+    lo = hi - 1
+    span = _PROFILE_S[hi] - _PROFILE_S[lo]
+    blend = (path_fraction - _PROFILE_S[lo]) / span if span else 0.0
+    return _PROFILE_TAU[lo] + blend * (_PROFILE_TAU[hi] - _PROFILE_TAU[lo])
+
+
+def arc_lengths(points: List[Tuple[float, float]]) -> List[float]:
+    """Cumulative distance along the polyline at each point."""
+    lengths = [0.0]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        lengths.append(lengths[-1] + math.hypot(x1 - x0, y1 - y0))
+    return lengths
+
+
+def time_stroke(points: List[Tuple[float, float]], speed: float = STROKE_SPEED) -> Tuple[List[float], float]:
+    """Per-point timestamps (seconds from stroke start) and the stroke duration."""
+    lengths = arc_lengths(points)
+    total = lengths[-1] if lengths else 0.0
+    duration = MIN_STROKE_DURATION + total / speed
+    if total == 0:
+        return [0.0] * len(points), duration
+    return [round(duration * time_fraction(length / total), 4) for length in lengths], duration
+
+
+def build_timeline(strokes: List[List[Tuple[float, float]]], speed: float = STROKE_SPEED,
+                   pause: float = INTER_STROKE_PAUSE) -> Tuple[List[List[float]], Dict]:
+    """Per-stroke point times plus the glyph timeline with cumulative offsets."""
+    times, starts, durations = [], [], []
+    clock = 0.0
+    for index, stroke in enumerate(strokes):
+        if index:
+            clock += pause
+        stroke_times, duration = time_stroke(stroke, speed)
+        times.append(stroke_times)
+        starts.append(round(clock, 4))
+        durations.append(round(duration, 4))
+        clock += duration
+    timeline = {"start": starts, "duration": durations, "pause": pause, "total": round(clock, 4)}
+    return times, timeline
+
+
+def retime_entry(entry: Dict, speed: float = STROKE_SPEED, pause: float = INTER_STROKE_PAUSE) -> Dict:
+    """Rewrite `t` of every point of a glyph entry in place and attach its timeline."""
+    strokes = entry.get("strokes") or []
+    points = [[(point["x"], point["y"]) for point in stroke] for stroke in strokes]
+    times, timeline = build_timeline(points, speed, pause)
+    for stroke, stroke_times in zip(strokes, times):
+        for point, t in zip(stroke, stroke_times):
+            point["t"] = t
+    entry["timeline"] = timeline
+    return entry
+
+
+def retime_glyph(glyph, speed: float = STROKE_SPEED, pause: float = INTER_STROKE_PAUSE):
+    """retime_entry for an array-backed stroke_store.Glyph: `t` is written into its coords."""
+    times, timeline = build_timeline(glyph.xy_strokes(), speed, pause)
+    coords = glyph.coords
+    for index, stroke_times in enumerate(times):
+        first = 3 * glyph.offsets[index] + 2
+        for offset, t in enumerate(stroke_times):
+            coords[first + 3 * offset] = t
+    glyph.set_extra("timeline", timeline)
+    return glyph
+
+
+def locate(entry: Dict, elapsed: float) -> Tuple[int, int]:
+    """
+    (stroke index, number of points drawn in that stroke) at `elapsed`
+    seconds, using only the precomputed times. Reference for client playback.
+    """
+    timeline = entry["timeline"]
+    stroke = max(bisect.bisect_right(timeline["start"], elapsed) - 1, 0)
+    local = elapsed - timeline["start"][stroke]
+    times = [point["t"] for point in entry["strokes"][stroke]]
+    return stroke, bisect.bisect_right(times, local)
+
+
+def retime_file(path: str, speed: float = STROKE_SPEED, pause: float = INTER_STROKE_PAUSE) -> int:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for entry in data.values():
+        retime_entry(entry, speed, pause)
+    # Keep whatever the file was built with and add the timing used here
+    manifest = read_manifest(path)
+    params = dict(manifest["params"] if manifest else {}, speed=speed, pause=pause)
+    return write_glyphs(path, data.items(), params=params)
+
+
+def main():
+    args = sys.argv[1:]
+    speed, pause = STROKE_SPEED, INTER_STROKE_PAUSE
+    if '--speed' in args:
+        idx = args.index('--speed')
+        speed = float(args[idx + 1])
+        del args[idx:idx + 2]
+    if '--pause' in args:
+        idx = args.index('--pause')
+        pause = float(args[idx + 1])
+        del args[idx:idx + 2]
+    paths = args or existing(DEFAULT_FILES)
+
+    print("⏱️  Stroke Timeline Precomputation")
+    print("=" * 50)
+    for path in paths:
+        count = retime_file(path, speed, pause)
+        print(f"✅ {path}: {count} glyphs retimed")
+
+
+if __name__ == "__main__":
+    main()
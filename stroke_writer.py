@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Streaming writer for glyph JSON files, and crash-safe publishing of every
+build artifact.
+
+Usage:
+    from stroke_writer import GlyphJSONWriter, atomic_open, is_current
+
+    with GlyphJSONWriter("strokedata/kanastrokes.json", params={...}) as writer:
+        for glyph in glyphs:                    # e.g. as each one is downloaded
+            writer.write(glyph.key, glyph.to_entry())
+
+    with atomic_open("validation_report.json") as f:
+        json.dump(report, f, indent=2)
+
+    python3 stroke_writer.py --verify strokedata/*.json   # re-hash against manifests
+
+The pipelines used to collect every glyph in one dict and call json.dump at
+the end, so memory grew with the corpus and nothing was written until the
+last download finished. GlyphJSONWriter serializes each entry as soon as it
+is handed over, inside the usual {"U+XXXX": {...}, ...} wrapper.
+
+Nothing is ever written to an output path directly. Every file goes to
+`<path>.tmp` first, is fsynced and renamed over the output, and the
+directory is fsynced so the rename survives a power cut. An exception
+removes the temporary file, so an interrupted run never leaves a truncated
+kanastrokes.json behind (the previous file, if any, stays as it was).
+
+Glyph files (and the other artifacts that opt in) also get a sidecar
+`<path>.manifest.json`:
+
+    {"version": 1, "file": "kanastrokes.json", "sha256": "...", "bytes": 580852,
+     "glyphs": 172, "params": {...build parameters...}}
+
+It is written after the artifact is in place. While the artifact still has
+the recorded size and is not newer than its manifest, the manifest is
+trusted without re-reading the artifact, so consumers can use the hash as a
+content version and builders can skip an output whose inputs (by hash) and
+parameters have not changed (see is_current). verify_manifest re-hashes the
+file when that is not enough.
+
+The bytes GlyphJSONWriter writes are exactly what json.dump(data, f,
+ensure_ascii=False, indent=indent) produces for the same entries in the
+same order; indent=None gives the compact form used for shards (separators
+',' and ':').
+"""
+
+import hashlib
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, IO, Optional, Tuple
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+TEMP_SUFFIX = ".tmp"
+HASH_CHUNK = 1 << 20
+
+
+def _fsync_directory(path: str):
+    """Make a rename inside the directory of `path` durable (POSIX only)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _prepare(path: str) -> str:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return path + TEMP_SUFFIX
+
+
+def publish(temp_path: str, path: str):
+    """Flush a finished temporary file to disk and rename it over `path`."""
+    with open(temp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _fsync_directory(path)
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = 'w') -> Iterator[IO]:
+    """
+    open() for writing that publishes `path` only if the block succeeds:
+    the data goes to a temporary file that is fsynced and renamed over
+    `path`. Text modes use UTF-8.
+    """
+    temp_path = _prepare(path)
+    f = open(temp_path, mode) if 'b' in mode else open(temp_path, mode, encoding='utf-8')
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        os.remove(temp_path)
+        raise
+    f.close()
+    publish(temp_path, path)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(path: str) -> str:
+    return path + MANIFEST_SUFFIX
+
+
+def write_manifest(path: str, glyphs: Optional[int] = None, params: Optional[Dict] = None,
+                   sha256: Optional[str] = None) -> Dict:
+    """Record hash, size, glyph count and build parameters of the artifact at `path`."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "file": os.path.basename(path),
+        "sha256": sha256 or file_sha256(path),
+        "bytes": os.path.getsize(path),
+        "glyphs": glyphs,
+        "params": params or {},
+    }
+    with atomic_open(manifest_path(path)) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(path: str) -> Optional[Dict]:
+    """
+    The manifest of `path` if it still describes the file on disk (same
+    size, artifact not modified after the manifest was written), else None.
+    Does not read the artifact.
+    """
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        artifact, sidecar = os.stat(path), os.stat(manifest_path(path))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("bytes") != artifact.st_size or artifact.st_mtime_ns > sidecar.st_mtime_ns:
+        return None
+    return manifest
+
+
+def verify_manifest(path: str) -> bool:
+    """Re-hash `path` and compare it with its manifest."""
+    manifest = read_manifest(path)
+    return manifest is not None and file_sha256(path) == manifest["sha256"]
+
+
+def artifact_sha256(path: str) -> str:
+    """SHA-256 of a file, taken from its manifest when that is current."""
+    manifest = read_manifest(path)
+    return manifest["sha256"] if manifest else file_sha256(path)
+
+
+def input_hashes(paths: Iterable[str]) -> Dict[str, str]:
+    """{path: sha256} of build inputs, for the params of a derived artifact."""
+    return {path: artifact_sha256(path) for path in paths}
+
+
+def is_current(path: str, params: Dict) -> bool:
+    """True if `path` exists with a current manifest built from exactly `params`."""
+    manifest = read_manifest(path)
+    return manifest is not None and manifest["params"] == json.loads(json.dumps(params))
+
+
+class GlyphJSONWriter:
+    """
+    Writes one JSON object entry by entry, hashing as it goes, and publishes
+    it by atomic rename plus a manifest (unless manifest=False).
+    """
+
+    def __init__(self, path: str, indent: Optional[int] = 2, params: Optional[Dict] = None,
+                 manifest: bool = True):
+        self.path = path
+        self.indent = indent
+        self.params = params
+        self.manifest = manifest
+        self.count = 0
+        self.bytes = 0
+        self.sha256: Optional[str] = None
+        self._digest = hashlib.sha256()
+        self.temp_path = _prepare(path)
+        self._file = open(self.temp_path, 'wb')
+        self._emit('{')
+
+    def _emit(self, text: str):
+        data = text.encode('utf-8')
+        self._digest.update(data)
+        self._file.write(data)
+        self.bytes += len(data)
+
+    def write(self, key: str, entry: Dict):
+        """Append one entry; keys are expected to be unique."""
+        name = json.dumps(key, ensure_ascii=False)
+        if self.indent is None:
+            value = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+            self._emit(f"{',' if self.count else ''}{name}:{value}")
+        else:
+            # Nest the entry one level deeper, as json.dump does for object members
+            newline = '\n' + ' ' * self.indent
+            value = json.dumps(entry, ensure_ascii=False, indent=self.indent).replace('\n', newline)
+            self._emit(f"{',' if self.count else ''}{newline}{name}: {value}")
+        self.count += 1
+
+    def close(self):
+        """Finish the object, rename the temporary file over the output and write the manifest."""
+        if self._file.closed:
+            return
+        self._emit('\n}' if self.indent is not None and self.count else '}')
+        self._file.close()
+        publish(self.temp_path, self.path)
+        self.sha256 = self._digest.hexdigest()
+        if self.manifest:
+            write_manifest(self.path, self.count, self.params, self.sha256)
+
+    def abort(self):
+        """Drop everything written so far; the output path is left untouched."""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self) -> "GlyphJSONWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_glyphs(path: str, entries: Iterable[Tuple[str, Dict]], indent: Optional[int] = 2,
+                 params: Optional[Dict] = None) -> int:
+    """Stream (key, entry) pairs to `path`; returns the number written."""
+    with GlyphJSONWriter(path, indent, params) as writer:
+        for key, entry in entries:
+            writer.write(key, entry)
+    return writer.count
+
+
+def main():
+    args = sys.argv[1:]
+    if '--verify' not in args:
+        print("Usage: python3 stroke_writer.py --verify FILE [FILE ...]")
+        sys.exit(2)
+    args.remove('--verify')
+
+    print("🔏 Artifact Manifest Check")
+    print("=" * 50)
+    failures = 0
+    for path in args:
+        if path.endswith(MANIFEST_SUFFIX):
+            continue
+        manifest = read_manifest(path)
+        if manifest is None:
+            print(f"  ⚠️  {path}: no current manifest")
+            failures += 1
+        elif file_sha256(path) != manifest["sha256"]:
+            print(f"  ❌ {path}: SHA-256 mismatch")
+            failures += 1
+        else:
+            glyphs = f", {manifest['glyphs']} glyphs" if manifest["glyphs"] is not None else ""
+            print(f"  ✅ {path}: {manifest['bytes']:,} bytes{glyphs}, sha256 {manifest['sha256'][:12]}…")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
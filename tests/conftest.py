@@ -0,0 +1,7 @@
+"""Make the repository's scripts (root and Chinese/) importable from the tests."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "Chinese")]
@@ -0,0 +1,23 @@
+"""Character list formats read by chinese_stroke_fetcher.load_character_list."""
+
+import pytest
+
+from chinese_stroke_fetcher import load_character_list
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Delimited lists keep every character, in order
+    ("一,右,雨,円,王\n", ["一", "右", "雨", "円", "王"]),
+    ("山 川|木;火\n", ["山", "川", "木", "火"]),
+    # Frequency tables give one character per row
+    ("1\t的\t7922684\n2\t一\t3050722\n", ["的", "一"]),
+    ("3,是,0.0281\n", ["是"]),
+    # Bare strings and one character per line
+    ("人口手日月\n", ["人", "口", "手", "日", "月"]),
+    ("# comment\n水\n\n火\n", ["水", "火"]),
+    ("HSK1,爱\n", ["爱"]),
+])
+def test_line_formats(tmp_path, text, expected):
+    path = tmp_path / "characters.txt"
+    path.write_text(text, encoding="utf-8")
+    assert load_character_list(str(path)) == expected
@@ -0,0 +1,23 @@
+"""Report findings matched to the contact sheet set that owns the reported file."""
+
+import json
+
+from render_contact_sheets import load_flags
+
+
+def test_shard_findings_flag_the_directory_set(tmp_path):
+    corpus = tmp_path / "chinese_corpus"
+    corpus.mkdir()
+    (corpus / "index.json").write_text(json.dumps({
+        "shards": [{"file": "chinese_strokes_0000.json"}, {"file": "chinese_strokes_0001.json"}],
+        "characters": []}), encoding="utf-8")
+    validation = tmp_path / "validation_report.json"
+    validation.write_text(json.dumps({"issues": [
+        {"file": "chinese_corpus/chinese_strokes_0001.json", "key": "U+4E00", "severity": "error",
+         "check": "bounds", "message": "x out of range"},
+        {"file": "strokedata/kanastrokes.json", "key": "U+3042", "severity": "warning",
+         "check": "timing", "message": "t not increasing"}]}), encoding="utf-8")
+
+    flags = load_flags(str(validation), None, [str(corpus), "strokedata/kanastrokes.json"])
+
+    assert set(flags) == {("chinese_corpus", "U+4E00"), ("kanastrokes", "U+3042")}
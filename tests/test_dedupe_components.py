@@ -0,0 +1,49 @@
+"""Round-trip error of dedupe_components against the literal stroke points."""
+
+import math
+
+import numpy as np
+
+from dedupe_components import DEFAULT_TOLERANCE, deduplicate, decode_parts, round_trip_error
+
+
+def _stroke(points):
+    return [{"x": x, "y": y, "t": i / max(len(points) - 1, 1)} for i, (x, y) in enumerate(points)]
+
+
+def _glyph(character, dx):
+    # 口-like box (shared; the second stroke has a corner) followed by a wavy stroke (shared
+    # element, but with more detail than 12 resampled points can follow)
+    box = [_stroke([(0.1 + dx, 0.1), (0.1 + dx, 0.4)]),
+           _stroke([(0.1 + dx, 0.1), (0.4 + dx, 0.1), (0.4 + dx, 0.4)]),
+           _stroke([(0.1 + dx, 0.4), (0.4 + dx, 0.4)])]
+    wave = [_stroke([(0.1 + dx + 0.3 * i / 400, 0.7 + 0.05 * math.sin(i / 400 * 8 * math.pi))
+                     for i in range(401)])]
+    return {
+        "character": character,
+        "codepoint": ord(character),
+        "strokes": box + wave,
+        "tree": [{"element": character, "parent": -1, "strokes": [0, 4]},
+                 {"element": "口", "parent": 0, "strokes": [0, 3]},
+                 {"element": "乙", "parent": 0, "strokes": [3, 4]}],
+    }
+
+
+def test_every_glyph_decodes_within_tolerance():
+    data = {"A": _glyph("甲", 0.0), "B": _glyph("乙", 0.3)}
+    document, report = deduplicate(data)
+    shapes = [np.asarray(component["strokes"]) for component in document["components"]]
+
+    assert report["over_tolerance"] == []
+    for key, entry in data.items():
+        decoded = decode_parts(document["glyphs"][key]["parts"], shapes)
+        assert round_trip_error(entry["strokes"], decoded) <= DEFAULT_TOLERANCE
+
+
+def test_component_the_resample_cannot_follow_stays_literal():
+    document, _ = deduplicate({"A": _glyph("甲", 0.0), "B": _glyph("乙", 0.3)})
+
+    assert [component["element"] for component in document["components"]] == ["口"]
+    for glyph in document["glyphs"].values():
+        assert glyph["parts"][0]["ref"] == 0
+        assert len(glyph["parts"][1]["strokes"][0]) == 401
@@ -0,0 +1,40 @@
+"""stroke_store.Glyph packs the KanjiVG corpus fields and gives them back unchanged."""
+
+from stroke_store import ComponentTree, Glyph
+from stroke_timeline import retime_glyph
+
+ENTRY = {
+    "character": "休",
+    "codepoint": 0x4F11,
+    "strokes": [[{"x": 0.25, "y": 0.125, "t": 0.0}, {"x": 0.5, "y": 0.75, "t": 0.25}]] * 6,
+    "stroke_types": ["㇒", "㇑", "㇐", "㇑", "㇒", "㇏"],
+    "tree": [{"element": "休", "strokes": [0, 6], "parent": -1},
+             {"element": "亻", "strokes": [0, 2], "parent": 0, "radical": "general", "position": "left"},
+             {"element": "木", "strokes": [2, 6], "parent": 0, "position": "right"}],
+    "timeline": {"start": [0.0, 0.5512, 1.1024, 1.6536, 2.2048, 2.756],
+                 "duration": [0.2512] * 6, "pause": 0.3, "total": 3.0072},
+    "transform": {"scale": 0.5},
+}
+
+
+def test_packed_fields_round_trip():
+    glyph = Glyph.from_entry("U+4F11", ENTRY)
+
+    assert isinstance(glyph.tree, ComponentTree) and len(glyph.tree) == 3
+    assert glyph.extra == {"transform": {"scale": 0.5}}
+    assert glyph.to_entry() == ENTRY
+
+
+def test_unexpected_shapes_stay_unpacked():
+    entry = dict(ENTRY, tree="休", timeline={"start": [0.0]})
+    glyph = Glyph.from_entry("U+4F11", entry)
+
+    assert glyph.tree is None and glyph.timeline is None
+    assert glyph.to_entry() == entry
+
+
+def test_retimed_glyph_keeps_its_timeline_packed():
+    glyph = retime_glyph(Glyph.from_strokes("U+4E00", "一", 0x4E00, [[(0.1, 0.5), (0.9, 0.5)]]))
+
+    assert glyph.extra is None
+    assert glyph.get_extra("timeline")["start"] == [0.0]
@@ -0,0 +1,38 @@
+"""The source prober (Chinese/test_urls.py) against its local stand-in server."""
+
+import pytest
+
+from stroke_sources import Source
+from test_urls import probe_source, start_stand_in_server
+
+CHARACTERS = list("一二三四五六七八九十百千万人口日月山川木")
+
+
+@pytest.fixture
+def stand_in(request):
+    server = start_stand_in_server(**request.param)
+    yield Source("stand-in", f"http://127.0.0.1:{server.server_address[1]}/{{char}}.json")
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("stand_in", [{"min_latency": 0.005, "max_latency": 0.005, "missing_rate": 0.0}],
+                         indirect=True)
+def test_prober_measures_injected_latency(stand_in):
+    run = probe_source(stand_in, CHARACTERS, concurrency=4)
+    assert run["requests"] == len(CHARACTERS)
+    assert run["by_status"] == {"200": len(CHARACTERS)}
+    assert run["error_rate"] == 0.0
+    # 5 ms injected; a Nagle/delayed-ACK stall would add ~40 ms per response
+    assert 5.0 <= run["p50_ms"] < 30.0
+    # 4 connections at most, reused for the other requests
+    assert run["connection_reuse_ratio"] >= 0.75
+
+
+@pytest.mark.parametrize("stand_in", [{"min_latency": 0.0, "max_latency": 0.001, "missing_rate": 1.0}],
+                         indirect=True)
+def test_prober_reports_missing_characters(stand_in):
+    run = probe_source(stand_in, CHARACTERS, concurrency=2)
+    assert run["by_status"] == {"404": len(CHARACTERS)}
+    assert run["error_rate"] == 1.0
+    assert run["p50_ms"] is None
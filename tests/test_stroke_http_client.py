@@ -0,0 +1,137 @@
+"""PooledHTTPClient, RetryPolicy and CircuitBreaker against a local http.server."""
+
+import http.server
+import threading
+import time
+
+import pytest
+
+from download_journal import TransientDownloadError
+from stroke_http_client import CircuitOpenError, PooledHTTPClient, RetryPolicy
+
+# Short delays so retries do not slow the suite down
+FAST_RETRIES = RetryPolicy(attempts=3, base_delay=0.01, max_delay=0.02)
+
+
+class ScriptedHandler(http.server.BaseHTTPRequestHandler):
+    """
+    /ok          200
+    /missing     404
+    /down        500, always
+    /flaky/N     503 for the first N requests, then 200
+    /slow-once   200, but the first request stalls past the client timeout
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.lock:
+            hits = self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        status = 200
+        if self.path == "/missing":
+            status = 404
+        elif self.path == "/down":
+            status = 500
+        elif self.path.startswith("/flaky/") and hits <= int(self.path.rsplit("/", 1)[1]):
+            status = 503
+        elif self.path == "/slow-once" and hits == 1:
+            time.sleep(0.5)
+        body = str(status).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.hits = {}
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_keep_alive_connection_is_reused(server):
+    with PooledHTTPClient(retry_policy=FAST_RETRIES) as client:
+        for _ in range(10):
+            assert client.get(server.url + "/ok").status == 200
+    assert server.connections == 1
+    assert client.metrics.connections_opened == 1
+    assert client.metrics.connections_reused == 9
+
+
+def test_5xx_is_retried_until_success(server):
+    with PooledHTTPClient(retry_policy=FAST_RETRIES) as client:
+        response = client.get(server.url + "/flaky/2")
+    assert response.status == 200
+    assert server.hits["/flaky/2"] == 3
+    assert client.metrics.retries_by_cause == {"HTTP 503": 2}
+
+
+def test_retries_run_out(server):
+    with PooledHTTPClient(retry_policy=FAST_RETRIES) as client:
+        with pytest.raises(TransientDownloadError):
+            client.get(server.url + "/down")
+    assert server.hits["/down"] == FAST_RETRIES.attempts
+    assert client.metrics.failures == 1
+
+
+def test_timeout_is_retried(server):
+    with PooledHTTPClient(timeout=0.2, retry_policy=FAST_RETRIES) as client:
+        response = client.get(server.url + "/slow-once")
+    assert response.status == 200
+    assert server.hits["/slow-once"] == 2
+    assert client.metrics.retries == 1
+
+
+def test_404_is_returned_without_retry(server):
+    with PooledHTTPClient(retry_policy=FAST_RETRIES) as client:
+        response = client.get(server.url + "/missing")
+        assert client.breaker("127.0.0.1").state == "closed"
+    assert response.status == 404
+    assert server.hits["/missing"] == 1
+    assert client.metrics.retries == 0
+
+
+def test_breaker_opens_then_half_opens(server):
+    client = PooledHTTPClient(retry_policy=RetryPolicy(attempts=1), breaker_failure_threshold=2,
+                              breaker_reset_timeout=0.2)
+    breaker = client.breaker("127.0.0.1")
+    for _ in range(2):
+        with pytest.raises(TransientDownloadError):
+            client.get(server.url + "/down")
+    assert breaker.state == "open"
+
+    # Open: fails fast without reaching the server
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url + "/ok")
+    assert "/ok" not in server.hits
+    assert client.metrics.circuit_rejections == 1
+
+    # Half-open: one trial request; a failure opens the circuit again at once
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    with pytest.raises(TransientDownloadError):
+        client.get(server.url + "/down")
+    assert breaker.state == "open"
+
+    # A successful trial closes it
+    time.sleep(0.25)
+    assert client.get(server.url + "/ok").status == 200
+    assert breaker.state == "closed"
+    client.close()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Validate the generated stroke data JSON files before they ship in the app.
+
+Usage:
+    python3 validate_stroke_data.py
+    python3 validate_stroke_data.py strokedata/kanastrokes.json --report report.json --jobs 4
+    python3 validate_stroke_data.py --expected-counts stroke_data_swift.json --strict
+
+This is the build-time counterpart of StrokeDataConverter.validateCombinedJSON
+in the app. It checks:
+1. Key format ("U+XXXX" matching the codepoint, "N+<n>" for compounds)
+2. Coordinates are finite and inside the normalized 0-1 box
+3. Timestamps 't' never decrease within a stroke and stay within the stroke
+   (0-1, or 0-duration seconds when stroke_timeline.py added a "timeline")
+4. No empty glyphs or strokes, and no placeholder (fake) data
+5. Stroke counts agree across sources (KanjiVG vs hanzi-writer) and with an
+   optional reference file
+6. Duplicate codepoints within and across files
+
+Each file is a shard that is validated in its own worker process; the
+cross-file checks run on small per-glyph summaries afterwards. Results are
+written as a JSON report and the exit code is non-zero if any error was found.
+"""
+
+import json
+import math
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from stroke_inputs import DEFAULT_FILES
+from stroke_writer import atomic_open
+
+DEFAULT_REPORT = "validation_report.json"
+
+# Slack for float rounding at the edges of the normalized box
+COORD_TOLERANCE = 1e-3
+
+KEY_PATTERN = re.compile(r"^U\+[0-9A-F]{4,6}$")
+COMPOUND_KEY_PATTERN = re.compile(r"^N\+\d+$")
+
+_get_x = itemgetter("x")
+_get_y = itemgetter("y")
+
+ERROR = "error"
+WARNING = "warning"
+
+# Severity of every check, so the report can be filtered without guessing
+CHECKS = {
+    "invalid_json": ERROR,
+    "key_format": ERROR,
+    "codepoint_mismatch": ERROR,
+    "empty_glyph": ERROR,
+    "empty_stroke": ERROR,
+    "placeholder": ERROR,
+    "non_finite": ERROR,
+    "out_of_bounds": ERROR,
+    "t_not_monotonic": ERROR,
+    "t_out_of_range": WARNING,
+    "duplicate_codepoint": ERROR,
+    "duplicate_stroke": WARNING,
+    "stroke_count_mismatch": ERROR,
+    "shadowed_across_files": WARNING,
+}
+
+
+def make_issue(check: str, file: str, key: Optional[str], message: str,
+               stroke: Optional[int] = None) -> Dict:
+    issue = {
+        "check": check,
+        "severity": CHECKS[check],
+        "file": file,
+        "key": key,
+        "message": message,
+    }
+    if stroke is not None:
+        issue["stroke"] = stroke
+    return issue
+
+
+def expected_key(codepoint: int) -> str:
+    """The key format shared by every pipeline."""
+    if codepoint < 0:
+        return f"N+{-codepoint}"
+    return f"U+{codepoint:04X}"
+
+
+def validate_glyph(file: str, key: str, entry: Dict) -> List[Dict]:
+    """Run all per-glyph checks for one entry."""
+    issues = []
+    codepoint = entry.get("codepoint")
+    character = entry.get("character", "")
+    strokes = entry.get("strokes") or []
+
+    # Key format and codepoint consistency
+    if not (KEY_PATTERN.match(key) or COMPOUND_KEY_PATTERN.match(key)):
+        issues.append(make_issue("key_format", file, key, f"unrecognized key format '{key}'"))
+    elif isinstance(codepoint, int) and key != expected_key(codepoint):
+        issues.append(make_issue("key_format", file, key,
+                                 f"expected key '{expected_key(codepoint)}'"))
+
+    if not isinstance(codepoint, int):
+        issues.append(make_issue("codepoint_mismatch", file, key, "missing or non-integer codepoint"))
+    elif codepoint >= 0 and character != chr(codepoint):
+        issues.append(make_issue("codepoint_mismatch", file, key,
+                                 f"character '{character}' is not U+{codepoint:04X}"))
+
+    if entry.get("placeholder"):
+        issues.append(make_issue("placeholder", file, key, "placeholder strokes, not real stroke data"))
+
+    if not strokes:
+        issues.append(make_issue("empty_glyph", file, key, "glyph has no strokes"))
+        return issues
+
+    # Retimed glyphs carry t in seconds, bounded by each stroke's duration
+    durations = (entry.get("timeline") or {}).get("duration") or []
+
+    seen_strokes = set()
+    for index, stroke in enumerate(strokes):
+        if not stroke:
+            issues.append(make_issue("empty_stroke", file, key, "stroke has no points", index))
+            continue
+
+        xs = list(map(_get_x, stroke))
+        ys = list(map(_get_y, stroke))
+        ts = [p.get("t", 0.0) for p in stroke]
+
+        # A single NaN or inf poisons the sum, so one C-level pass per axis suffices
+        if not math.isfinite(sum(xs) + sum(ys) + sum(ts)):
+            issues.append(make_issue("non_finite", file, key, "NaN or infinite value", index))
+            continue
+
+        low = min(min(xs), min(ys))
+        high = max(max(xs), max(ys))
+        if low < -COORD_TOLERANCE or high > 1 + COORD_TOLERANCE:
+            issues.append(make_issue("out_of_bounds", file, key,
+                                     f"coordinates span {low:.4g}..{high:.4g}, expected 0..1", index))
+
+        if ts != sorted(ts):
+            issues.append(make_issue("t_not_monotonic", file, key, "timestamps decrease", index))
+        else:
+            t_max = durations[index] if index < len(durations) else 1.0
+            if ts[0] < 0 or ts[-1] > t_max + COORD_TOLERANCE:
+                issues.append(make_issue("t_out_of_range", file, key,
+                                         f"t spans {ts[0]:.4g}..{ts[-1]:.4g}, expected 0..{t_max:.4g}", index))
+
+        signature = (tuple(xs), tuple(ys))
+        if signature in seen_strokes:
+            issues.append(make_issue("duplicate_stroke", file, key, "stroke repeats an earlier stroke", index))
+        seen_strokes.add(signature)
+
+    return issues
+
+
+def validate_shard(path: str) -> Tuple[List[Dict], Dict[int, Tuple[str, int]], int]:
+    """
+    Validate one file. Returns its issues, a {codepoint: (key, stroke_count)}
+    summary for the cross-file checks, and the number of glyphs seen.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        return [make_issue("invalid_json", path, None, f"{type(e).__name__}: {e}")], {}, 0
+
+    if not isinstance(data, dict):
+        return [make_issue("invalid_json", path, None, "top level is not an object")], {}, 0
+
+    issues = []
+    summary = {}
+    for key, entry in data.items():
+        issues.extend(validate_glyph(path, key, entry))
+
+        codepoint = entry.get("codepoint")
+        if not isinstance(codepoint, int):
+            continue
+        if codepoint in summary:
+            issues.append(make_issue("duplicate_codepoint", path, key,
+                                     f"same codepoint as '{summary[codepoint][0]}'"))
+        summary[codepoint] = (key, len(entry.get("strokes") or []))
+
+    return issues, summary, len(data)
+
+
+def load_expected_counts(path: str) -> Dict[int, int]:
+    """
+    Read reference stroke counts. Accepts the stroke_data_swift.json format
+    written by chinese_stroke_fetcher.py, or a plain {"字": count} object.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    characters = data.get("characters", data)
+    counts = {}
+    for char, value in characters.items():
+        count = value.get("strokeCount") if isinstance(value, dict) else value
+        if isinstance(count, int) and len(char) == 1:
+            counts[ord(char)] = count
+    return counts
+
+
+def cross_check(summaries: Dict[str, Dict[int, Tuple[str, int]]],
+                expected_counts: Dict[int, int]) -> List[Dict]:
+    """Checks that need more than one file: shadowing and stroke counts."""
+    issues = []
+    owners: Dict[int, Tuple[str, str, int]] = {}
+
+    # Files are merged in order by the app, so a later file shadows an earlier one
+    for path, summary in summaries.items():
+        for codepoint, (key, count) in summary.items():
+            if codepoint in owners:
+                other_path, other_key, other_count = owners[codepoint]
+                if count != other_count:
+                    issues.append(make_issue("stroke_count_mismatch", path, key,
+                                             f"{count} strokes here, {other_count} in {other_path}"))
+                issues.append(make_issue("shadowed_across_files", path, key,
+                                         f"also defined in {other_path} as '{other_key}'"))
+            owners[codepoint] = (path, key, count)
+
+    for codepoint, (path, key, count) in owners.items():
+        expected = expected_counts.get(codepoint)
+        if expected is not None and expected != count:
+            issues.append(make_issue("stroke_count_mismatch", path, key,
+                                     f"{count} strokes, reference has {expected}"))
+
+    return issues
+
+
+def validate_files(paths: List[str], expected_counts: Optional[Dict[int, int]] = None,
+                   jobs: Optional[int] = None) -> Dict:
+    """Validate all shards in parallel and build the report dictionary."""
+    start = time.perf_counter()
+
+    if len(paths) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(validate_shard, paths))
+    else:
+        results = [validate_shard(path) for path in paths]
+
+    issues = []
+    summaries = {}
+    files = {}
+    for path, (shard_issues, summary, glyph_count) in zip(paths, results):
+        issues.extend(shard_issues)
+        summaries[path] = summary
+        files[path] = {"glyphs": glyph_count, "issues": len(shard_issues)}
+
+    issues.extend(cross_check(summaries, expected_counts or {}))
+
+    by_check: Dict[str, int] = {}
+    for issue in issues:
+        by_check[issue["check"]] = by_check.get(issue["check"], 0) + 1
+
+    errors = sum(1 for issue in issues if issue["severity"] == ERROR)
+    return {
+        "ok": errors == 0,
+        "errors": errors,
+        "warnings": len(issues) - errors,
+        "glyphs": sum(f["glyphs"] for f in files.values()),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "files": files,
+        "by_check": by_check,
+        "issues": issues,
+    }
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(name: str) -> Optional[str]:
+        if name in args:
+            idx = args.index(name)
+            value = args[idx + 1]
+            del args[idx:idx + 2]
+            return value
+        return None
+
+    report_path = option('--report') or DEFAULT_REPORT
+    counts_path = option('--expected-counts')
+    jobs = option('--jobs')
+    strict = '--strict' in args
+    if strict:
+        args.remove('--strict')
+    paths = args or DEFAULT_FILES
+
+    print("🔍 Stroke Data Validator")
+    print("=" * 50)
+
+    expected_counts = load_expected_counts(counts_path) if counts_path else {}
+    report = validate_files(paths, expected_counts, int(jobs) if jobs else None)
+
+    with atomic_open(report_path) as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for path, info in report["files"].items():
+        print(f"  {path}: {info['glyphs']} glyphs, {info['issues']} issues")
+    for check, count in sorted(report["by_check"].items()):
+        print(f"  {'❌' if CHECKS[check] == ERROR else '⚠️ '} {check}: {count}")
+
+    print(f"\n📊 {report['glyphs']} glyphs in {report['elapsed_ms']} ms: "
+          f"{report['errors']} errors, {report['warnings']} warnings")
+    print(f"📄 Report written to {report_path}")
+
+    failed = not report["ok"] or (strict and report["warnings"])
+    print("\n❌ Validation failed" if failed else "\n✅ All stroke data is valid!")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()